@@ -0,0 +1,116 @@
+"""
+Detection Resolution Benchmark
+
+Compares face detection on full-resolution frames (AI_FACE_DETECT_MAX_SIDE=0) with the
+reduced-resolution detection mode, for latency and peak resident memory. Each timed run
+covers the request path up to the crop: JPEG decode, face detection and cropping.
+The detector is the configured AI_FACE_DETECTOR_BACKEND.
+
+Peak RSS only ever grows within a process, so every (max side, resolution) case runs in
+its own child process. Each child reports its peak RSS after loading the detector and again
+after the timed runs; the difference is the memory taken by decoding and detection.
+
+Usage (from the AI folder):
+    uv run python -m benchmarks.bench_detection_scale
+    uv run python -m benchmarks.bench_detection_scale --max-sides 0 1280 1600 2400
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+
+import cv2
+import numpy as np
+
+from benchmarks.common import AI_DIR, RESULTS_DIR, environment_info, synthetic_scene, time_call, write_json
+
+# Phone photo sizes (width, height): 2.7 MP, 12 MP and 48 MP
+RESOLUTIONS = [(1920, 1440), (4000, 3000), (8000, 6000)]
+
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'detection_scale.json')
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _jpeg_frame(width: int, height: int) -> np.ndarray:
+    """A photo-like JPEG upload of the given size (rendered small and scaled up to keep RSS low)."""
+    scene = synthetic_scene(min(width, 1000), min(height, 750), seed=1)
+    frame = cv2.resize(scene, (width, height), interpolation=cv2.INTER_LINEAR)
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buffer
+
+
+def run_child(width: int, height: int, repeat: int) -> dict:
+    """Time decode + detect + crop in this process (AI_FACE_DETECT_MAX_SIDE is set by the parent)."""
+    from services.face_processing import detect_and_crop_face, face_detector_model
+    if face_detector_model.get() is None:
+        raise RuntimeError("Face detector is not available")
+
+    buffer = _jpeg_frame(width, height)
+    rss_loaded = _peak_rss_mb()
+    timing = time_call(lambda: detect_and_crop_face(cv2.imdecode(buffer, cv2.IMREAD_COLOR)), repeat, warmup=1)
+    rss_peak = _peak_rss_mb()
+    return {
+        **timing,
+        'peak_rss_mb': round(rss_peak, 1),
+        'detection_rss_mb': round(rss_peak - rss_loaded, 1),
+    }
+
+
+def spawn(max_side: int, width: int, height: int, repeat: int) -> dict:
+    """Run one case in a fresh interpreter and return its results."""
+    env = {**os.environ, 'AI_FACE_DETECT_MAX_SIDE': str(max_side), 'AI_PRELOAD_MODELS': 'false'}
+    command = [
+        sys.executable, '-m', 'benchmarks.bench_detection_scale', '--child',
+        '--width', str(width), '--height', str(height), '--repeat', str(repeat),
+    ]
+    completed = subprocess.run(command, cwd=AI_DIR, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else 'child failed')
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Full vs reduced-resolution face detection benchmark")
+    parser.add_argument('--max-sides', nargs='+', type=int, default=[0, 1600],
+                        help="AI_FACE_DETECT_MAX_SIDE values to compare (0 = full resolution)")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per case")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--width', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--height', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.width, args.height, args.repeat)))
+        return 0
+
+    results = {}
+    print(f"{'case':<38} {'median':>10} {'peak RSS':>10} {'detect RSS':>11}")
+    for width, height in RESOLUTIONS:
+        for max_side in args.max_sides:
+            key = f"face_detect/{width}x{height}/max_side_{max_side}"
+            try:
+                result = spawn(max_side, width, height, args.repeat)
+            except Exception as e:
+                print(f"{key:<38} skipped: {e}")
+                continue
+            results[key] = result
+            print(f"{key:<38} {result['median_ms']:>8.1f}ms {result['peak_rss_mb']:>8.1f}MB "
+                  f"{result['detection_rss_mb']:>9.1f}MB")
+
+    write_json(args.output, {'environment': environment_info(), 'results': results})
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
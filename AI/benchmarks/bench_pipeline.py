@@ -0,0 +1,246 @@
+"""
+Pipeline Microbenchmarks
+
+Times each stage of the AI pipeline in isolation on a fixed set of synthetic images
+(several resolutions) plus any sample photos in AI/Image:
+
+    decode       cv2.imdecode of a JPEG upload
+    face_detect  face_processing.detect_and_crop_face
+    upscale      face_processing.upscale_face, plus tiled vs. untiled output difference
+    plate_detect CarPlateIdentifier._detect_plate
+    plate_ocr    CarPlateIdentifier._process_and_ocr
+    encode       cv2.imencode of the /face response (JPEG, WebP, PNG)
+
+Results are written as JSON and compared with a stored baseline; stages whose median
+got slower than the threshold are flagged and the script exits with status 1. So does a
+tiled upscale whose mean absolute error exceeds upscaler.TILED_MAX_MEAN_ABS_ERROR.
+
+Usage (from the AI folder):
+    uv run python -m benchmarks.bench_pipeline
+    uv run python -m benchmarks.bench_pipeline --stages decode encode --repeat 20
+    uv run python -m benchmarks.bench_pipeline --save-baseline
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+import cv2
+
+from benchmarks.common import (
+    BENCH_DIR, RESULTS_DIR, environment_info, load_sample_images,
+    read_json, synthetic_plate, synthetic_scene, time_call, write_json,
+)
+from services.upscaler import TILED_MAX_MEAN_ABS_ERROR
+
+logger = logging.getLogger(__name__)
+
+# Full-frame resolutions (width, height): VGA, HD-ish, 2.7 MP and a 12 MP phone photo
+RESOLUTIONS = [(640, 480), (1280, 960), (1920, 1440), (4000, 3000)]
+
+# Face crop edge lengths fed to the upscaler
+UPSCALE_SIZES = [64, 128, 256]
+
+# (crop edge, tile edge) pairs whose tiled output is compared with the untiled one
+TILED_CASES = [(128, 64), (256, 96)]
+
+# Plate crop heights and styles fed to OCR
+PLATE_CASES = [
+    ('VLN 7728', 40, False),
+    ('VLN 7728', 80, False),
+    ('S 2293 N', 60, True),
+]
+
+STAGES = ['decode', 'face_detect', 'upscale', 'plate_detect', 'plate_ocr', 'encode']
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'latest.json')
+
+
+def frame_cases() -> dict:
+    """Synthetic full frames at every resolution plus the sample photos."""
+    cases = {f"synthetic_{w}x{h}": synthetic_scene(w, h, seed=i) for i, (w, h) in enumerate(RESOLUTIONS)}
+    for name, image in load_sample_images().items():
+        cases[f"sample_{name}"] = image
+    return cases
+
+
+def bench_decode(args) -> dict:
+    results = {}
+    for name, image in frame_cases().items():
+        _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        results[f"decode/{name}"] = time_call(lambda: cv2.imdecode(buffer, cv2.IMREAD_COLOR), args.repeat)
+    return results
+
+
+def bench_encode(args) -> dict:
+    from services import config
+
+    # The /face output formats at the service's default quality, with the encoded size
+    formats = {
+        'jpeg': ('.jpg', [cv2.IMWRITE_JPEG_QUALITY, config.FACE_OUTPUT_QUALITY]),
+        'webp': ('.webp', [cv2.IMWRITE_WEBP_QUALITY, config.FACE_OUTPUT_QUALITY]),
+        'png': ('.png', []),
+    }
+    results = {}
+    for name, image in frame_cases().items():
+        for output_format, (extension, params) in formats.items():
+            result = time_call(lambda: cv2.imencode(extension, image, params), args.repeat)
+            result['bytes'] = int(cv2.imencode(extension, image, params)[1].nbytes)
+            results[f"encode/{output_format}/{name}"] = result
+    return results
+
+
+def bench_face_detect(args) -> dict:
+    from services.face_processing import detect_and_crop_face
+
+    results = {}
+    for name, image in frame_cases().items():
+        results[f"face_detect/{name}"] = time_call(lambda: detect_and_crop_face(image), args.heavy_repeat, warmup=1)
+    return results
+
+
+def bench_upscale(args) -> dict:
+    from services.face_processing import upscale_face, upscaler_model
+
+    scene = synthetic_scene(1280, 960, seed=7)
+    results = {}
+    for size in UPSCALE_SIZES:
+        crop = scene[200:200 + size, 300:300 + size].copy()
+        results[f"upscale/{size}x{size}"] = time_call(lambda: upscale_face(crop), args.heavy_repeat, warmup=1)
+
+    upscaler = upscaler_model.get()
+    for size, tile_size in TILED_CASES:
+        crop = scene[200:200 + size, 300:300 + size].copy()
+        result = time_call(lambda: upscaler._upscale_tiled(crop, tile_size), args.heavy_repeat, warmup=1)
+        result['mean_abs_error'] = round(upscaler.tiled_mean_abs_error(crop, tile_size), 4)
+        results[f"upscale_tiled/{size}x{size}_tile{tile_size}"] = result
+    return results
+
+
+def _plate_identifier():
+    from services.plate_identifier import CarPlateIdentifier
+    return CarPlateIdentifier()
+
+
+def bench_plate_detect(args) -> dict:
+    identifier = _plate_identifier()
+    results = {}
+    for name, image in frame_cases().items():
+        results[f"plate_detect/{name}"] = time_call(lambda: identifier._detect_plate(image), args.heavy_repeat, warmup=1)
+    return results
+
+
+def bench_plate_ocr(args) -> dict:
+    identifier = _plate_identifier()
+    results = {}
+    for text, height, inverted in PLATE_CASES:
+        crop = synthetic_plate(text, height=height, inverted=inverted)
+        key = f"plate_ocr/{text.replace(' ', '')}_{height}px{'_inverted' if inverted else ''}"
+        results[key] = time_call(lambda: identifier._process_and_ocr(crop), args.heavy_repeat, warmup=1)
+    return results
+
+
+BENCHMARKS = {
+    'decode': bench_decode,
+    'face_detect': bench_face_detect,
+    'upscale': bench_upscale,
+    'plate_detect': bench_plate_detect,
+    'plate_ocr': bench_plate_ocr,
+    'encode': bench_encode,
+}
+
+
+def compare(current: dict, baseline: dict, threshold: float, floor_ms: float) -> list[str]:
+    """
+    Compare medians with the baseline.
+
+    A case regresses when its median is more than `threshold` (fraction) slower than
+    the baseline and the absolute difference exceeds `floor_ms` (to ignore timer noise).
+
+    Returns:
+        The keys of regressed cases.
+    """
+    regressions = []
+    print(f"\n{'case':<48} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key in sorted(current):
+        base = baseline.get(key)
+        cur = current[key]['median_ms']
+        if base is None:
+            print(f"{key:<48} {'-':>10} {cur:>9.2f}ms {'new':>8}")
+            continue
+        base_ms = base['median_ms']
+        change = (cur - base_ms) / base_ms if base_ms else 0.0
+        regressed = cur - base_ms > floor_ms and change > threshold
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{key:<48} {base_ms:>8.2f}ms {cur:>8.2f}ms {change:>+7.1%}{flag}")
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+
+def check_tiled_error(results: dict) -> list[str]:
+    """Keys of tiled upscale cases whose mean absolute error exceeds the documented tolerance."""
+    return [
+        key for key, result in sorted(results.items())
+        if result.get('mean_abs_error', 0.0) > TILED_MAX_MEAN_ABS_ERROR
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-stage microbenchmarks of the AI pipeline")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help="Stages to run")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs for cheap stages (decode/encode)")
+    parser.add_argument('--heavy-repeat', type=int, default=5, help="Timed runs for model stages")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline results JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Allowed median slowdown (fraction)")
+    parser.add_argument('--floor-ms', type=float, default=1.0, help="Ignore differences below this many ms")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    results = {}
+    for stage in args.stages:
+        print(f"Running {stage}...")
+        try:
+            results.update(BENCHMARKS[stage](args))
+        except Exception as e:
+            # A missing model only skips its own stages
+            print(f"  skipped {stage}: {e}")
+
+    report = {'environment': environment_info(), 'results': results}
+    write_json(args.output, report)
+    print(f"Results written to {args.output}")
+
+    inaccurate = check_tiled_error(results)
+    if inaccurate:
+        print(f"\nTiled upscale error over {TILED_MAX_MEAN_ABS_ERROR} gray levels: {', '.join(inaccurate)}")
+        return 1
+
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = read_json(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    if baseline['environment'].get('platform') != report['environment']['platform']:
+        print("Warning: baseline was recorded on a different platform; timings may not be comparable.")
+
+    regressions = compare(results, baseline['results'], args.threshold, args.floor_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Plate OCR Mode Benchmark
+
+Compares the two AI_PLATE_OCR_MODE paths of CarPlateIdentifier._process_and_ocr on
+plate crops with known text:
+
+    full        EasyOCR readtext: CRAFT text detection + recognition per variant
+    recognizer  recognizer only on the whole crop (or its two rows), A-Z / 0-9 allowlist
+
+Cases are synthetic crops (one- and two-row, light and dark plates, several heights,
+plus blurred and noisy copies) and, with --crops, real plate crops named after their
+plate (`VLN7728.jpg`, `WXY1234_2.png`; spaces and anything after `_` are ignored).
+
+For each mode it reports the median latency per crop, exact-match accuracy and
+character accuracy (1 - edit distance / plate length). Variants are tried in their
+default order in both modes so learned ordering does not favour the mode run second.
+
+Usage (from the AI folder):
+    uv run python -m benchmarks.bench_plate_ocr_modes
+    uv run python -m benchmarks.bench_plate_ocr_modes --crops ../plate_crops --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+import cv2
+import numpy as np
+
+from benchmarks.common import IMAGE_EXTENSIONS, RESULTS_DIR, environment_info, synthetic_plate, time_call, write_json
+from services import config
+
+MODES = ['full', 'recognizer']
+
+# (text, crop height, white-on-black)
+SYNTHETIC_PLATES = [
+    ('VLN 7728', 40, False),
+    ('VLN 7728', 80, False),
+    ('WA 1234 B', 60, False),
+    ('S 2293 N', 60, True),
+    ('JHK 88', 50, False),
+    ('PKL 5067', 60, True),
+    ('WXY\n1234', 80, False),
+    ('BKT\n902', 100, True),
+]
+
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'plate_ocr_modes.json')
+
+
+def _normalize(text: str | None) -> str:
+    return ''.join(c for c in (text or '').upper() if c.isalnum())
+
+
+def _edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _degrade(crop: np.ndarray, seed: int) -> dict[str, np.ndarray]:
+    """Blurred and noisy copies of a clean crop (motion, low light)."""
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, 18, crop.shape)
+    return {
+        'blur': cv2.GaussianBlur(crop, (5, 5), 1.5),
+        'noise': np.clip(crop + noise, 0, 255).astype(np.uint8),
+    }
+
+
+def build_cases(crops_dir: str | None) -> list[tuple[str, str, np.ndarray]]:
+    """(case name, expected plate, BGR crop) for every synthetic and labelled crop."""
+    cases = []
+    for seed, (text, height, inverted) in enumerate(SYNTHETIC_PLATES):
+        crop = synthetic_plate(text, height=height, inverted=inverted)
+        name = f"{_normalize(text)}_{height}px{'_inverted' if inverted else ''}"
+        cases.append((name, _normalize(text), crop))
+        cases += [(f"{name}_{kind}", _normalize(text), image) for kind, image in _degrade(crop, seed).items()]
+
+    if crops_dir:
+        for file_name in sorted(os.listdir(crops_dir)):
+            if not file_name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            crop = cv2.imread(os.path.join(crops_dir, file_name), cv2.IMREAD_COLOR)
+            if crop is not None:
+                label = os.path.splitext(file_name)[0].split('_')[0]
+                cases.append((file_name, _normalize(label), crop))
+    return cases
+
+
+def run_mode(identifier, mode: str, cases: list, repeat: int) -> dict:
+    config.PLATE_OCR_MODE = mode
+    per_case = {}
+    for name, expected, crop in cases:
+        text, confidence = identifier._process_and_ocr(crop)
+        read = _normalize(text)
+        timing = time_call(lambda: identifier._process_and_ocr(crop), repeat, warmup=0)
+        per_case[name] = {
+            'expected': expected,
+            'read': read,
+            'confidence': round(confidence, 4) if confidence is not None else None,
+            'exact': read == expected,
+            'char_accuracy': round(max(0.0, 1 - _edit_distance(read, expected) / len(expected)), 4),
+            'median_ms': timing['median_ms'],
+        }
+
+    values = per_case.values()
+    return {
+        'median_ms': round(statistics.median(c['median_ms'] for c in values), 3),
+        'exact_accuracy': round(sum(c['exact'] for c in values) / len(per_case), 4),
+        'char_accuracy': round(statistics.fmean(c['char_accuracy'] for c in values), 4),
+        'cases': per_case,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Full EasyOCR vs recognizer-only plate OCR benchmark")
+    parser.add_argument('--crops', help="Folder of real plate crops named after their plate text")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES, help="OCR modes to compare")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per crop")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args()
+
+    from services.plate_identifier import CarPlateIdentifier
+    identifier = CarPlateIdentifier()
+    config.PLATE_OCR_ADAPTIVE_ORDER = False
+
+    cases = build_cases(args.crops)
+    print(f"{len(cases)} crop(s)")
+    results = {mode: run_mode(identifier, mode, cases, args.repeat) for mode in args.modes}
+
+    print(f"\n{'case':<32}" + ''.join(f" {mode:>24}" for mode in args.modes))
+    for name, expected, _ in cases:
+        row = f"{name:<32}"
+        for mode in args.modes:
+            case = results[mode]['cases'][name]
+            mark = 'ok' if case['exact'] else (case['read'] or '-')
+            row += f" {mark:>12} {case['median_ms']:>9.1f}ms"
+        print(row)
+
+    print(f"\n{'mode':<12} {'median':>10} {'exact':>8} {'chars':>8}")
+    for mode in args.modes:
+        summary = results[mode]
+        print(f"{mode:<12} {summary['median_ms']:>8.1f}ms {summary['exact_accuracy']:>8.1%} "
+              f"{summary['char_accuracy']:>8.1%}")
+
+    write_json(args.output, {'environment': environment_info(), 'repeat': args.repeat, 'results': results})
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
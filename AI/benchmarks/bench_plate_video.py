@@ -0,0 +1,145 @@
+"""
+Plate Video Benchmark
+
+Measures POST /plate/video processing in frames per second: frame sampling, batched
+YOLO detection, tracking, and OCR of the sharpest crops per track
+(CarPlateIdentifier.identify_tracks). For comparison it also reads every detection of
+every sampled frame (identify_plates per frame), which is what the endpoint avoids.
+
+By default a synthetic clip is rendered: plates drifting across a photo-like scene, with
+every third frame motion-blurred. The custom plate detector may not fire on drawn plates,
+so pass a real clip with --video (and its plate with --expected) for meaningful figures.
+
+Usage (from the AI folder):
+    uv run python -m benchmarks.bench_plate_video
+    uv run python -m benchmarks.bench_plate_video --video ../clips/car.mp4 --expected "VLN 7728"
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.common import RESULTS_DIR, environment_info, synthetic_plate, synthetic_scene, write_json
+from services import config
+from services.plate_tracking import open_video, sample_frames
+
+# Synthetic clip: (plate text, start x, start y, x pixels moved per frame)
+SYNTHETIC_VEHICLES = [('VLN 7728', 200, 420, 6), ('WA 1234 B', 900, 380, -4)]
+SYNTHETIC_SIZE = (1280, 720)
+SYNTHETIC_FPS = 30
+
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'plate_video.json')
+
+
+def render_clip(path: str, seconds: float) -> str:
+    """Write the synthetic clip as MP4 and return its path."""
+    width, height = SYNTHETIC_SIZE
+    scene = synthetic_scene(width, height, seed=3)
+    plates = [(synthetic_plate(text, height=50), x, y, dx) for text, x, y, dx in SYNTHETIC_VEHICLES]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), SYNTHETIC_FPS, (width, height))
+    for index in range(int(seconds * SYNTHETIC_FPS)):
+        frame = scene.copy()
+        for plate, x, y, dx in plates:
+            left = int(np.clip(x + dx * index, 0, width - plate.shape[1]))
+            frame[y:y + plate.shape[0], left:left + plate.shape[1]] = plate
+        if index % 3 == 0:
+            # Horizontal motion blur, as from a moving car or a shaking hand
+            kernel = np.full((1, 9), 1 / 9, dtype=np.float32)
+            frame = cv2.filter2D(frame, -1, kernel)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def sampled(path: str, sample_fps: float, max_frames: int):
+    """Frames of the clip as POST /plate/video samples them."""
+    capture = open_video(path)
+    if capture is None:
+        raise RuntimeError(f"Could not open {path}")
+    return sample_frames(capture, sample_fps, max_frames)
+
+
+def run_tracked(identifier, path: str, args) -> dict:
+    start = time.perf_counter()
+    tracks, frames = identifier.identify_tracks(sampled(path, args.sample_fps, args.max_frames))
+    elapsed = time.perf_counter() - start
+    return {
+        'frames': frames,
+        'seconds': round(elapsed, 3),
+        'fps': round(frames / elapsed, 2) if elapsed else 0.0,
+        'ocr_crops': sum(track['readings'] for track in tracks),
+        'plates': [track['plate'] for track in tracks],
+    }
+
+
+def run_every_frame(identifier, path: str, args) -> dict:
+    start = time.perf_counter()
+    frames = crops = 0
+    plates = []
+    for frame in sampled(path, args.sample_fps, args.max_frames):
+        readings = identifier.identify_plates(frame)
+        frames += 1
+        crops += len(readings)
+        plates += [reading['plate'] for reading in readings]
+    elapsed = time.perf_counter() - start
+    return {
+        'frames': frames,
+        'seconds': round(elapsed, 3),
+        'fps': round(frames / elapsed, 2) if elapsed else 0.0,
+        'ocr_crops': crops,
+        'plates': sorted({plate for plate in plates if plate}),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Tracked vs per-frame plate reading on a short clip")
+    parser.add_argument('--video', help="Clip to process (default: a rendered synthetic clip)")
+    parser.add_argument('--expected', nargs='*', default=None, help="Plates in the clip, for the hit check")
+    parser.add_argument('--seconds', type=float, default=4.0, help="Length of the synthetic clip")
+    parser.add_argument('--sample-fps', type=float, default=config.PLATE_VIDEO_SAMPLE_FPS, help="Frames sampled per second")
+    parser.add_argument('--max-frames', type=int, default=config.PLATE_VIDEO_MAX_FRAMES, help="Maximum frames processed")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args()
+
+    from services.plate_identifier import CarPlateIdentifier
+    identifier = CarPlateIdentifier()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.video or render_clip(os.path.join(tmp, 'synthetic.mp4'), args.seconds)
+        expected = args.expected if args.expected is not None else (
+            [] if args.video else [text for text, _, _, _ in SYNTHETIC_VEHICLES]
+        )
+
+        # Warm up the models so the first mode does not pay for lazy initialisation
+        identifier.identify_tracks(sampled(path, args.sample_fps, 2))
+        results = {
+            'tracked': run_tracked(identifier, path, args),
+            'every_frame': run_every_frame(identifier, path, args),
+        }
+
+    print(f"{'mode':<12} {'frames':>7} {'fps':>8} {'OCR crops':>10} {'plates':>8}")
+    for mode, result in results.items():
+        hits = sum(1 for plate in expected if plate in result['plates'])
+        result['expected_found'] = f"{hits}/{len(expected)}" if expected else None
+        print(f"{mode:<12} {result['frames']:>7} {result['fps']:>8.2f} {result['ocr_crops']:>10} "
+              f"{len(result['plates']):>8}  {', '.join(p or '-' for p in result['plates'])}")
+
+    write_json(args.output, {
+        'environment': environment_info(),
+        'video': args.video or 'synthetic',
+        'sample_fps': args.sample_fps,
+        'max_frames': args.max_frames,
+        'expected': expected,
+        'results': results,
+    })
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
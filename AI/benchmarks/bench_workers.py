@@ -0,0 +1,238 @@
+"""
+Worker Memory Benchmark
+
+Compares the memory of N independent API processes (`uvicorn main:app`, each loading
+every model itself) with `serve.py --workers N` (models loaded once, workers forked).
+
+Each setup is started, given time to load, then measured from /proc/<pid>/smaps_rollup:
+
+    RSS     resident memory, counting shared pages in full for every process
+    PSS     proportional set size: shared pages divided between the processes sharing them
+    shared  resident pages also mapped by another process
+
+Summed RSS overstates forked workers because the copy-on-write weights count once per
+worker; summed PSS is the real footprint. Linux only.
+
+Usage (from the AI folder):
+    uv run python -m benchmarks.bench_workers
+    uv run python -m benchmarks.bench_workers --workers 4 --requests 20
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import cv2
+
+from benchmarks.common import AI_DIR, RESULTS_DIR, environment_info, load_sample_images, synthetic_scene, write_json
+
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'workers.json')
+
+_SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def memory_of(pid: int) -> dict:
+    """RSS / PSS / shared / private memory of a process in MB."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in _SMAPS_FIELDS:
+                values[name] = int(rest.split()[0]) / 1024
+    return {
+        'rss_mb': round(values.get('Rss', 0), 1),
+        'pss_mb': round(values.get('Pss', 0), 1),
+        'shared_mb': round(values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0), 1),
+        'private_mb': round(values.get('Private_Clean', 0) + values.get('Private_Dirty', 0), 1),
+    }
+
+
+def children_of(parent: int) -> list[int]:
+    """Pids whose parent is the given pid."""
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; the fields after it are fixed
+        fields = stat.rsplit(')', 1)[1].split()
+        if int(fields[1]) == parent:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def wait_ready(port: int, timeout: float) -> bool:
+    """Poll /ready until every model is loaded."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/ready', timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(1)
+    return False
+
+
+def _sample_upload() -> bytes:
+    """One JPEG upload for the warm-up requests (a sample image if there is one)."""
+    images = load_sample_images()
+    image = next(iter(images.values())) if images else synthetic_scene(1280, 960, seed=1)
+    _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buffer.tobytes()
+
+
+def send_requests(port: int, count: int, upload: bytes):
+    """POST the upload to /plate count times so the workers touch their request-time memory."""
+    boundary = 'benchworkers'
+    head = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="sample.jpg"\r\n'
+        f'Content-Type: image/jpeg\r\n\r\n'
+    ).encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+    for i in range(count):
+        # Bytes after the JPEG end marker are ignored by the decoder but change the
+        # cache key, so the result cache does not answer every request
+        body = head + upload + str(i).encode() + tail
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{port}/plate', data=body, method='POST',
+            headers={'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        )
+        try:
+            urllib.request.urlopen(request, timeout=300).read()
+        except OSError:
+            pass
+
+
+def stop(processes: list[subprocess.Popen]):
+    for process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def measure_independent(workers: int, base_port: int, env: dict, args, upload: bytes) -> dict:
+    """N `uvicorn main:app` processes on consecutive ports, each loading its own models."""
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(base_port + i)],
+            cwd=AI_DIR, env={**env, 'AI_PRELOAD_MODELS': 'true'},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        for i in range(workers)
+    ]
+    try:
+        for i in range(workers):
+            if not wait_ready(base_port + i, args.timeout):
+                raise RuntimeError(f"process on port {base_port + i} did not become ready")
+        for i in range(workers):
+            send_requests(base_port + i, args.requests, upload)
+        time.sleep(args.settle)
+        return {'workers': [memory_of(process.pid) for process in processes]}
+    finally:
+        stop(processes)
+
+
+def measure_preforked(workers: int, port: int, env: dict, args, upload: bytes) -> dict:
+    """`serve.py --workers N`: one parent holding the models, N forked workers."""
+    process = subprocess.Popen(
+        [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers)],
+        cwd=AI_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_ready(port, args.timeout):
+            raise RuntimeError("serve.py did not become ready")
+        # The kernel spreads the connections over the workers sharing the socket
+        send_requests(port, args.requests * workers, upload)
+        time.sleep(args.settle)
+        return {
+            'parent': memory_of(process.pid),
+            'workers': [memory_of(pid) for pid in children_of(process.pid)],
+        }
+    finally:
+        stop([process])
+
+
+def summarize(result: dict) -> dict:
+    processes = result['workers'] + ([result['parent']] if 'parent' in result else [])
+    return {
+        'total_rss_mb': round(sum(p['rss_mb'] for p in processes), 1),
+        'total_pss_mb': round(sum(p['pss_mb'] for p in processes), 1),
+    }
+
+
+def print_setup(name: str, result: dict):
+    rows = [(f"worker {i}", memory) for i, memory in enumerate(result['workers'])]
+    if 'parent' in result:
+        rows.insert(0, ("parent", result['parent']))
+    print(f"\n{name}")
+    print(f"  {'process':<12} {'RSS':>10} {'PSS':>10} {'shared':>10} {'private':>10}")
+    for label, memory in rows:
+        print(f"  {label:<12} {memory['rss_mb']:>8.1f}MB {memory['pss_mb']:>8.1f}MB "
+              f"{memory['shared_mb']:>8.1f}MB {memory['private_mb']:>8.1f}MB")
+    print(f"  {'total':<12} {result['total_rss_mb']:>8.1f}MB {result['total_pss_mb']:>8.1f}MB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Independent processes vs preforked workers memory benchmark")
+    parser.add_argument('--workers', type=int, default=2, help="Processes / workers per setup")
+    parser.add_argument('--port', type=int, default=8100, help="First port to use")
+    parser.add_argument('--requests', type=int, default=5, help="Warm-up /plate requests per worker (0 = idle)")
+    parser.add_argument('--settle', type=float, default=2.0, help="Seconds to wait before measuring")
+    parser.add_argument('--timeout', type=float, default=600.0, help="Seconds to wait for models to load")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("This benchmark needs Linux /proc/<pid>/smaps_rollup")
+        return 1
+
+    upload = _sample_upload() if args.requests else b''
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep face jobs out of the real database
+        env = {**os.environ, 'AI_FACE_JOBS_DB': os.path.join(tmp, 'jobs.db')}
+        setups = [
+            ('independent', lambda: measure_independent(args.workers, args.port, env, args, upload)),
+            ('preforked', lambda: measure_preforked(args.workers, args.port + args.workers, env, args, upload)),
+        ]
+        for name, measure in setups:
+            try:
+                result = measure()
+            except Exception as e:
+                print(f"{name}: skipped: {e}")
+                continue
+            result.update(summarize(result))
+            results[name] = result
+            print_setup(f"{name} ({args.workers} worker(s))", result)
+
+    if len(results) == 2:
+        saved = results['independent']['total_pss_mb'] - results['preforked']['total_pss_mb']
+        print(f"\nPreforking saves {saved:.1f}MB PSS across {args.workers} worker(s)")
+
+    write_json(args.output, {
+        'environment': environment_info(),
+        'workers': args.workers,
+        'requests_per_worker': args.requests,
+        'results': results,
+    })
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
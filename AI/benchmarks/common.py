@@ -0,0 +1,153 @@
+"""
+Benchmark Helpers
+
+Shared pieces of the benchmark scripts: deterministic synthetic images,
+sample-image loading, timing and JSON result files.
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import cv2
+import numpy as np
+
+# Get paths
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+SAMPLE_DIR = os.path.join(AI_DIR, 'Image')
+
+# Make `services` importable when a script is run directly
+if AI_DIR not in sys.path:
+    sys.path.insert(0, AI_DIR)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def synthetic_scene(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """
+    Deterministic photo-like BGR image: smooth gradients, shapes and sensor noise.
+
+    Compresses and decodes like a real photo (unlike pure noise) while staying
+    identical across runs and machines.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    image = np.stack([
+        128 + 100 * np.sin(xx / (width / 3.0) + seed),
+        128 + 100 * np.cos(yy / (height / 2.0)),
+        128 + 80 * np.sin((xx + yy) / (width / 5.0)),
+    ], axis=-1)
+
+    for _ in range(12):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        radius = int(rng.integers(min(width, height) // 40 + 1, min(width, height) // 6 + 2))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.circle(image, center, radius, color, -1)
+
+    image += rng.normal(0, 6, image.shape).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def synthetic_plate(text: str = 'VLN 7728', height: int = 60, inverted: bool = False) -> np.ndarray:
+    """
+    Deterministic BGR plate crop: dark text on a light plate (or the reverse).
+
+    Args:
+        text: Plate text to draw; a newline makes a two-row plate (e.g. 'WXY\\n1234').
+        height: Crop height in pixels; the width follows the text.
+        inverted: White text on black (EV / commercial plates).
+    """
+    lines = text.split('\n')
+    scale = height / 40.0 / len(lines)
+    thickness = max(1, int(round(2 * scale)))
+    sizes = [cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)[0] for line in lines]
+    width = max(text_w for text_w, _ in sizes) + int(20 * scale)
+
+    background, foreground = ((20, 20, 20), (235, 235, 235)) if inverted else ((235, 235, 235), (20, 20, 20))
+    plate = np.full((height, width, 3), background, dtype=np.uint8)
+    row_height = height // len(lines)
+    for index, (line, (text_w, text_h)) in enumerate(zip(lines, sizes)):
+        origin = ((width - text_w) // 2, index * row_height + (row_height + text_h) // 2)
+        cv2.putText(plate, line, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, foreground, thickness, cv2.LINE_AA)
+    cv2.rectangle(plate, (1, 1), (width - 2, height - 2), foreground, max(1, thickness // 2))
+    return plate
+
+
+def load_sample_images(sample_dir: str = SAMPLE_DIR) -> dict[str, np.ndarray]:
+    """Load the sample photos in AI/Image (if any), keyed by file name."""
+    images = {}
+    if not os.path.isdir(sample_dir):
+        return images
+    for name in sorted(os.listdir(sample_dir)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            image = cv2.imread(os.path.join(sample_dir, name), cv2.IMREAD_COLOR)
+            if image is not None:
+                images[name] = image
+    return images
+
+
+def time_call(fn, repeat: int = 10, warmup: int = 2) -> dict:
+    """
+    Time a zero-argument callable.
+
+    Returns:
+        Dict with run count and min / median / p90 / mean wall time in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        'runs': repeat,
+        'min_ms': round(samples[0], 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p90_ms': round(samples[min(repeat - 1, int(0.9 * repeat))], 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+    }
+
+
+def environment_info() -> dict:
+    """Machine / library details stored next to the results."""
+    info = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+    }
+    try:
+        import torch
+        info['torch'] = torch.__version__
+        info['cuda'] = torch.cuda.get_device_name(0) if torch.cuda.is_available() else None
+    except ImportError:
+        pass
+    return info
+
+
+def write_json(path: str, data: dict):
+    """Write a results file, creating its folder if needed."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def read_json(path: str) -> dict | None:
+    """Read a results file (None if it does not exist)."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
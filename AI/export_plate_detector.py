@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Plate Detector Export Script
+
+One-off offline step that exports the YOLOv8n plate detector (best.pt) to a graph runtime
+for CPU inference, then checks the exported model's detections against the .pt model.
+
+Formats (select the result with AI_PLATE_DETECTOR_BACKEND):
+    onnx           ONNX Runtime                      -> best.onnx
+    openvino       OpenVINO FP32                     -> best_openvino_model/
+    openvino_int8  OpenVINO INT8 (post-training quantized, needs calibration images)
+                                                     -> best_int8_openvino_model/
+
+Exports use a dynamic batch dimension so the micro-batcher can still send several
+images per forward pass.
+
+Usage (from the AI folder):
+    uv pip install onnx onnxslim onnxruntime          # for onnx
+    uv pip install openvino nncf                      # for openvino / openvino_int8
+
+    uv run python export_plate_detector.py --format onnx
+    uv run python export_plate_detector.py --format openvino_int8 --data path/to/data.yaml
+    uv run python export_plate_detector.py --format onnx --check-only --images path/to/photos
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from services import config
+
+# Fallback check images: the training run's validation mosaics (real Malaysian plates)
+DEFAULT_CHECK_IMAGES = os.path.join(config.MODELS_DIR, 'Yolov8n', 'train', 'val_batch*_labels.jpg')
+
+# Match thresholds per format: (min IoU of matched boxes, max confidence difference)
+TOLERANCES = {
+    'onnx': (0.95, 0.02),
+    'openvino': (0.95, 0.02),
+    'openvino_int8': (0.80, 0.10),
+}
+
+EXPORT_ARGS = {
+    'onnx': {'format': 'onnx', 'dynamic': True, 'simplify': True},
+    'openvino': {'format': 'openvino', 'dynamic': True},
+    'openvino_int8': {'format': 'openvino', 'dynamic': True, 'int8': True},
+}
+
+
+def export(fmt: str, data: str | None, imgsz: int | None) -> str:
+    """Export best.pt and move the result to the path config.plate_detector_weights expects."""
+    from ultralytics import YOLO
+
+    model = YOLO(config.PLATE_YOLO_WEIGHTS)
+    kwargs = dict(EXPORT_ARGS[fmt])
+    if imgsz:
+        kwargs['imgsz'] = imgsz
+    if fmt == 'openvino_int8':
+        if not data:
+            raise SystemExit("INT8 quantization needs calibration images: pass --data path/to/data.yaml")
+        kwargs['data'] = data
+
+    print(f"Exporting {config.PLATE_YOLO_WEIGHTS} as {fmt}...")
+    exported = model.export(**kwargs)
+
+    target = config.plate_detector_weights(fmt)
+    if os.path.abspath(exported) != os.path.abspath(target):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.move(exported, target)
+    print(f"Exported to {target}")
+    return target
+
+
+def load_check_images(pattern: str) -> dict[str, np.ndarray]:
+    """Load the images used for the numeric check (a folder or a glob pattern)."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*')
+    images = {}
+    for path in sorted(glob.glob(pattern)):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is not None:
+            images[os.path.basename(path)] = image
+    return images
+
+
+def _detections(model, image: np.ndarray) -> list[tuple[np.ndarray, float]]:
+    result = model(image, verbose=False)[0]
+    boxes = result.boxes.cpu().numpy()
+    return [(box.xyxy[0].astype(np.float64), float(box.conf[0])) for box in boxes]
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> float:
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def check(fmt: str, images: dict[str, np.ndarray]) -> bool:
+    """
+    Compare the exported model's detections with the .pt model on every image.
+
+    Each reference box is greedily matched to the exported box with the highest IoU.
+    The check fails if a box is unmatched, a matched IoU is below the format's
+    tolerance, or a confidence differs by more than the tolerance.
+
+    Returns:
+        True if the exported model passes.
+    """
+    from ultralytics import YOLO
+
+    reference = YOLO(config.PLATE_YOLO_WEIGHTS)
+    exported = YOLO(config.plate_detector_weights(fmt), task='detect')
+    min_iou, max_conf_diff = TOLERANCES[fmt]
+
+    passed = True
+    worst_iou, worst_conf_diff = 1.0, 0.0
+    reference_ms = exported_ms = 0.0
+    print(f"\n{'image':<32} {'ref':>4} {'exp':>4} {'min IoU':>8} {'max dconf':>10}")
+    for name, image in images.items():
+        start = time.perf_counter()
+        expected = _detections(reference, image)
+        reference_ms += (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        actual = _detections(exported, image)
+        exported_ms += (time.perf_counter() - start) * 1000
+
+        image_min_iou, image_max_diff = 1.0, 0.0
+        unmatched = list(actual)
+        for box, conf in sorted(expected, key=lambda d: -d[1]):
+            if not unmatched:
+                image_min_iou = 0.0
+                break
+            best = max(unmatched, key=lambda d: _iou(box, d[0]))
+            unmatched.remove(best)
+            image_min_iou = min(image_min_iou, _iou(box, best[0]))
+            image_max_diff = max(image_max_diff, abs(conf - best[1]))
+
+        ok = len(expected) == len(actual) and image_min_iou >= min_iou and image_max_diff <= max_conf_diff
+        passed &= ok
+        worst_iou = min(worst_iou, image_min_iou)
+        worst_conf_diff = max(worst_conf_diff, image_max_diff)
+        print(f"{name[:32]:<32} {len(expected):>4} {len(actual):>4} {image_min_iou:>8.3f} "
+              f"{image_max_diff:>10.4f}{'' if ok else '  MISMATCH'}")
+
+    count = max(1, len(images))
+    print(f"\nWorst IoU {worst_iou:.3f} (min {min_iou}), worst confidence difference "
+          f"{worst_conf_diff:.4f} (max {max_conf_diff})")
+    print(f"Mean latency: pytorch {reference_ms / count:.1f}ms, {fmt} {exported_ms / count:.1f}ms")
+    return passed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export the YOLOv8n plate detector and check it against best.pt")
+    parser.add_argument('--format', choices=list(EXPORT_ARGS), default='onnx', help="Export format")
+    parser.add_argument('--data', help="Dataset YAML with calibration images (openvino_int8)")
+    parser.add_argument('--imgsz', type=int, help="Export input size (default: the training size)")
+    parser.add_argument('--images', default=DEFAULT_CHECK_IMAGES, help="Check images (folder or glob pattern)")
+    parser.add_argument('--check-only', action='store_true', help="Skip the export, only check an existing one")
+    args = parser.parse_args()
+
+    if not args.check_only:
+        export(args.format, args.data, args.imgsz)
+
+    images = load_check_images(args.images)
+    if not images:
+        print(f"No check images found at {args.images}")
+        return 1
+
+    if not check(args.format, images):
+        print(f"\nThe {args.format} model does NOT match best.pt within tolerance.")
+        return 1
+
+    print(f"\nThe {args.format} model matches best.pt. Enable it with AI_PLATE_DETECTOR_BACKEND={args.format}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
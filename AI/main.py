@@ -7,18 +7,41 @@ This API assists enforcement teams by processing images submitted by reporters:
 
 Endpoints:
     GET  /       : Health check and service info
+    GET  /ready  : Readiness probe (503 until every model is loaded)
+    GET  /stats  : Inference executor, batching, OCR, cache, near-duplicate, upload and job figures
+    GET  /metrics: Prometheus metrics (stage latency histograms, request counts)
     POST /face   : Detect, crop, and upscale a face from an image
+    POST /face/all: Detect, crop, and upscale every face (ZIP or JSON)
+    POST /face/jobs: Queue a /face request and return a job id at once
+    GET  /face/jobs/{id}: Status and result of a queued face job
     POST /plate  : Detect car plate and extract text via OCR
+    POST /plate/all: Identify every plate in one image
+    POST /plate/batch: Identify plates in many images, streamed as NDJSON
+    POST /plate/video: One consensus plate per vehicle tracked through a short clip or burst
+    POST /analyze: Face upscaling and plate identification of one image in one call
+
+Model stages run on a dedicated executor (services/executor.py) so the event loop
+keeps serving other requests while a face is upscaled or a plate is read.
 """
 
 import uvicorn
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import cv2
 import numpy as np
+import asyncio
+import base64
 import io
+import json
 import logging
+import os
+import tempfile
+import time
+import zipfile
+from contextlib import asynccontextmanager
+
+PROCESS_START = time.perf_counter()
 
 # Configure logging FIRST (before other imports that use logging)
 logging.basicConfig(
@@ -27,33 +50,103 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# --- Auto-download models if missing ---
-from services.model_downloader import ensure_models_exist
+# Model modules only register lazy loaders here; nothing heavy is imported yet
+from services.face_processing import (
+    detect_and_crop_face, detect_and_crop_faces, upscale_face_adaptive, upscale_faces_adaptive
+)
+from services.executor import configure_torch_threads, inference_executor
+from services.result_cache import ResultCache
+from services.near_duplicates import NearDuplicateIndex, perceptual_hash
+from services.job_queue import JobQueue, JobFailed, QueueFull
+from services.uploads import BodySizeLimitMiddleware, sniff_dimensions, upload_reader
+from services.plate_tracking import open_video, sample_frames
+from services import config, model_registry
+from services.imaging import shrink_to_max_side
+from services.metrics import REGISTRY, REQUESTS, IN_FLIGHT, STAGE_SECONDS, ENCODE_SECONDS, OUTPUT_BYTES
+
+
+def _load_plate_identifier():
+    """Import YOLO / EasyOCR and build the plate identifier."""
+    configure_torch_threads()
+    from services.plate_identifier import CarPlateIdentifier
+    return CarPlateIdentifier()
+
+
+plate_model = model_registry.register('plate_identifier', _load_plate_identifier)
+
 
-logger.info("Checking AI models...")
-if not ensure_models_exist():
-    logger.warning("Some models may not be available. Face upscaling might not work.")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start listening immediately and load the models in the background"""
+    logger.info(f"API ready to accept connections in {time.perf_counter() - PROCESS_START:.2f}s")
+    if config.PRELOAD_MODELS:
+        model_registry.load_all_async()
+    if face_jobs is not None:
+        face_jobs.start(run_face_job, config.FACE_JOBS_WORKERS)
+    yield
+    if face_jobs is not None:
+        await face_jobs.stop()
 
-# Import processing modules (after models are downloaded)
-from services.face_processing import detect_and_crop_face, upscale_face
-from services.plate_identifier import CarPlateIdentifier
 
 # Initialize FastAPI
 app = FastAPI(
     title="UTM Report System AI API",
     description="AI service for processing reporter-submitted images to assist enforcement teams. "
                 "Provides face detection & upscaling and car plate identification.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Initialize plate identifier at startup
-logger.info("Initializing Car Plate Identifier...")
-try:
-    plate_identifier = CarPlateIdentifier()
-    logger.info("Car Plate Identifier initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Car Plate Identifier: {e}")
-    plate_identifier = None
+
+# Content-addressed cache of /face and /plate results
+result_cache = None
+if config.RESULT_CACHE_ENABLED:
+    result_cache = ResultCache(
+        max_entries=config.RESULT_CACHE_MAX_ENTRIES,
+        max_memory_bytes=config.RESULT_CACHE_MAX_MB * 1024 * 1024,
+        disk_dir=config.RESULT_CACHE_DIR or None,
+        disk_ttl_seconds=config.RESULT_CACHE_DISK_TTL_SECONDS,
+        disk_max_bytes=config.RESULT_CACHE_DISK_MAX_MB * 1024 * 1024
+    )
+
+# Perceptual hashes of recent /face and /plate uploads, pointing at their cached results
+near_duplicates = None
+if config.NEAR_DUPLICATE_ENABLED and result_cache is not None:
+    near_duplicates = NearDuplicateIndex(
+        capacity=config.NEAR_DUPLICATE_MAX_ENTRIES,
+        max_distance=config.NEAR_DUPLICATE_MAX_DISTANCE
+    )
+
+# Persistent queue of POST /face/jobs requests (survives restarts)
+face_jobs = None
+if config.FACE_JOBS_ENABLED:
+    face_jobs = JobQueue(
+        config.FACE_JOBS_DB,
+        max_queued=config.FACE_JOBS_MAX_QUEUED,
+        max_attempts=config.FACE_JOBS_MAX_ATTEMPTS,
+        stale_seconds=config.FACE_JOBS_STALE_SECONDS,
+        retention_seconds=config.FACE_JOBS_RETENTION_SECONDS,
+        max_retained=config.FACE_JOBS_MAX_RETAINED
+    )
+
+# Cached results are only reused while the models and output-affecting settings are unchanged.
+# The "-h" suffix marks face entries that carry their upscale headers (pack_face_result),
+# so entries holding only the image are not misread.
+FACE_CACHE_VERSION = config.version_of(
+    [
+        'UPSCALER_HALF', 'UPSCALER_TILE_SIZE', 'UPSCALER_TILE_OVERLAP', 'FACE_DETECT_MAX_SIDE', 'FACE_DETECTOR_BACKEND',
+        'FACE_OUTPUT_QUALITY', 'FACE_OUTPUT_MAX_SIDE',
+        'UPSCALE_POLICY', 'UPSCALE_TARGET_SIDE', 'UPSCALE_SHARPNESS_THRESHOLD'
+    ],
+    [config.REALESRGAN_WEIGHTS]
+) + "-h"
+PLATE_CACHE_VERSION = config.version_of(
+    [
+        'PLATE_OCR_BATCHED', 'PLATE_OCR_EARLY_EXIT', 'PLATE_OCR_EARLY_EXIT_CONFIDENCE', 'PLATE_DETECTOR_BACKEND',
+        'PLATE_OCR_MODE', 'PLATE_OCR_ALLOWLIST'
+    ],
+    [config.plate_detector_weights()]
+)
 
 
 class PlateResponse(BaseModel):
@@ -63,6 +156,331 @@ class PlateResponse(BaseModel):
     confidence: float | None
 
 
+class PlateBatchItem(PlateResponse):
+    """One NDJSON line of /plate/batch (one per uploaded image)"""
+    index: int
+    filename: str | None
+    detail: str | None = None
+
+
+class PlateDetection(BaseModel):
+    """One plate found by /plate/all"""
+    plate: str | None
+    box: list[int]
+    detector_confidence: float
+    ocr_confidence: float | None
+
+
+class PlateListResponse(BaseModel):
+    """Response model for multi-plate identification"""
+    status: str
+    count: int
+    plates: list[PlateDetection]
+
+
+class PlateTrack(BaseModel):
+    """One vehicle tracked by /plate/video; box is its most confident detection"""
+    track_id: int
+    plate: str | None
+    confidence: float | None
+    votes: int
+    readings: int
+    frames: int
+    first_frame: int
+    last_frame: int
+    box: list[int]
+    detector_confidence: float
+
+
+class PlateTrackResponse(BaseModel):
+    """Response model for video / burst plate identification"""
+    status: str
+    source: str
+    frames: int
+    fps: float
+    count: int
+    tracks: list[PlateTrack]
+
+
+class FaceResult(BaseModel):
+    """Face part of /analyze: the upscaled face as a base64 JPEG"""
+    status: str
+    image: str | None
+    detail: str | None = None
+    upscale: str | None = None
+
+
+class FaceJobResponse(BaseModel):
+    """Status of a /face/jobs job; image is the base64 result once status is done"""
+    id: str
+    status: str
+    attempts: int
+    created: float
+    updated: float
+    detail: str | None = None
+    media_type: str | None = None
+    upscale: str | None = None
+    image: str | None = None
+
+
+class AnalyzeResponse(BaseModel):
+    """Response model for combined face + plate analysis"""
+    face: FaceResult
+    plate: PlateResponse
+
+
+def build_plate_response(plate_text: str | None, confidence: float | None) -> PlateResponse:
+    """Wrap an identify_plate result in a PlateResponse."""
+    if plate_text:
+        return PlateResponse(
+            status="success",
+            plate=plate_text,
+            confidence=round(confidence, 4) if confidence else None
+        )
+    return PlateResponse(
+        status="error",
+        plate=None,
+        confidence=None
+    )
+
+
+# Export component figures on /metrics next to the latency histograms
+REGISTRY.register_stats('ai_executor', inference_executor.stats)
+REGISTRY.register_stats('ai_plate_batcher', lambda: plate_model.peek().batch_stats() if plate_model.peek() else None)
+REGISTRY.register_stats('ai_plate_ocr', lambda: plate_model.peek().variant_stats() if plate_model.peek() else None, label='variant')
+REGISTRY.register_stats('ai_result_cache', lambda: result_cache.stats() if result_cache else None)
+REGISTRY.register_stats('ai_near_duplicates', lambda: near_duplicates.stats() if near_duplicates else None)
+REGISTRY.register_stats('ai_uploads', upload_reader.stats)
+REGISTRY.register_stats('ai_face_jobs', lambda: face_jobs.stats() if face_jobs else None)
+
+
+async def find_near_duplicate(
+    img: np.ndarray, namespace: str, max_distance: int | None = None
+) -> tuple[int | None, tuple[bytes, int] | None]:
+    """
+    Look up a decoded upload in the near-duplicate index.
+    
+    Args:
+        img: The decoded upload
+        namespace: Endpoint and options the result depends on
+        max_distance: Stricter Hamming distance limit (None = AI_NEAR_DUPLICATE_MAX_DISTANCE)
+    
+    Returns:
+        Tuple of (perceptual hash, match). The hash is None when the index is disabled;
+        match is (cached result, Hamming distance) for a re-encoded / resized copy of an
+        earlier upload whose result is still cached, otherwise None.
+    """
+    if near_duplicates is None:
+        return None, None
+    image_hash = await inference_executor.run(perceptual_hash, img)
+    found = near_duplicates.find(image_hash, namespace, max_distance)
+    if found is None:
+        return image_hash, None
+    key, distance = found
+    cached = await result_cache.get_async(key)
+    return image_hash, ((cached, distance) if cached is not None else None)
+
+
+def near_duplicate_headers(distance: int) -> dict:
+    """Response headers of a result reused from a near-duplicate upload."""
+    return {"X-Cache": "near-hit", "X-Near-Duplicate-Distance": str(distance)}
+
+
+async def detect_plate(plate_identifier, img: np.ndarray) -> list[dict]:
+    """
+    YOLO detections of one image (/plate, /plate/all, /analyze).
+    
+    With micro-batching on, the request awaits its batch on the event loop instead of
+    blocking an inference executor thread, so concurrent requests can share a forward
+    pass beyond the executor's thread count.
+    """
+    if plate_identifier.batching:
+        return await plate_identifier.detect_plate_async(img)
+    detections = await inference_executor.run(plate_identifier.detect_plates, [img])
+    return detections[0]
+
+
+def decode_image(contents: bytes | memoryview) -> np.ndarray | None:
+    """Decode uploaded image bytes into a BGR array (None if undecodable)."""
+    with STAGE_SECONDS.time(stage='decode'):
+        nparr = np.frombuffer(contents, np.uint8)
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+# Output formats of upscaled faces: file extension, media type, quality flag (None = lossless)
+OUTPUT_FORMATS = {
+    "jpeg": (".jpg", "image/jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+    "png": (".png", "image/png", None),
+}
+
+
+def encode_image(
+    image: np.ndarray,
+    output_format: str = "jpeg",
+    quality: int | None = None,
+    max_side: int | None = None
+) -> tuple[bool, np.ndarray]:
+    """
+    Encode a BGR array as JPEG, WebP or PNG (returns cv2.imencode's (success, buffer)).
+    
+    Images longer than max_side are shrunk first. quality and max_side default to
+    AI_FACE_OUTPUT_QUALITY and AI_FACE_OUTPUT_MAX_SIDE.
+    """
+    extension, _, quality_flag = OUTPUT_FORMATS[output_format]
+    quality = config.FACE_OUTPUT_QUALITY if quality is None else quality
+    max_side = config.FACE_OUTPUT_MAX_SIDE if max_side is None else max_side
+    params = [quality_flag, quality] if quality_flag is not None else []
+    
+    with STAGE_SECONDS.time(stage='encode'), ENCODE_SECONDS.time(format=output_format):
+        image = shrink_to_max_side(image, max_side)
+        is_success, buffer = cv2.imencode(extension, image, params)
+    if is_success:
+        OUTPUT_BYTES.observe(buffer.nbytes, format=output_format)
+    return is_success, buffer
+
+
+async def render_face(img: np.ndarray, output_format: str, quality: int, max_side: int) -> tuple[memoryview, dict]:
+    """
+    Detect, crop, upscale and encode the face in a decoded image (/face and face jobs).
+    
+    Returns:
+        Tuple of (encoded image, upscale decision headers). The encoder's buffer is
+        returned as-is instead of being copied into bytes.
+    
+    Raises:
+        HTTPException: 404 when no face is found, 500 when upscaling or encoding fails.
+    """
+    # Detect and crop face
+    cropped_face = await inference_executor.run(detect_and_crop_face, img)
+    if cropped_face is None:
+        raise HTTPException(status_code=404, detail="No face detected in the uploaded image.")
+    
+    # Upscale face (skip, 2x or 4x depending on the crop's size and sharpness)
+    upscaled_face, decision = await inference_executor.run(upscale_face_adaptive, cropped_face)
+    if upscaled_face is None:
+        raise HTTPException(status_code=500, detail="Face upscaling process failed on the server.")
+    
+    is_success, buffer = await inference_executor.run(encode_image, upscaled_face, output_format, quality, max_side)
+    if not is_success:
+        raise HTTPException(status_code=500, detail="Failed to encode upscaled image.")
+    
+    return memoryview(buffer.reshape(-1)), upscale_headers(decision)
+
+
+async def run_face_job(job: dict) -> tuple[bytes, dict]:
+    """
+    Job queue handler for POST /face/jobs: the /face pipeline, sharing its result cache.
+    
+    Bad input and missing faces fail the job for good; server errors are retried.
+    """
+    params = job['params']
+    output_format, quality, max_side = params['format'], params['quality'], params['max_side']
+    meta = {"media_type": OUTPUT_FORMATS[output_format][1], "upscale": None}
+    contents = job['input']
+    
+    cache_key = None
+    if result_cache is not None:
+        cache_key = await ResultCache.make_key_async(contents, face_cache_namespace(output_format, quality, max_side), FACE_CACHE_VERSION)
+        cached = await result_cache.get_async(cache_key)
+        if cached is not None:
+            image, headers = unpack_face_result(cached)
+            meta["upscale"] = headers.get("X-Upscale-Mode")
+            return bytes(image), meta
+    
+    img = await inference_executor.run(decode_image, contents)
+    if img is None:
+        raise JobFailed("Invalid image file. Could not decode.")
+    
+    try:
+        encoded, headers = await render_face(img, output_format, quality, max_side)
+    except HTTPException as e:
+        if e.status_code < 500:
+            raise JobFailed(e.detail)
+        raise RuntimeError(e.detail)
+    
+    if cache_key is not None:
+        await result_cache.put_async(cache_key, pack_face_result(encoded, headers))
+    meta["upscale"] = headers["X-Upscale-Mode"]
+    return bytes(encoded), meta
+
+
+def build_face_job_response(job: dict) -> FaceJobResponse:
+    """Wrap a stored job in a FaceJobResponse (with the base64 image once done)."""
+    meta = job['meta'] or {}
+    result = job.get('result')
+    return FaceJobResponse(
+        id=job['id'],
+        status=job['status'],
+        attempts=job['attempts'],
+        created=job['created'],
+        updated=job['updated'],
+        detail=job['error'] if job['status'] == 'failed' else None,
+        media_type=meta.get('media_type'),
+        upscale=meta.get('upscale'),
+        image=base64.b64encode(result).decode("ascii") if result else None
+    )
+
+
+def upscale_headers(decision: dict) -> dict:
+    """Response headers reporting the upscale policy decision for a face."""
+    return {
+        "X-Upscale-Mode": decision['mode'],
+        "X-Upscale-Sharpness": str(decision['sharpness']),
+        "X-Upscale-Input-Side": str(decision['input_side'])
+    }
+
+
+def pack_face_result(encoded: bytes | memoryview, headers: dict) -> bytes:
+    """Result cache value of a face: its upscale headers as one JSON line, then the image."""
+    return b"".join([json.dumps(headers).encode(), b"\n", encoded])
+
+
+def unpack_face_result(value: bytes) -> tuple[memoryview, dict]:
+    """Split a cached face (pack_face_result) into the image and its upscale headers."""
+    end = value.index(b"\n")
+    return memoryview(value)[end + 1:], json.loads(value[:end])
+
+
+def face_cache_namespace(output_format: str, quality: int, max_side: int) -> str:
+    """Result cache namespace of one upscaled face encoded with the given options."""
+    return f"face:{output_format}:{quality}:{max_side}"
+
+
+# Multipart form overhead allowed on top of the file bytes
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+def upload_body_limit(path: str) -> int:
+    """Largest request body accepted for a path (several files for /plate/batch, its own limit for /plate/video, one file otherwise)."""
+    if path == "/plate/video":
+        # Bounded on its own: a burst multiplier would let python-multipart spool hundreds of MB
+        return config.PLATE_VIDEO_MAX_BYTES + UPLOAD_FORM_OVERHEAD_BYTES
+    files = config.PLATE_BATCH_MAX_FILES if path == "/plate/batch" else 1
+    return files * (config.UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD_BYTES)
+
+
+# Added before track_requests so rejected uploads are still counted
+app.add_middleware(BodySizeLimitMiddleware, limit_for_path=upload_body_limit)
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Count requests by endpoint and outcome, and track requests in flight"""
+    IN_FLIGHT.inc()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        outcome = "success" if status_code < 400 else str(status_code)
+        REQUESTS.inc(endpoint=endpoint, outcome=outcome)
+
+
 @app.get("/")
 def read_root():
     """Health check endpoint"""
@@ -71,54 +489,257 @@ def read_root():
         "message": "UTM Report System AI API",
         "endpoints": {
             "/face": "POST - Face detection and upscaling",
-            "/plate": "POST - Car plate identification"
+            "/face/all": "POST - Every face in the image, upscaled (ZIP or JSON)",
+            "/face/jobs": "POST - Queue face upscaling, returns a job id immediately",
+            "/face/jobs/{id}": "GET - Face job status and result",
+            "/plate": "POST - Car plate identification",
+            "/plate/all": "POST - Every car plate in the image",
+            "/plate/batch": "POST - Car plate identification for many images (NDJSON stream)",
+            "/plate/video": "POST - One plate per vehicle tracked through a short video or burst",
+            "/analyze": "POST - Face upscaling and plate identification in one call",
+            "/ready": "GET - Model loading status (503 until every model is loaded)",
+            "/stats": "GET - Executor, batching, OCR and cache figures",
+            "/metrics": "GET - Prometheus metrics"
         }
     }
 
 
+@app.get("/ready")
+def read_ready():
+    """Readiness probe: 200 once every model has loaded, 503 while loading or after a failure"""
+    ready = model_registry.is_ready()
+    content = {"ready": ready, "models": model_registry.readiness()}
+    return JSONResponse(content=content, status_code=200 if ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Prometheus text exposition of latency histograms, request counts and component figures"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats")
+def read_stats():
+    """Executor queue, plate batcher, plate OCR, result cache, near-duplicate, upload and face job figures"""
+    plate_identifier = plate_model.peek()
+    return {
+        "executor": inference_executor.stats(),
+        "plate_batcher": plate_identifier.batch_stats() if plate_identifier else None,
+        "plate_ocr": plate_identifier.variant_stats() if plate_identifier else None,
+        "result_cache": result_cache.stats() if result_cache else None,
+        "near_duplicates": near_duplicates.stats() if near_duplicates else None,
+        "uploads": upload_reader.stats(),
+        "face_jobs": face_jobs.stats() if face_jobs else None
+    }
+
+
 @app.post("/face")
-async def process_face(file: UploadFile = File(...)):
+async def process_face(
+    file: UploadFile = File(...),
+    output_format: str = Query(
+        config.FACE_OUTPUT_FORMAT, alias="format", pattern="^(jpeg|webp|png)$", description="jpeg, webp or png"
+    ),
+    quality: int = Query(config.FACE_OUTPUT_QUALITY, ge=1, le=100, description="JPEG / WebP quality (ignored for PNG)"),
+    max_side: int = Query(
+        config.FACE_OUTPUT_MAX_SIDE, ge=0, description="Shrink the result to this longest side in pixels (0 = full size)"
+    )
+):
     """
     Face detection, cropping, and upscaling endpoint.
     
     1. Receives an image file
     2. Detects and crops the face using MTCNN
     3. Upscales the face using Real-ESRGAN
-    4. Returns the upscaled face as JPG
+    4. Returns the upscaled face as JPG (or WebP / PNG), optionally shrunk to max_side
+    
+    A re-encoded or resized copy of a recent upload gets that upload's result, with
+    X-Cache: near-hit and the perceptual hash distance in X-Near-Duplicate-Distance.
     """
     logger.info(f"Received face request: {file.filename}")
     
-    # Read image bytes
-    contents = await file.read()
-    nparr = np.frombuffer(contents, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    media_type = OUTPUT_FORMATS[output_format][1]
+    namespace = face_cache_namespace(output_format, quality, max_side)
+    
+    # Stream the upload into a pooled buffer (413 over the byte / pixel limits)
+    async with upload_reader.open(file) as contents:
+        # Resubmitted photo: return the cached upscaled face without touching the models
+        cache_key = None
+        if result_cache is not None:
+            cache_key = await ResultCache.make_key_async(contents, namespace, FACE_CACHE_VERSION)
+            cached = await result_cache.get_async(cache_key)
+            if cached is not None:
+                logger.info("Returning cached face result")
+                image, headers = unpack_face_result(cached)
+                return Response(content=image, media_type=media_type, headers={**headers, "X-Cache": "hit"})
+    
+        img = await inference_executor.run(decode_image, contents)
     
     if img is None:
         raise HTTPException(status_code=400, detail="Invalid image file. Could not decode.")
     
-    # Detect and crop face
-    cropped_face = detect_and_crop_face(img)
-    if cropped_face is None:
+    # Another copy of a recent photo: reuse its result, and keep it for these exact bytes too
+    image_hash, match = await find_near_duplicate(img, namespace)
+    if match is not None:
+        cached, distance = match
+        await result_cache.put_async(cache_key, cached)
+        logger.info(f"Returning face result of a near-duplicate upload (distance {distance})")
+        image, headers = unpack_face_result(cached)
+        return Response(content=image, media_type=media_type, headers={**headers, **near_duplicate_headers(distance)})
+    
+    encoded, headers = await render_face(img, output_format, quality, max_side)
+    if cache_key is not None:
+        await result_cache.put_async(cache_key, pack_face_result(encoded, headers))
+    if image_hash is not None:
+        near_duplicates.add(image_hash, namespace, cache_key)
+    
+    logger.info(f"Successfully processed face image ({output_format}, {len(encoded)} bytes)")
+    
+    return Response(content=encoded, media_type=media_type, headers=headers)
+
+
+@app.post("/face/jobs", response_model=FaceJobResponse, status_code=202)
+async def submit_face_job(
+    file: UploadFile = File(...),
+    output_format: str = Query(
+        config.FACE_OUTPUT_FORMAT, alias="format", pattern="^(jpeg|webp|png)$", description="jpeg, webp or png"
+    ),
+    quality: int = Query(config.FACE_OUTPUT_QUALITY, ge=1, le=100, description="JPEG / WebP quality (ignored for PNG)"),
+    max_side: int = Query(
+        config.FACE_OUTPUT_MAX_SIDE, ge=0, description="Shrink the result to this longest side in pixels (0 = full size)"
+    )
+):
+    """
+    Queued face upscaling endpoint, for clients whose connection would time out on /face.
+    
+    1. Receives an image file (same options as /face) and stores it in the job queue
+    2. Returns 202 with the job id at once; poll GET /face/jobs/{id} for the result
+    
+    Resubmitting the same image with the same options returns the existing job.
+    """
+    if face_jobs is None:
+        raise HTTPException(status_code=503, detail="Face jobs are disabled.")
+    
+    logger.info(f"Received face job: {file.filename}")
+    
+    contents = await upload_reader.read_bytes(file)
+    params = {"format": output_format, "quality": quality, "max_side": max_side}
+    dedupe_key = await ResultCache.make_key_async(contents, face_cache_namespace(output_format, quality, max_side), FACE_CACHE_VERSION)
+    try:
+        job_id, created = await asyncio.to_thread(face_jobs.submit, "face", contents, params, dedupe_key)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Face job queue is full: {e}.")
+    
+    if not created:
+        logger.info(f"Returning existing face job {job_id}")
+    job = await asyncio.to_thread(face_jobs.get, job_id)
+    return JSONResponse(
+        content=build_face_job_response(job).model_dump(),
+        status_code=202,
+        headers={"Location": f"/face/jobs/{job_id}"}
+    )
+
+
+@app.get("/face/jobs/{job_id}", response_model=FaceJobResponse)
+async def read_face_job(job_id: str):
+    """
+    Face job status: queued, running, done (with the base64 image) or failed (with detail).
+    """
+    if face_jobs is None:
+        raise HTTPException(status_code=503, detail="Face jobs are disabled.")
+    
+    job = await asyncio.to_thread(face_jobs.get, job_id, True)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired face job.")
+    return build_face_job_response(job)
+
+
+@app.post("/face/all")
+async def process_all_faces(
+    file: UploadFile = File(...),
+    min_size: int = Query(0, ge=0, description="Skip faces smaller than this many pixels (width or height)"),
+    max_faces: int = Query(config.FACE_MAX_FACES, ge=1, le=config.FACE_MAX_FACES, description="Maximum faces returned"),
+    output: str = Query("zip", pattern="^(zip|json)$", description="zip (face_00.jpg, ... + faces.json) or json (base64)")
+):
+    """
+    Multi-face detection, cropping, and upscaling endpoint (group photos).
+    
+    1. Receives an image file
+    2. Detects every face, keeping those of at least min_size pixels (up to max_faces)
+    3. Upscales all crops together in batched Real-ESRGAN passes
+    4. Returns a ZIP of JPGs plus a faces.json manifest, or JSON with base64 JPGs
+    """
+    logger.info(f"Received multi-face request: {file.filename}")
+    
+    media_type = "application/zip" if output == "zip" else "application/json"
+    headers = {"Content-Disposition": 'attachment; filename="faces.zip"'} if output == "zip" else {}
+    
+    # Stream the upload into a pooled buffer (413 over the byte / pixel limits)
+    async with upload_reader.open(file) as contents:
+        # Resubmitted photo with the same options: return the cached payload
+        cache_key = None
+        if result_cache is not None:
+            cache_key = await ResultCache.make_key_async(contents, f"face_all:{min_size}:{max_faces}:{output}", FACE_CACHE_VERSION)
+            cached = await result_cache.get_async(cache_key)
+            if cached is not None:
+                logger.info("Returning cached multi-face result")
+                return Response(content=cached, media_type=media_type, headers={**headers, "X-Cache": "hit"})
+    
+        img = await inference_executor.run(decode_image, contents)
+    
+    if img is None:
+        raise HTTPException(status_code=400, detail="Invalid image file. Could not decode.")
+    
+    # Detect and crop every face
+    faces = await inference_executor.run(detect_and_crop_faces, img, min_size=min_size, max_faces=max_faces)
+    if not faces:
         raise HTTPException(status_code=404, detail="No face detected in the uploaded image.")
     
-    # Upscale face
-    upscaled_face = upscale_face(cropped_face)
-    if upscaled_face is None:
+    # Upscale the crops that need it in batched passes
+    upscaled_faces, decisions = await inference_executor.run(upscale_faces_adaptive, [face['face'] for face in faces])
+    if upscaled_faces is None:
         raise HTTPException(status_code=500, detail="Face upscaling process failed on the server.")
     
-    # Encode and return
-    is_success, buffer = cv2.imencode(".jpg", upscaled_face)
-    if not is_success:
-        raise HTTPException(status_code=500, detail="Failed to encode upscaled image.")
+    jpegs = []
+    for upscaled_face in upscaled_faces:
+        is_success, buffer = await inference_executor.run(encode_image, upscaled_face)
+        if not is_success:
+            raise HTTPException(status_code=500, detail="Failed to encode upscaled image.")
+        jpegs.append(buffer.tobytes())
+    
+    manifest = [
+        {
+            "index": index,
+            "box": list(face['box']),
+            "confidence": round(face['confidence'], 4),
+            "filename": f"face_{index:02d}.jpg",
+            "upscale": decision['mode'],
+            "sharpness": decision['sharpness']
+        }
+        for index, (face, decision) in enumerate(zip(faces, decisions))
+    ]
+    
+    if output == "zip":
+        # JPEGs do not compress further; store them as-is
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            for entry, jpeg in zip(manifest, jpegs):
+                archive.writestr(entry["filename"], jpeg)
+            archive.writestr("faces.json", json.dumps({"count": len(manifest), "faces": manifest}, indent=2))
+        payload = zip_buffer.getvalue()
+    else:
+        for entry, jpeg in zip(manifest, jpegs):
+            entry["image"] = base64.b64encode(jpeg).decode("ascii")
+        payload = json.dumps({"count": len(manifest), "faces": manifest}).encode()
     
-    io_buf = io.BytesIO(buffer)
-    logger.info("Successfully processed face image")
+    if cache_key is not None:
+        await result_cache.put_async(cache_key, payload)
     
-    return StreamingResponse(io_buf, media_type="image/jpg")
+    logger.info(f"Successfully processed {len(faces)} face(s)")
+    return Response(content=payload, media_type=media_type, headers=headers)
 
 
 @app.post("/plate", response_model=PlateResponse)
-async def identify_plate(file: UploadFile = File(...)):
+async def identify_plate(response: Response, file: UploadFile = File(...)):
     """
     Car plate detection and OCR endpoint.
     
@@ -126,36 +747,402 @@ async def identify_plate(file: UploadFile = File(...)):
     2. Detects plate using YOLOv8n
     3. Extracts text using EasyOCR
     4. Returns plate text and confidence
+    
+    With AI_NEAR_DUPLICATE_PLATES on, a re-encoded copy of a recent upload (within
+    AI_NEAR_DUPLICATE_PLATE_MAX_DISTANCE) gets that upload's result, with X-Cache: near-hit
+    and the perceptual hash distance in X-Near-Duplicate-Distance. It is off by default:
+    different cars shot by one fixed camera can hash alike.
     """
+    # Loads YOLO / EasyOCR on first use if the startup loader has not finished
+    plate_identifier = await inference_executor.run(plate_model.get)
     if plate_identifier is None:
         raise HTTPException(status_code=500, detail="Plate identifier not initialized.")
     
     logger.info(f"Received plate request: {file.filename}")
     
-    # Read image bytes
-    contents = await file.read()
-    nparr = np.frombuffer(contents, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    # Stream the upload into a pooled buffer (413 over the byte / pixel limits)
+    async with upload_reader.open(file) as contents:
+        # Resubmitted photo: return the cached PlateResponse without touching the models
+        cache_key = None
+        if result_cache is not None:
+            cache_key = await ResultCache.make_key_async(contents, "plate", PLATE_CACHE_VERSION)
+            cached = await result_cache.get_async(cache_key)
+            if cached is not None:
+                logger.info("Returning cached plate result")
+                response.headers["X-Cache"] = "hit"
+                return PlateResponse.model_validate_json(cached)
+    
+        img = await inference_executor.run(decode_image, contents)
     
     if img is None:
         raise HTTPException(status_code=400, detail="Invalid image file. Could not decode.")
     
+    # Another copy of a recent photo: reuse its result, and keep it for these exact bytes too
+    image_hash, match = None, None
+    if config.NEAR_DUPLICATE_PLATES:
+        image_hash, match = await find_near_duplicate(img, "plate", config.NEAR_DUPLICATE_PLATE_MAX_DISTANCE)
+    if match is not None:
+        cached, distance = match
+        await result_cache.put_async(cache_key, cached)
+        response.headers.update(near_duplicate_headers(distance))
+        logger.info(f"Returning plate result of a near-duplicate upload (distance {distance})")
+        return PlateResponse.model_validate_json(cached)
+    
     # Identify plate
-    plate_text, confidence = plate_identifier.identify_plate(img)
+    detections = await detect_plate(plate_identifier, img)
+    plate_text, confidence = await inference_executor.run(plate_identifier.identify_from_detections, img, detections)
     
     if plate_text:
         logger.info(f"Successfully identified plate: {plate_text}")
-        return PlateResponse(
-            status="success",
-            plate=plate_text,
-            confidence=round(confidence, 4) if confidence else None
+    plate_response = build_plate_response(plate_text, confidence)
+    
+    if cache_key is not None:
+        await result_cache.put_async(cache_key, plate_response.model_dump_json().encode())
+    if image_hash is not None:
+        near_duplicates.add(image_hash, "plate", cache_key)
+    
+    return plate_response
+
+
+@app.post("/plate/all", response_model=PlateListResponse)
+async def identify_all_plates(
+    response: Response,
+    file: UploadFile = File(...),
+    min_confidence: float = Query(
+        config.PLATE_MIN_DETECTION_CONFIDENCE, ge=0.0, le=1.0, description="Minimum plate detector confidence"
+    ),
+    max_plates: int = Query(config.PLATE_MAX_PLATES, ge=1, le=config.PLATE_MAX_PLATES, description="Maximum plates returned")
+):
+    """
+    Multi-plate detection and OCR endpoint (carparks, roadside photos).
+    
+    1. Receives an image file
+    2. Detects plates using YOLOv8n, keeping those of at least min_confidence (up to max_plates)
+    3. Reads every plate crop together in batched EasyOCR calls
+    4. Returns each plate with its box, detector confidence and OCR confidence
+    """
+    plate_identifier = await inference_executor.run(plate_model.get)
+    if plate_identifier is None:
+        raise HTTPException(status_code=500, detail="Plate identifier not initialized.")
+    
+    logger.info(f"Received multi-plate request: {file.filename}")
+    
+    # Stream the upload into a pooled buffer (413 over the byte / pixel limits)
+    async with upload_reader.open(file) as contents:
+        # Resubmitted photo with the same options: return the cached response
+        cache_key = None
+        if result_cache is not None:
+            cache_key = await ResultCache.make_key_async(contents, f"plate_all:{min_confidence}:{max_plates}", PLATE_CACHE_VERSION)
+            cached = await result_cache.get_async(cache_key)
+            if cached is not None:
+                logger.info("Returning cached multi-plate result")
+                response.headers["X-Cache"] = "hit"
+                return PlateListResponse.model_validate_json(cached)
+    
+        img = await inference_executor.run(decode_image, contents)
+    
+    if img is None:
+        raise HTTPException(status_code=400, detail="Invalid image file. Could not decode.")
+    
+    # Detect every plate and OCR all crops together
+    detections = await detect_plate(plate_identifier, img)
+    plates = await inference_executor.run(
+        plate_identifier.identify_plates, img,
+        min_confidence=min_confidence, max_plates=max_plates, detections=detections
+    )
+    
+    plate_list = PlateListResponse(
+        status="success" if any(plate['plate'] for plate in plates) else "error",
+        count=len(plates),
+        plates=[
+            PlateDetection(
+                plate=plate['plate'],
+                box=list(plate['box']),
+                detector_confidence=round(plate['detector_confidence'], 4),
+                ocr_confidence=round(plate['ocr_confidence'], 4) if plate['ocr_confidence'] else None
+            )
+            for plate in plates
+        ]
+    )
+    
+    if cache_key is not None:
+        await result_cache.put_async(cache_key, plate_list.model_dump_json().encode())
+    
+    logger.info(f"Identified {sum(1 for plate in plates if plate['plate'])} of {len(plates)} plate(s)")
+    return plate_list
+
+
+@app.post("/plate/batch")
+async def identify_plate_batch(files: list[UploadFile] = File(...)):
+    """
+    Bulk car plate identification endpoint.
+    
+    1. Receives many image files in one request
+    2. Detects plates with batched YOLOv8n passes (up to AI_PLATE_BATCH_MAX_SIZE images each)
+    3. Runs EasyOCR per image as its detections come in
+    4. Streams one NDJSON line per image as soon as it finishes (lines carry the upload
+       index, so they may arrive out of order)
+    """
+    plate_identifier = await inference_executor.run(plate_model.get)
+    if plate_identifier is None:
+        raise HTTPException(status_code=500, detail="Plate identifier not initialized.")
+    
+    if len(files) > config.PLATE_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files: {len(files)} (max {config.PLATE_BATCH_MAX_FILES})."
         )
-    else:
-        return PlateResponse(
-            status="error",
-            plate=None,
-            confidence=None
+    
+    logger.info(f"Received plate batch request: {len(files)} file(s)")
+    
+    # Read every upload up front; the request body is gone once streaming starts.
+    # A file over the byte / pixel limits gets an error line instead of failing the batch.
+    uploads = []
+    rejected = {}
+    for index, file in enumerate(files):
+        try:
+            uploads.append((index, file.filename, await upload_reader.read_bytes(file)))
+        except HTTPException as exc:
+            rejected[index] = (file.filename, exc.detail)
+    
+    async def identify_one(index, filename, image, detections, cache_key) -> PlateBatchItem:
+        plate_text, confidence = await inference_executor.run(
+            plate_identifier.identify_from_detections, image, detections
+        )
+        response = build_plate_response(plate_text, confidence)
+        if cache_key is not None:
+            await result_cache.put_async(cache_key, response.model_dump_json().encode())
+        return PlateBatchItem(index=index, filename=filename, **response.model_dump())
+    
+    async def stream_results():
+        # Files over the byte / pixel limits get their error line first
+        for index, (filename, detail) in rejected.items():
+            item = PlateBatchItem(
+                index=index, filename=filename, status="error", plate=None, confidence=None, detail=detail
+            )
+            yield item.model_dump_json() + "\n"
+        
+        # Cached images are answered next, without touching the models
+        pending = []
+        for index, filename, contents in uploads:
+            cache_key = None
+            if result_cache is not None:
+                cache_key = await ResultCache.make_key_async(contents, "plate", PLATE_CACHE_VERSION)
+                cached = await result_cache.get_async(cache_key)
+                if cached is not None:
+                    response = PlateResponse.model_validate_json(cached)
+                    item = PlateBatchItem(index=index, filename=filename, **response.model_dump())
+                    yield item.model_dump_json() + "\n"
+                    continue
+            pending.append((index, filename, contents, cache_key))
+        
+        chunk_size = max(1, config.PLATE_BATCH_MAX_SIZE)
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            
+            images = await asyncio.gather(
+                *(inference_executor.run(decode_image, contents) for _, _, contents, _ in chunk)
+            )
+            decoded = []
+            for (index, filename, _, cache_key), image in zip(chunk, images):
+                if image is None:
+                    item = PlateBatchItem(
+                        index=index, filename=filename, status="error", plate=None,
+                        confidence=None, detail="Invalid image file. Could not decode."
+                    )
+                    yield item.model_dump_json() + "\n"
+                else:
+                    decoded.append((index, filename, image, cache_key))
+            if not decoded:
+                continue
+            
+            # One batched detection pass for the chunk, then OCR each image concurrently
+            detections = await inference_executor.run(
+                plate_identifier.detect_plates, [image for _, _, image, _ in decoded]
+            )
+            tasks = [
+                asyncio.ensure_future(identify_one(index, filename, image, image_detections, cache_key))
+                for (index, filename, image, cache_key), image_detections in zip(decoded, detections)
+            ]
+            for task in asyncio.as_completed(tasks):
+                item = await task
+                yield item.model_dump_json() + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.post("/plate/video", response_model=PlateTrackResponse)
+async def identify_plate_video(
+    files: list[UploadFile] = File(...),
+    sample_fps: float = Query(
+        config.PLATE_VIDEO_SAMPLE_FPS, gt=0.0, le=60.0, description="Frames sampled per second of video"
+    ),
+    max_frames: int = Query(
+        config.PLATE_VIDEO_MAX_FRAMES, ge=1, le=config.PLATE_VIDEO_MAX_FRAMES, description="Maximum frames processed"
+    ),
+    min_confidence: float = Query(
+        config.PLATE_MIN_DETECTION_CONFIDENCE, ge=0.0, le=1.0, description="Minimum plate detector confidence"
+    )
+):
+    """
+    Short video / burst plate identification endpoint.
+    
+    1. Receives one video file, or the images of a burst in capture order
+    2. Samples the video at sample_fps, up to max_frames frames
+    3. Detects plates with batched YOLOv8n passes and tracks them across frames
+    4. Reads only the sharpest few crops of each track with batched EasyOCR calls
+    5. Returns one consensus plate per tracked vehicle and the processing rate in frames per second
+    """
+    plate_identifier = await inference_executor.run(plate_model.get)
+    if plate_identifier is None:
+        raise HTTPException(status_code=500, detail="Plate identifier not initialized.")
+    
+    if len(files) > config.PLATE_BURST_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files: {len(files)} (max {config.PLATE_BURST_MAX_FILES})."
+        )
+    
+    # A single upload that is not an image is a video; anything else is a burst
+    source = "burst"
+    if len(files) == 1:
+        header = await files[0].read(upload_reader.sniff_bytes)
+        await files[0].seek(0)
+        if sniff_dimensions(header) is None:
+            source = "video"
+    
+    logger.info(f"Received plate {source} request: {len(files)} file(s)")
+    
+    video_path = None
+    try:
+        if source == "video":
+            # OpenCV reads videos from a path, so the upload is streamed to a temporary file
+            suffix = os.path.splitext(files[0].filename or "")[1] or ".mp4"
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as target:
+                video_path = target.name
+                await upload_reader.save(files[0], target, config.PLATE_VIDEO_MAX_BYTES)
+            capture = await inference_executor.run(open_video, video_path)
+            if capture is None:
+                raise HTTPException(status_code=400, detail="Invalid video file. Could not decode.")
+            frames = sample_frames(capture, sample_fps, max_frames)
+        else:
+            # Decoded lazily, one detection batch at a time
+            uploads = [await upload_reader.read_bytes(file) for file in files[:max_frames]]
+            frames = (image for image in map(decode_image, uploads) if image is not None)
+        
+        start = time.perf_counter()
+        tracks, frame_count = await inference_executor.run(
+            plate_identifier.identify_tracks, frames, min_confidence=min_confidence
         )
+        elapsed = time.perf_counter() - start
+    finally:
+        if video_path is not None:
+            os.remove(video_path)
+    
+    if frame_count == 0:
+        raise HTTPException(status_code=400, detail=f"No frames could be decoded from the {source}.")
+    
+    fps = frame_count / elapsed if elapsed > 0 else 0.0
+    response = PlateTrackResponse(
+        status="success" if any(track['plate'] for track in tracks) else "error",
+        source=source,
+        frames=frame_count,
+        fps=round(fps, 2),
+        count=len(tracks),
+        tracks=[
+            PlateTrack(
+                track_id=track['track_id'],
+                plate=track['plate'],
+                confidence=round(track['confidence'], 4) if track['confidence'] else None,
+                votes=track['votes'],
+                readings=track['readings'],
+                frames=track['frames'],
+                first_frame=track['first_frame'],
+                last_frame=track['last_frame'],
+                box=list(track['box']),
+                detector_confidence=round(track['detector_confidence'], 4)
+            )
+            for track in tracks
+        ]
+    )
+    
+    logger.info(
+        f"Read {sum(1 for track in tracks if track['plate'])} of {len(tracks)} tracked plate(s) "
+        f"from {frame_count} frame(s) at {fps:.1f} fps"
+    )
+    return response
+
+
+@app.post("/analyze", response_model=AnalyzeResponse)
+async def analyze(file: UploadFile = File(...)):
+    """
+    Combined face upscaling and plate identification endpoint.
+    
+    1. Receives one image file and decodes it once
+    2. Runs the face pipeline (MTCNN + Real-ESRGAN) and the plate pipeline
+       (YOLOv8n + EasyOCR) concurrently on the same decoded array
+    3. Returns both results; the face is a base64-encoded JPEG
+    
+    Each part reuses the /face and /plate result caches, and a failure in one part
+    does not fail the other.
+    """
+    logger.info(f"Received analyze request: {file.filename}")
+    
+    # Stream the upload into a pooled buffer (413 over the byte / pixel limits)
+    async with upload_reader.open(file) as contents:
+        face_key = plate_key = None
+        cached_face = cached_plate = None
+        if result_cache is not None:
+            face_key = await ResultCache.make_key_async(
+                contents,
+                face_cache_namespace("jpeg", config.FACE_OUTPUT_QUALITY, config.FACE_OUTPUT_MAX_SIDE),
+                FACE_CACHE_VERSION
+            )
+            plate_key = await ResultCache.make_key_async(contents, "plate", PLATE_CACHE_VERSION)
+            cached_face = await result_cache.get_async(face_key)
+            cached_plate = await result_cache.get_async(plate_key)
+    
+        img = None
+        if cached_face is None or cached_plate is None:
+            img = await inference_executor.run(decode_image, contents)
+            if img is None:
+                raise HTTPException(status_code=400, detail="Invalid image file. Could not decode.")
+    
+    async def analyze_face() -> FaceResult:
+        if cached_face is not None:
+            jpeg, headers = unpack_face_result(cached_face)
+            return FaceResult(status="success", image=base64.b64encode(jpeg).decode("ascii"), upscale=headers.get("X-Upscale-Mode"))
+        cropped_face = await inference_executor.run(detect_and_crop_face, img)
+        if cropped_face is None:
+            return FaceResult(status="error", image=None, detail="No face detected in the uploaded image.")
+        upscaled_face, decision = await inference_executor.run(upscale_face_adaptive, cropped_face)
+        if upscaled_face is None:
+            return FaceResult(status="error", image=None, detail="Face upscaling process failed on the server.")
+        is_success, buffer = await inference_executor.run(encode_image, upscaled_face)
+        if not is_success:
+            return FaceResult(status="error", image=None, detail="Failed to encode upscaled image.")
+        jpeg = buffer.tobytes()
+        if face_key is not None:
+            await result_cache.put_async(face_key, pack_face_result(jpeg, upscale_headers(decision)))
+        return FaceResult(status="success", image=base64.b64encode(jpeg).decode("ascii"), upscale=decision['mode'])
+    
+    async def analyze_plate() -> PlateResponse:
+        if cached_plate is not None:
+            return PlateResponse.model_validate_json(cached_plate)
+        plate_identifier = await inference_executor.run(plate_model.get)
+        if plate_identifier is None:
+            return build_plate_response(None, None)
+        detections = await detect_plate(plate_identifier, img)
+        plate_text, confidence = await inference_executor.run(plate_identifier.identify_from_detections, img, detections)
+        response = build_plate_response(plate_text, confidence)
+        if plate_key is not None:
+            await result_cache.put_async(plate_key, response.model_dump_json().encode())
+        return response
+    
+    face, plate = await asyncio.gather(analyze_face(), analyze_plate())
+    logger.info(f"Analyze finished: face={face.status}, plate={plate.status}")
+    
+    return AnalyzeResponse(face=face, plate=plate)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,274 @@
+"""
+Production Launcher (preforked workers)
+
+`python main.py` runs one process. Scaling out by starting N of them means N private
+copies of YOLO, EasyOCR, the face detector and Real-ESRGAN. This launcher instead:
+
+1. Loads every model once in a parent process
+2. Binds the listening socket once (with the configured backlog)
+3. Forks the workers, which serve that socket with uvicorn
+
+The workers inherit the loaded weights. Pages that nobody writes to (the model weights
+and most of the imported libraries) stay physically shared copy-on-write, so each extra
+worker costs only its own request-time memory. The parent restarts workers that die;
+workers that keep dying right after starting (a bad model path, say) are restarted with
+exponential backoff, and the launcher exits after too many such failures in a row.
+
+POSIX only (uses fork), and CPU only: a CUDA context created in the parent cannot be
+used by forked children, and TensorFlow is not fork-safe. The launcher therefore hides
+every GPU before anything is imported (`AI_UPSCALER_DEVICE=auto`, EasyOCR and YOLO
+fall back to the CPU), and refuses to start when a CUDA upscaler device or a
+TensorFlow face detector backend (`mtcnn`, `cascade`) is configured. On a GPU host,
+run one `python main.py` process per GPU instead.
+
+Every worker keeps its own in-memory result cache and its own /metrics figures. Face
+jobs are shared through their SQLite file.
+Compare per-worker memory with independent processes using benchmarks/bench_workers.py.
+
+Usage (from the AI folder):
+    uv run python serve.py --workers 4
+    uv run python serve.py --workers 4 --limit-concurrency 32 --backlog 512
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from services import config
+
+logger = logging.getLogger("serve")
+
+# Longest delay before restarting a worker that failed to start
+MAX_RESTART_BACKOFF_SECONDS = 60.0
+
+
+class RestartBackoff:
+    """
+    Decides how long to wait before replacing a dead worker.
+
+    A worker that ran for at least failed_start_seconds is replaced at once. One that
+    died sooner is a failed start: each consecutive one doubles the delay, and after
+    max_failed_starts in a row the launcher should give up (the next start would fail too).
+    """
+
+    def __init__(self, failed_start_seconds: float, backoff_seconds: float, max_failed_starts: int):
+        self.failed_start_seconds = failed_start_seconds
+        self.backoff_seconds = backoff_seconds
+        self.max_failed_starts = max(1, max_failed_starts)
+        self.failed_starts = 0
+
+    def delay_after_exit(self, uptime: float) -> float | None:
+        """
+        Seconds to wait before restarting a worker that ran for uptime seconds.
+
+        Returns:
+            The delay, or None when too many workers in a row failed to start.
+        """
+        if uptime >= self.failed_start_seconds:
+            self.failed_starts = 0
+            return 0.0
+        self.failed_starts += 1
+        if self.failed_starts >= self.max_failed_starts:
+            return None
+        return min(MAX_RESTART_BACKOFF_SECONDS, self.backoff_seconds * 2 ** (self.failed_starts - 1))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Preforked multi-worker launcher for the AI API")
+    parser.add_argument('--host', default=config.SERVER_HOST, help="Address to bind")
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT, help="Port to bind")
+    parser.add_argument('--workers', type=int, default=config.SERVER_WORKERS, help="Worker processes")
+    parser.add_argument('--backlog', type=int, default=config.SERVER_BACKLOG,
+                        help="Pending connections the kernel queues on the shared socket")
+    parser.add_argument('--limit-concurrency', type=int, default=config.SERVER_LIMIT_CONCURRENCY,
+                        help="Connections + tasks per worker before it answers 503 (0 = unlimited)")
+    parser.add_argument('--timeout-keep-alive', type=int, default=config.SERVER_TIMEOUT_KEEP_ALIVE,
+                        help="Seconds an idle keep-alive connection is held open")
+    parser.add_argument('--inference-workers', type=int, default=config.INFERENCE_WORKERS,
+                        help="Inference executor threads per worker (AI_INFERENCE_WORKERS)")
+    parser.add_argument('--torch-threads', type=int, default=config.TORCH_THREADS,
+                        help="PyTorch CPU threads per worker (AI_TORCH_THREADS; 0 = CPU cores / workers, "
+                             "split again between parallel upscaler tiles)")
+    return parser.parse_args()
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Create the listening socket shared by every worker."""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def fork_safety_problems() -> list[str]:
+    """Settings that would load a model the forked workers could not use."""
+    problems = []
+    if config.UPSCALER_DEVICE not in ('auto', 'cpu'):
+        problems.append(f"AI_UPSCALER_DEVICE={config.UPSCALER_DEVICE} (workers cannot share a CUDA context)")
+    if config.FACE_DETECTOR_BACKEND in ('mtcnn', 'cascade'):
+        problems.append(f"AI_FACE_DETECTOR_BACKEND={config.FACE_DETECTOR_BACKEND} (TensorFlow is not fork-safe)")
+    return problems
+
+
+def load_models(torch_threads: int):
+    """Import the app and load every model in this (parent) process."""
+    import main
+    from services import model_registry
+
+    start = time.perf_counter()
+    model_registry.load_all()
+    model_registry.log_breakdown(time.perf_counter() - start)
+    if not model_registry.is_ready():
+        logger.warning("Some models failed to load; workers will report 503 on /ready")
+
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        if torch.cuda.is_initialized():
+            raise RuntimeError("CUDA was initialized before fork(); the workers could not use it")
+        # Split the cores between the workers instead of every worker using all of them
+        torch.set_num_threads(torch_threads)
+        logger.info(f"PyTorch threads per worker: {torch_threads}")
+    return main.app
+
+
+def run_worker(app, sock: socket.socket, args: argparse.Namespace):
+    """Serve the shared socket in a forked child until told to stop."""
+    import uvicorn
+
+    # The parent's handlers forward signals; a worker lets uvicorn install its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    server = uvicorn.Server(uvicorn.Config(
+        app,
+        backlog=args.backlog,
+        limit_concurrency=args.limit_concurrency or None,
+        timeout_keep_alive=args.timeout_keep_alive,
+        log_level="info",
+    ))
+    server.run(sockets=[sock])
+
+
+def spawn(app, sock: socket.socket, args: argparse.Namespace) -> int:
+    """Fork one worker and return its pid."""
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(app, sock, args)
+        except Exception:
+            logger.exception("Worker crashed")
+            code = 1
+        finally:
+            os._exit(code)
+    logger.info(f"Started worker {pid}")
+    return pid
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args()
+    if not hasattr(os, 'fork'):
+        logger.error("serve.py needs fork(); on Windows run `python main.py` instead")
+        return 1
+
+    problems = fork_safety_problems()
+    if problems:
+        logger.error(f"serve.py runs CPU-only, fork-safe models; unsupported: {'; '.join(problems)}")
+        return 1
+    # Hide the GPUs before torch / EasyOCR / ultralytics are imported so nothing in the
+    # parent creates a CUDA context the forked workers would inherit unusable
+    os.environ['CUDA_VISIBLE_DEVICES'] = ''
+
+    workers = max(1, args.workers)
+    torch_threads = args.torch_threads or max(1, (os.cpu_count() or 1) // (workers * max(1, config.UPSCALER_WORKERS)))
+
+    # Read when main is imported (executor size), when the models load (torch threads)
+    # and at startup (models are already loaded)
+    config.INFERENCE_WORKERS = args.inference_workers
+    config.TORCH_THREADS = torch_threads
+    config.PRELOAD_MODELS = False
+
+    try:
+        app = load_models(torch_threads)
+    except RuntimeError as e:
+        logger.error(str(e))
+        return 1
+    sock = bind_socket(args.host, args.port, args.backlog)
+
+    # Move everything loaded so far out of the GC's reach: collections in the workers
+    # would otherwise write to these objects' headers and un-share their pages
+    gc.collect()
+    gc.freeze()
+
+    # pid -> start time, to tell a worker that failed to start from one that ran a while
+    pids = {spawn(app, sock, args): time.monotonic() for _ in range(workers)}
+    backoff = RestartBackoff(
+        config.SERVER_FAILED_START_SECONDS, config.SERVER_RESTART_BACKOFF_SECONDS, config.SERVER_MAX_FAILED_STARTS
+    )
+    logger.info(
+        f"Serving http://{args.host}:{args.port} with {workers} worker(s), backlog={args.backlog}, "
+        f"limit_concurrency={args.limit_concurrency or 'unlimited'}, "
+        f"{args.inference_workers} inference thread(s) per worker"
+    )
+
+    stopping = False
+    exit_code = 0
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while pids:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = pids.pop(pid, None)
+        if stopping or started is None:
+            continue
+
+        code = os.waitstatus_to_exitcode(status)
+        delay = backoff.delay_after_exit(time.monotonic() - started)
+        if delay is None:
+            logger.error(
+                f"Worker {pid} exited ({code}); {backoff.failed_starts} workers in a row died within "
+                f"{backoff.failed_start_seconds:.0f}s of starting, shutting down"
+            )
+            exit_code = 1
+            stop(signal.SIGTERM, None)
+            continue
+        if delay:
+            logger.warning(f"Worker {pid} exited ({code}) right after starting, restarting it in {delay:.1f}s")
+            time.sleep(delay)
+            if stopping:
+                continue
+        else:
+            logger.warning(f"Worker {pid} exited ({code}), restarting it")
+        pids[spawn(app, sock, args)] = time.monotonic()
+
+    sock.close()
+    logger.info("All workers stopped")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
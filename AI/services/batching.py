@@ -0,0 +1,171 @@
+"""
+Micro-Batching Module
+
+Collects inputs submitted by concurrent requests for a short wait window and runs them
+through a model in one batched call, then hands each caller its own result.
+Used in front of the YOLOv8n plate detector.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler.
+
+    Callers block in submit() (threads) or await submit_async() (the event loop) while a
+    background thread gathers up to max_batch_size items (or until max_wait_ms passes
+    since the first one) and passes them to batch_fn. Items are grouped by key_fn first,
+    so only compatible inputs share a forward pass.
+
+    Prefer submit_async() from request handlers: a thread blocked in submit() is one
+    less executor thread, so a batch could never hold more requests than the executor
+    has threads.
+    """
+
+    def __init__(self, batch_fn, max_batch_size: int, max_wait_ms: float, key_fn=None, name: str = 'batcher'):
+        """
+        Args:
+            batch_fn: Callable taking a list of items and returning a list of results (same order).
+            max_batch_size: Maximum number of items collected into one batch.
+            max_wait_ms: How long to wait for more items after the first one arrives.
+            key_fn: Optional callable; only items with equal keys are batched together.
+            name: Name used for the worker thread and log messages.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.key_fn = key_fn or (lambda item: None)
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self._batches = 0
+        self._items = 0
+        self._max_seen = 0
+        self._windows = 0
+        self._collected = 0
+        self._wait_seconds = 0.0
+        self._sizes = Counter()
+
+    def _ensure_started(self):
+        """Start the worker thread on first use."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+                logger.info(
+                    f"Started {self.name} (max batch {self.max_batch_size}, "
+                    f"wait {self.max_wait * 1000:.1f} ms)"
+                )
+
+    def submit(self, item):
+        """
+        Queue an item and block until its result is ready.
+
+        Returns:
+            The result batch_fn produced for this item (its exception is re-raised here).
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future.result()
+
+    async def submit_async(self, item):
+        """
+        Queue an item from the event loop and await its result without holding a thread.
+
+        Returns:
+            The result batch_fn produced for this item (its exception is re-raised here).
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return await asyncio.wrap_future(future)
+
+    def _collect(self) -> list:
+        """Block for the first item, then gather more until the batch is full or the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._run(batch)
+            except Exception:
+                # Never let one bad batch end the thread every later caller waits on
+                logger.exception(f"{self.name} failed to run a batch")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"{self.name} failed to run the batch"))
+
+    def _run(self, batch: list):
+        """Run one collected window: group the items by key and call batch_fn per group."""
+        started = time.monotonic()
+        with self._lock:
+            self._windows += 1
+            self._collected += len(batch)
+            self._wait_seconds += sum(started - queued for _, _, queued in batch)
+
+        groups = {}
+        for item, future, _ in batch:
+            # Claims the future; False if its caller was cancelled (e.g. the client left)
+            if future.set_running_or_notify_cancel():
+                groups.setdefault(self.key_fn(item), []).append((item, future))
+
+        for group in groups.values():
+            try:
+                results = self.batch_fn([item for item, _ in group])
+            except Exception as e:
+                for _, future in group:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(group, results):
+                future.set_result(result)
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(group)
+                self._max_seen = max(self._max_seen, len(group))
+                self._sizes[len(group)] += 1
+
+    def stats(self) -> dict:
+        """
+        Batch-size figures.
+
+        mean_batch_size is the effective batch size (items per batch_fn call, after
+        grouping by key); mean_window_size counts the items collected per wait window
+        before grouping, so the two differ when incompatible items arrive together.
+        """
+        with self._lock:
+            return {
+                'batches': self._batches,
+                'items': self._items,
+                'mean_batch_size': round(self._items / self._batches, 2) if self._batches else 0.0,
+                'max_batch_size_seen': self._max_seen,
+                'windows': self._windows,
+                'mean_window_size': round(self._collected / self._windows, 2) if self._windows else 0.0,
+                'mean_wait_ms': round(self._wait_seconds / self._collected * 1000, 2) if self._collected else 0.0,
+                'batch_sizes': {size: self._sizes[size] for size in sorted(self._sizes)},
+            }
@@ -0,0 +1,284 @@
+"""
+Configuration Module
+
+Central place for the tunable settings of the AI service.
+Every value can be overridden with an environment variable of the same name
+prefixed with ``AI_`` (e.g. ``AI_UPSCALER_DEVICE=cpu``).
+"""
+
+import hashlib
+import os
+
+# Get paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_DIR = os.path.dirname(SCRIPT_DIR)
+MODELS_DIR = os.path.join(AI_DIR, 'models')
+
+
+def _env_str(name: str, default: str) -> str:
+    """Read a string setting from the environment."""
+    return os.environ.get(f"AI_{name}", default)
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    value = os.environ.get(f"AI_{name}")
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment."""
+    value = os.environ.get(f"AI_{name}")
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment (1/true/yes/on)."""
+    value = os.environ.get(f"AI_{name}")
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# --- Real-ESRGAN upscaler ---
+# Weights of the RealESRGAN_x4plus network (downloaded by model_downloader)
+REALESRGAN_WEIGHTS = _env_str(
+    'REALESRGAN_WEIGHTS',
+    os.path.join(MODELS_DIR, 'realesrgan', 'weights', 'RealESRGAN_x4plus.pth')
+)
+# 'auto' picks CUDA when available, otherwise CPU. Any torch device string works.
+UPSCALER_DEVICE = _env_str('UPSCALER_DEVICE', 'auto')
+# Half precision is only used on CUDA; full precision avoids black outputs on some GPUs
+UPSCALER_HALF = _env_bool('UPSCALER_HALF', False)
+# Tile edge length in input pixels (0 = untiled unless the memory ceiling forces tiling)
+UPSCALER_TILE_SIZE = _env_int('UPSCALER_TILE_SIZE', 0)
+# Overlap added on each tile side; seams are feather-blended across it
+UPSCALER_TILE_OVERLAP = _env_int('UPSCALER_TILE_OVERLAP', 16)
+# Tiles processed in parallel (on CPU the torch threads are split between them)
+UPSCALER_WORKERS = _env_int('UPSCALER_WORKERS', 1)
+# Ceiling for estimated activation memory of all concurrent upscaling forward passes
+UPSCALER_MAX_MEMORY_MB = _env_int('UPSCALER_MAX_MEMORY_MB', 4096)
+# PyTorch CPU threads of the whole process, applied when the first torch model loads
+# (0 = CPU cores / AI_UPSCALER_WORKERS when tiles run in parallel, else PyTorch's default).
+# serve.py sets it per worker from --torch-threads
+TORCH_THREADS = _env_int('TORCH_THREADS', 0)
+
+# --- Uploads ---
+# Largest accepted image file; bigger uploads are refused with 413 before they are parsed
+UPLOAD_MAX_BYTES = _env_int('UPLOAD_MAX_BYTES', 25 * 1024 * 1024)
+# Largest accepted width x height, read from the image header before decoding; files whose
+# header gives no size are refused with 415 (0 = no limit, any format OpenCV decodes)
+UPLOAD_MAX_PIXELS = _env_int('UPLOAD_MAX_PIXELS', 50_000_000)
+# Bytes read from an upload per step
+UPLOAD_CHUNK_BYTES = _env_int('UPLOAD_CHUNK_BYTES', 64 * 1024)
+# Upload buffers kept for reuse between requests, and the size each is preallocated with
+UPLOAD_BUFFER_POOL_SIZE = _env_int('UPLOAD_BUFFER_POOL_SIZE', 4)
+UPLOAD_BUFFER_INITIAL_BYTES = _env_int('UPLOAD_BUFFER_INITIAL_BYTES', 2 * 1024 * 1024)
+
+# --- Upscale policy ---
+# 'adaptive' skips or halves the Real-ESRGAN work on large, sharp faces; 'always' runs 4x
+UPSCALE_POLICY = _env_str('UPSCALE_POLICY', 'adaptive')
+# Longest side an upscaled face should reach; sharp crops already this large are skipped
+UPSCALE_TARGET_SIDE = _env_int('UPSCALE_TARGET_SIDE', 512)
+# Minimum sharpness (variance of the Laplacian at 256 px) for skipping or 2x; blurrier
+# crops always get full 4x restoration
+UPSCALE_SHARPNESS_THRESHOLD = _env_float('UPSCALE_SHARPNESS_THRESHOLD', 100.0)
+
+# --- Face jobs (POST /face/jobs) ---
+FACE_JOBS_ENABLED = _env_bool('FACE_JOBS_ENABLED', True)
+# SQLite database of the job queue (':memory:' = jobs do not survive a restart)
+FACE_JOBS_DB = _env_str('FACE_JOBS_DB', os.path.join(AI_DIR, 'jobs', 'face_jobs.db'))
+# Jobs processed concurrently (their model stages still share the inference executor)
+FACE_JOBS_WORKERS = _env_int('FACE_JOBS_WORKERS', 1)
+# Jobs allowed to wait at once; further submissions get 503
+FACE_JOBS_MAX_QUEUED = _env_int('FACE_JOBS_MAX_QUEUED', 200)
+# Runs of a job before a crash or server error fails it for good
+FACE_JOBS_MAX_ATTEMPTS = _env_int('FACE_JOBS_MAX_ATTEMPTS', 3)
+# A running job whose heartbeat is older than this is presumed orphaned by a dead worker and queued again
+FACE_JOBS_STALE_SECONDS = _env_float('FACE_JOBS_STALE_SECONDS', 120.0)
+# Finished jobs are deleted after this age, and beyond this count (oldest first)
+FACE_JOBS_RETENTION_SECONDS = _env_float('FACE_JOBS_RETENTION_SECONDS', 24 * 3600)
+FACE_JOBS_MAX_RETAINED = _env_int('FACE_JOBS_MAX_RETAINED', 1000)
+
+# --- Startup ---
+# Load every model on a background thread right after the server starts listening.
+# When off, each model loads on the first request that needs it.
+PRELOAD_MODELS = _env_bool('PRELOAD_MODELS', True)
+
+# --- Face detection ---
+# Detector backend: 'opencv' (Haar cascade, no TensorFlow), 'mtcnn', or 'cascade'
+# (OpenCV first, MTCNN only when OpenCV finds no face)
+FACE_DETECTOR_BACKEND = _env_str('FACE_DETECTOR_BACKEND', 'opencv')
+# Haar cascade XML for the OpenCV backend (empty = frontal face cascade bundled with OpenCV)
+FACE_HAAR_CASCADE = _env_str('FACE_HAAR_CASCADE', '')
+# Upper limit on faces returned by POST /face/all (requests may ask for fewer)
+FACE_MAX_FACES = _env_int('FACE_MAX_FACES', 20)
+# Default /face output format ('jpeg', 'webp' or 'png'; requests may pick another)
+FACE_OUTPUT_FORMAT = _env_str('FACE_OUTPUT_FORMAT', 'jpeg')
+# Default JPEG / WebP quality of upscaled faces, 1-100 (PNG is lossless and ignores it)
+FACE_OUTPUT_QUALITY = _env_int('FACE_OUTPUT_QUALITY', 90)
+# Default longest side of returned faces in pixels; larger results are shrunk before
+# encoding (0 = full upscaled size)
+FACE_OUTPUT_MAX_SIDE = _env_int('FACE_OUTPUT_MAX_SIDE', 0)
+# The detector runs on a copy of the frame downscaled to this longest side; the box is mapped
+# back and the face is cropped from the full-resolution image (0 = full resolution)
+FACE_DETECT_MAX_SIDE = _env_int('FACE_DETECT_MAX_SIDE', 1600)
+
+# --- Server launcher (serve.py) ---
+SERVER_HOST = _env_str('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = _env_int('SERVER_PORT', 8000)
+# Worker processes forked after the models are loaded once in the parent
+SERVER_WORKERS = _env_int('SERVER_WORKERS', 2)
+# Pending connections queued by the kernel on the shared listening socket
+SERVER_BACKLOG = _env_int('SERVER_BACKLOG', 2048)
+# Concurrent connections + tasks per worker before it answers 503 (0 = unlimited)
+SERVER_LIMIT_CONCURRENCY = _env_int('SERVER_LIMIT_CONCURRENCY', 0)
+# Seconds an idle keep-alive connection is held open
+SERVER_TIMEOUT_KEEP_ALIVE = _env_int('SERVER_TIMEOUT_KEEP_ALIVE', 5)
+# A worker exiting within this many seconds of being started counts as a failed start;
+# failed starts are retried after a delay doubling from SERVER_RESTART_BACKOFF_SECONDS
+# (capped at a minute), and serve.py gives up after SERVER_MAX_FAILED_STARTS in a row
+SERVER_FAILED_START_SECONDS = _env_float('SERVER_FAILED_START_SECONDS', 10.0)
+SERVER_RESTART_BACKOFF_SECONDS = _env_float('SERVER_RESTART_BACKOFF_SECONDS', 1.0)
+SERVER_MAX_FAILED_STARTS = _env_int('SERVER_MAX_FAILED_STARTS', 5)
+
+# --- Inference executor ---
+# Worker threads running the blocking model stages off the event loop
+INFERENCE_WORKERS = _env_int('INFERENCE_WORKERS', 2)
+
+# --- Plate detection ---
+# Trained YOLOv8n weights for Malaysian plates
+PLATE_YOLO_WEIGHTS = _env_str(
+    'PLATE_YOLO_WEIGHTS',
+    os.path.join(MODELS_DIR, 'Yolov8n', 'train', 'weights', 'best.pt')
+)
+# Runtime of the plate detector: 'pytorch' (the .pt weights), or a graph exported once
+# with export_plate_detector.py: 'onnx' (ONNX Runtime), 'openvino', 'openvino_int8'
+PLATE_DETECTOR_BACKEND = _env_str('PLATE_DETECTOR_BACKEND', 'pytorch')
+# Exported model path (empty = the export's default location next to the .pt weights)
+PLATE_EXPORTED_WEIGHTS = _env_str('PLATE_EXPORTED_WEIGHTS', '')
+# Max images per batched YOLO forward pass (1 disables batching)
+PLATE_BATCH_MAX_SIZE = _env_int('PLATE_BATCH_MAX_SIZE', 8)
+# How long the first queued image waits for others to join its batch
+PLATE_BATCH_WAIT_MS = _env_float('PLATE_BATCH_WAIT_MS', 5.0)
+# Max files accepted by one POST /plate/batch request
+PLATE_BATCH_MAX_FILES = _env_int('PLATE_BATCH_MAX_FILES', 100)
+# Minimum YOLO confidence of a detection read by POST /plate/all (requests may raise it)
+PLATE_MIN_DETECTION_CONFIDENCE = _env_float('PLATE_MIN_DETECTION_CONFIDENCE', 0.25)
+# Upper limit on plates returned by POST /plate/all (requests may ask for fewer)
+PLATE_MAX_PLATES = _env_int('PLATE_MAX_PLATES', 20)
+
+# --- Plate video / burst (POST /plate/video) ---
+# Largest accepted request body: the video file, or all images of a burst together
+PLATE_VIDEO_MAX_BYTES = _env_int('PLATE_VIDEO_MAX_BYTES', 100 * 1024 * 1024)
+# Frames sampled per second of video (requests may ask for fewer or more)
+PLATE_VIDEO_SAMPLE_FPS = _env_float('PLATE_VIDEO_SAMPLE_FPS', 5.0)
+# Upper limit on frames processed per clip (requests may ask for fewer)
+PLATE_VIDEO_MAX_FRAMES = _env_int('PLATE_VIDEO_MAX_FRAMES', 60)
+# Max images accepted as one burst
+PLATE_BURST_MAX_FILES = _env_int('PLATE_BURST_MAX_FILES', 20)
+# Minimum box overlap (IoU) linking a detection to a plate track
+PLATE_TRACK_IOU = _env_float('PLATE_TRACK_IOU', 0.3)
+# Sampled frames a track may go undetected and still be continued
+PLATE_TRACK_MAX_GAP = _env_int('PLATE_TRACK_MAX_GAP', 5)
+# Sharpest crops per track that are OCR'd and voted on
+PLATE_TRACK_OCR_CROPS = _env_int('PLATE_TRACK_OCR_CROPS', 3)
+# Frames a track must be detected in to be reported (clips shorter than this excepted)
+PLATE_TRACK_MIN_FRAMES = _env_int('PLATE_TRACK_MIN_FRAMES', 2)
+
+# --- Plate OCR ---
+# 'full': EasyOCR text detection (CRAFT) + recognition on each variant;
+# 'recognizer': recognizer only, on the whole YOLO crop (or its two rows)
+PLATE_OCR_MODE = _env_str('PLATE_OCR_MODE', 'full')
+# Characters the recognizer may output in 'recognizer' mode (empty = no restriction)
+PLATE_OCR_ALLOWLIST = _env_str('PLATE_OCR_ALLOWLIST', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+# Run the preprocessing variants through EasyOCR in one batched call
+PLATE_OCR_BATCHED = _env_bool('PLATE_OCR_BATCHED', True)
+# Text crops per recognizer forward pass
+PLATE_OCR_RECOGNIZER_BATCH_SIZE = _env_int('PLATE_OCR_RECOGNIZER_BATCH_SIZE', 8)
+# Stop trying variants once one is confident and well-formed
+PLATE_OCR_EARLY_EXIT = _env_bool('PLATE_OCR_EARLY_EXIT', True)
+# Minimum OCR confidence for an early exit
+PLATE_OCR_EARLY_EXIT_CONFIDENCE = _env_float('PLATE_OCR_EARLY_EXIT_CONFIDENCE', 0.9)
+# Try variants in order of their historical win rate
+PLATE_OCR_ADAPTIVE_ORDER = _env_bool('PLATE_OCR_ADAPTIVE_ORDER', True)
+
+# --- Result cache ---
+RESULT_CACHE_ENABLED = _env_bool('RESULT_CACHE_ENABLED', True)
+# In-memory LRU tier bounds
+RESULT_CACHE_MAX_ENTRIES = _env_int('RESULT_CACHE_MAX_ENTRIES', 256)
+RESULT_CACHE_MAX_MB = _env_int('RESULT_CACHE_MAX_MB', 256)
+# On-disk tier (empty = disabled), entry TTL and total size bound
+RESULT_CACHE_DIR = _env_str('RESULT_CACHE_DIR', '')
+RESULT_CACHE_DISK_TTL_SECONDS = _env_float('RESULT_CACHE_DISK_TTL_SECONDS', 7 * 24 * 3600)
+RESULT_CACHE_DISK_MAX_MB = _env_int('RESULT_CACHE_DISK_MAX_MB', 1024)
+# Bump to invalidate every cached result
+RESULT_CACHE_VERSION = _env_str('RESULT_CACHE_VERSION', '1')
+
+# --- Near-duplicate index (needs the result cache) ---
+# Answer /face uploads that are re-encoded / resized copies of a recent image
+NEAR_DUPLICATE_ENABLED = _env_bool('NEAR_DUPLICATE_ENABLED', True)
+# Largest perceptual hash distance (differing bits of 64) treated as the same photo
+NEAR_DUPLICATE_MAX_DISTANCE = _env_int('NEAR_DUPLICATE_MAX_DISTANCE', 4)
+# Also reuse /plate results of near-duplicates. Off by default: two cars shot by the same
+# fixed camera hash close together, and a reused result would report the wrong plate
+NEAR_DUPLICATE_PLATES = _env_bool('NEAR_DUPLICATE_PLATES', False)
+# Stricter distance for /plate when enabled (0 = identical hash, e.g. only re-encoded copies)
+NEAR_DUPLICATE_PLATE_MAX_DISTANCE = _env_int('NEAR_DUPLICATE_PLATE_MAX_DISTANCE', 0)
+# Recent images remembered (oldest forgotten first)
+NEAR_DUPLICATE_MAX_ENTRIES = _env_int('NEAR_DUPLICATE_MAX_ENTRIES', 4096)
+
+
+def plate_detector_weights(backend: str | None = None) -> str:
+    """
+    Model file / folder loaded for a plate detector backend.
+
+    Exports are written next to the .pt weights under Ultralytics' names
+    (best.onnx, best_openvino_model/, best_int8_openvino_model/).
+
+    Args:
+        backend: Backend name (defaults to PLATE_DETECTOR_BACKEND).
+
+    Returns:
+        Path to hand to ultralytics.YOLO.
+    """
+    backend = backend or PLATE_DETECTOR_BACKEND
+    if backend == 'pytorch':
+        return PLATE_YOLO_WEIGHTS
+    if PLATE_EXPORTED_WEIGHTS and backend == PLATE_DETECTOR_BACKEND:
+        return PLATE_EXPORTED_WEIGHTS
+
+    stem = os.path.splitext(PLATE_YOLO_WEIGHTS)[0]
+    if backend == 'onnx':
+        return f"{stem}.onnx"
+    if backend == 'openvino':
+        return f"{stem}_openvino_model"
+    if backend == 'openvino_int8':
+        return f"{stem}_int8_openvino_model"
+    raise ValueError(f"Unknown plate detector backend: {backend}")
+
+
+def version_of(setting_names: list[str], weight_files: list[str] = ()) -> str:
+    """
+    Version string for cached results.
+
+    Combines RESULT_CACHE_VERSION, the current values of the named settings and the
+    size / modification time of the weight files, so changing any of them invalidates
+    previously cached results.
+
+    Args:
+        setting_names: Names of settings in this module that influence the result.
+        weight_files: Model weight files the result depends on.
+
+    Returns:
+        Short hex version string.
+    """
+    parts = [RESULT_CACHE_VERSION]
+    parts += [f"{name}={globals()[name]}" for name in setting_names]
+    for path in weight_files:
+        try:
+            st = os.stat(path)
+            parts.append(f"{os.path.basename(path)}:{st.st_size}:{int(st.st_mtime)}")
+        except OSError:
+            parts.append(f"{os.path.basename(path)}:missing")
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:12]
@@ -0,0 +1,161 @@
+"""
+Inference Executor Module
+
+Runs the CPU/GPU-bound pipeline stages (decode, MTCNN, Real-ESRGAN, YOLO, EasyOCR, encode)
+on a dedicated thread pool, so the asyncio event loop stays free to serve other requests.
+Tracks queue depth and queue wait time so the pool can be sized from production figures.
+Also applies the process-wide PyTorch CPU thread count the models run with.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from services import config
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceExecutor:
+    """
+    Fixed-size thread pool for blocking model work, with queue statistics.
+
+    The pool is created on first use, so importing this module starts no threads.
+    """
+
+    def __init__(self, max_workers: int = None, wait_window: int = 1024):
+        """
+        Args:
+            max_workers: Number of worker threads. If None, uses config.INFERENCE_WORKERS.
+            wait_window: Number of recent queue waits kept for percentile figures.
+        """
+        self.max_workers = max(1, config.INFERENCE_WORKERS if max_workers is None else max_workers)
+        self._pool = None
+        self._lock = threading.Lock()
+
+        self._queued = 0
+        self._running = 0
+        self._started = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._recent_waits = deque(maxlen=wait_window)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Create the worker pool lazily."""
+        with self._lock:
+            if self._pool is None:
+                logger.info(f"Starting inference executor with {self.max_workers} worker(s)")
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='inference'
+                )
+            return self._pool
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking function on the pool and await its result.
+
+        Args:
+            func: The blocking callable.
+            *args, **kwargs: Arguments passed to func.
+
+        Returns:
+            Whatever func returns (exceptions are re-raised in the caller).
+        """
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            waited = started - submitted
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._started += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._recent_waits.append(waited)
+            ok = False
+            try:
+                result = func(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._failed += 0 if ok else 1
+                    self._run_total += time.perf_counter() - started
+
+        with self._lock:
+            self._queued += 1
+        future = self._get_pool().submit(task)
+        # A task cancelled before it started never decrements the queue itself
+        future.add_done_callback(lambda f: self._on_cancelled() if f.cancelled() else None)
+        return await asyncio.wrap_future(future)
+
+    def _on_cancelled(self):
+        with self._lock:
+            self._queued -= 1
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the executor's queue figures.
+
+        Returns:
+            Dict with worker count, current queue depth / running tasks, totals,
+            and queue wait times (mean, max, p50, p95 over the recent window) in ms.
+        """
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            started = self._started
+            completed = self._completed
+            stats = {
+                'workers': self.max_workers,
+                'queue_depth': self._queued,
+                'running': self._running,
+                'completed': completed,
+                'failed': self._failed,
+                'wait_ms_mean': round(1000 * self._wait_total / started, 2) if started else 0.0,
+                'wait_ms_max': round(1000 * self._wait_max, 2),
+                'run_ms_mean': round(1000 * self._run_total / completed, 2) if completed else 0.0,
+            }
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(1000 * waits[min(len(waits) - 1, int(p * len(waits)))], 2)
+
+        stats['wait_ms_p50'] = percentile(0.50)
+        stats['wait_ms_p95'] = percentile(0.95)
+        return stats
+
+
+def configure_torch_threads():
+    """
+    Apply config.TORCH_THREADS to PyTorch's intra-op thread pool.
+
+    The setting is process-wide, so it is applied here, by the model loaders, rather than
+    by any one model. Without an explicit value, parallel upscaler tiles split the cores
+    between them (each concurrent forward opens its own intra-op team).
+    """
+    threads = config.TORCH_THREADS
+    if not threads and config.UPSCALER_WORKERS > 1:
+        threads = max(1, (os.cpu_count() or 1) // config.UPSCALER_WORKERS)
+    if not threads:
+        return
+
+    import torch
+    if torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
+        logger.info(f"PyTorch CPU threads: {threads}")
+
+
+# Shared executor for all endpoints
+inference_executor = InferenceExecutor()
@@ -0,0 +1,170 @@
+"""
+Face Detectors Module
+
+Face detection backends behind detect_and_crop_face:
+
+1. mtcnn   - MTCNN (accurate on angled / partly occluded faces, needs TensorFlow)
+2. opencv  - OpenCV Haar cascade (ships with opencv-python, no TensorFlow, a few ms per frame)
+3. cascade - OpenCV first, MTCNN only when OpenCV finds nothing
+
+The backend is chosen with config.FACE_DETECTOR_BACKEND when the detector is loaded.
+"""
+
+import logging
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from services import config
+from services.metrics import FACE_DETECTIONS
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('mtcnn', 'opencv', 'cascade')
+
+
+class FaceDetector:
+    """
+    Base class of the face detection backends.
+
+    Subclasses implement _detect; detect() adds the per-backend outcome counter.
+    """
+
+    name = 'base'
+
+    def detect(self, image: np.ndarray) -> list[dict]:
+        """
+        Detect faces in an image.
+
+        Args:
+            image: BGR image (from cv2.imdecode).
+
+        Returns:
+            List of {'box': (x, y, w, h), 'confidence': float}, best face first.
+        """
+        faces = self._detect(image)
+        FACE_DETECTIONS.inc(backend=self.name, outcome='found' if faces else 'none')
+        return faces
+
+    def _detect(self, image: np.ndarray) -> list[dict]:
+        raise NotImplementedError
+
+
+class MTCNNDetector(FaceDetector):
+    """MTCNN detector (imports TensorFlow)."""
+
+    name = 'mtcnn'
+
+    def __init__(self):
+        from mtcnn import MTCNN
+        try:
+            self._detector = MTCNN()
+        except Exception:
+            logger.error("Please ensure TensorFlow (or a compatible backend) is correctly installed.")
+            raise
+
+    def _detect(self, image: np.ndarray) -> list[dict]:
+        # MTCNN expects images in RGB format
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        result = self._detector.detect_faces(image_rgb)
+        # Keep MTCNN's own order (the first face is the one used)
+        return [
+            {'box': tuple(int(v) for v in face['box']), 'confidence': float(face['confidence'])}
+            for face in result
+        ]
+
+
+class OpenCVDetector(FaceDetector):
+    """Haar cascade frontal face detector bundled with OpenCV."""
+
+    name = 'opencv'
+
+    def __init__(self, cascade_path: str = None):
+        """
+        Args:
+            cascade_path: Haar cascade XML. If None, uses config.FACE_HAAR_CASCADE or the
+                          frontal face cascade shipped with opencv-python.
+        """
+        if not cascade_path:
+            cascade_path = config.FACE_HAAR_CASCADE or os.path.join(
+                cv2.data.haarcascades, 'haarcascade_frontalface_default.xml'
+            )
+        self._classifier = cv2.CascadeClassifier(cascade_path)
+        if self._classifier.empty():
+            raise FileNotFoundError(f"Haar cascade not found or invalid: {cascade_path}")
+        # CascadeClassifier is not documented as thread-safe; serialize calls from the executor
+        self._lock = threading.Lock()
+
+    def _detect(self, image: np.ndarray) -> list[dict]:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = cv2.equalizeHist(gray)
+        with self._lock:
+            boxes, _, weights = self._classifier.detectMultiScale3(
+                gray,
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(30, 30),
+                outputRejectLevels=True
+            )
+        faces = [
+            {'box': tuple(int(v) for v in box), 'confidence': float(weight)}
+            for box, weight in zip(boxes, np.ravel(weights))
+        ]
+        # Largest face first: the reporter's subject is usually the most prominent one
+        faces.sort(key=lambda face: face['box'][2] * face['box'][3], reverse=True)
+        return faces
+
+
+class CascadeDetector(FaceDetector):
+    """Run a cheap detector first and fall back to a stronger one when it finds nothing."""
+
+    name = 'cascade'
+
+    def __init__(self, primary: FaceDetector, fallback_loader):
+        """
+        Args:
+            primary: Cheap detector tried on every image.
+            fallback_loader: Zero-argument callable returning the fallback detector
+                             (or None if it is unavailable), called on first fallback.
+        """
+        self.primary = primary
+        self._fallback_loader = fallback_loader
+
+    def _detect(self, image: np.ndarray) -> list[dict]:
+        faces = self.primary.detect(image)
+        if faces:
+            return faces
+
+        fallback = self._fallback_loader()
+        if fallback is None:
+            logger.warning("Cascade fallback detector is not available.")
+            return []
+        logger.info(f"{self.primary.name} found no face, falling back to {fallback.name}")
+        return fallback.detect(image)
+
+
+def create_detector(backend: str, mtcnn_loader=None) -> FaceDetector:
+    """
+    Build the face detector for a backend name.
+
+    Args:
+        backend: One of BACKENDS.
+        mtcnn_loader: Callable returning the shared MTCNNDetector (or None if it failed
+                      to load), used by 'mtcnn' and 'cascade'. Defaults to building a new one.
+
+    Returns:
+        The detector.
+    """
+    mtcnn_loader = mtcnn_loader or MTCNNDetector
+    if backend == 'mtcnn':
+        detector = mtcnn_loader()
+        if detector is None:
+            raise RuntimeError("MTCNN detector is not available")
+        return detector
+    if backend == 'opencv':
+        return OpenCVDetector()
+    if backend == 'cascade':
+        return CascadeDetector(OpenCVDetector(), mtcnn_loader)
+    raise ValueError(f"Unknown face detector backend: {backend} (expected one of {', '.join(BACKENDS)})")
@@ -1,86 +1,111 @@
 """
 Face Processing Module
 
-Provides face detection using MTCNN and upscaling using Real-ESRGAN.
+Provides face detection (OpenCV or MTCNN, see face_detectors.py) and upscaling using Real-ESRGAN.
 Used to enhance low-quality faces from reporter-submitted images for enforcement identification.
 """
 
 import cv2
 import numpy as np
-from mtcnn import MTCNN
-import subprocess
-import sys
-import os
-import tempfile
 import logging
 
+from services import config, model_registry
+from services.executor import configure_torch_threads
+from services.face_detectors import FaceDetector, MTCNNDetector, create_detector
+from services.imaging import downscale_for_detection
+from services.model_downloader import ensure_models_exist
+from services.metrics import STAGE_SECONDS, UPSCALE_DECISIONS, FACE_SHARPNESS
+from services.upscale_policy import plan_upscale, prepare_input
+
 # Configure module logger
 logger = logging.getLogger(__name__)
 
-# --- GPU Status Check ---
-try:
-    import torch
-    if torch.cuda.is_available():
-        logger.info(f"PyTorch CUDA available: GPU={torch.cuda.get_device_name(0)}")
-    else:
-        logger.warning("PyTorch CUDA not available - Real-ESRGAN will use CPU (slow)")
-except ImportError:
-    logger.warning("PyTorch not found - GPU status unknown")
 
 # --- Initialization ---
-logger.info("Initializing MTCNN detector...")
-try:
-    detector = MTCNN()
-    logger.info("MTCNN detector initialized successfully.")
-except Exception as e:
-    logger.error(f"Error initializing MTCNN: {e}")
-    logger.error("Please ensure TensorFlow (or a compatible backend) is correctly installed.")
-    detector = None
+# The models are loaded lazily (on first use or by the startup loader thread),
+# so importing this module does not pull in TensorFlow or PyTorch.
 
-# Get the parent directory
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-AI_DIR = os.path.dirname(SCRIPT_DIR)
+def _ensure_model_files() -> bool:
+    """Download missing model files (raises so GET /ready reports the failure)."""
+    if not ensure_models_exist():
+        raise RuntimeError("Some models failed to set up. Face upscaling might not work.")
+    return True
 
-# Path to the python executable currently running this
-PYTHON_EXE = sys.executable
 
-# Path to the Real-ESRGAN inference script
-SCRIPT_PATH = os.path.join(AI_DIR, 'models', 'realesrgan', 'inference_realesrgan.py')
+def _load_face_detector() -> FaceDetector:
+    """Build the configured face detector backend (see services/face_detectors.py)."""
+    return create_detector(
+        config.FACE_DETECTOR_BACKEND,
+        mtcnn_loader=mtcnn_model.get if mtcnn_model is not None else None
+    )
 
-def detect_and_crop_face(image_array: np.ndarray, padding_percent: float = 0.25) -> np.ndarray | None:
-    """
-    Detects the first face in an image, crops it, and adds padding.
 
-    Args:
-        image_array: The image as a NumPy array (from cv2.imdecode).
-        padding_percent: Percentage of width/height to add as padding.
-                         0.25 means 25% padding.
+def _load_upscaler():
+    """Check the GPU and load Real-ESRGAN once; it stays resident for every request."""
+    try:
+        import torch
+        if torch.cuda.is_available():
+            logger.info(f"PyTorch CUDA available: GPU={torch.cuda.get_device_name(0)}")
+        else:
+            logger.warning("PyTorch CUDA not available - Real-ESRGAN will use CPU (slow)")
+    except ImportError:
+        logger.warning("PyTorch not found - GPU status unknown")
+
+    configure_torch_threads()
+    from services.upscaler import RealESRGANUpscaler
+    try:
+        return RealESRGANUpscaler()
+    except Exception:
+        logger.error("Please ensure the Real-ESRGAN weights are in models/realesrgan/weights/")
+        raise
+
+
+model_files = model_registry.register('model_files', _ensure_model_files)
+# MTCNN (and TensorFlow) is only loaded for the backends that use it
+mtcnn_model = None
+if config.FACE_DETECTOR_BACKEND in ('mtcnn', 'cascade'):
+    mtcnn_model = model_registry.register('mtcnn', MTCNNDetector)
+face_detector_model = model_registry.register('face_detector', _load_face_detector)
+upscaler_model = model_registry.register('realesrgan', _load_upscaler, depends_on=[model_files])
+
+
+def _detect_faces(image_array: np.ndarray) -> list[dict] | None:
+    """
+    Run the face detector on a reduced-resolution copy and map the boxes back.
 
     Returns:
-        A NumPy array of the cropped face, or None if no face is detected.
+        Detections ({'box': (x, y, w, h), 'confidence'}) in original-image pixels,
+        best first, or None if the detector is unavailable or failed.
     """
+    detector = face_detector_model.get()
     if detector is None:
-        logger.error("MTCNN detector is not available. Aborting face detection.")
+        logger.error("Face detector is not available. Aborting face detection.")
         return None
 
-    logger.info("Detecting faces...")
+    logger.info(f"Detecting faces ({detector.name})...")
     try:
-        # MTCNN expects images in RGB format
-        image_rgb = cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB)
-        result = detector.detect_faces(image_rgb)
+        # The detector runs on a reduced-resolution copy; crops are cut from the original pixels
+        with STAGE_SECONDS.time(stage='face_detect'):
+            small, scale = downscale_for_detection(image_array, config.FACE_DETECT_MAX_SIDE)
+            result = detector.detect(small)
     except Exception as e:
         logger.error(f"An error occurred during face detection: {e}")
         return None
 
-    if not result:
-        logger.warning("No face detected.")
-        return None
+    scale_x, scale_y = scale
+    faces = []
+    for face in result:
+        x, y, w, h = face['box']
+        faces.append({
+            'box': (int(x * scale_x), int(y * scale_y), int(w * scale_x), int(h * scale_y)),
+            'confidence': face['confidence']
+        })
+    return faces
 
-    # Use the first detected face
-    face = result[0]
-    x, y, w, h = face['box']
 
-    logger.info(f"Face detected at [x={x}, y={y}, w={w}, h={h}]")
+def _crop_with_padding(image_array: np.ndarray, box: tuple, padding_percent: float) -> np.ndarray:
+    """Crop a face box with padding (more above the face than below, for hair / forehead)."""
+    x, y, w, h = box
 
     img_h, img_w = image_array.shape[:2]
     pad_h = int(h * padding_percent) 
@@ -97,9 +122,69 @@ def detect_and_crop_face(image_array: np.ndarray, padding_percent: float = 0.25)
     logger.debug(f"Cropping with padding to [x1={x1}, y1={y1}, x2={x2}, y2={y2}]")
 
     # Crop the original image (BGR)
-    cropped_face = image_array[y1:y2, x1:x2]
+    return image_array[y1:y2, x1:x2]
+
 
-    return cropped_face
+def detect_and_crop_face(image_array: np.ndarray, padding_percent: float = 0.25) -> np.ndarray | None:
+    """
+    Detects the first face in an image, crops it, and adds padding.
+
+    Args:
+        image_array: The image as a NumPy array (from cv2.imdecode).
+        padding_percent: Percentage of width/height to add as padding.
+                         0.25 means 25% padding.
+
+    Returns:
+        A NumPy array of the cropped face, or None if no face is detected.
+    """
+    result = _detect_faces(image_array)
+    if result is None:
+        return None
+
+    if not result:
+        logger.warning("No face detected.")
+        return None
+
+    # Use the first detected face
+    x, y, w, h = result[0]['box']
+
+    logger.info(f"Face detected at [x={x}, y={y}, w={w}, h={h}]")
+
+    return _crop_with_padding(image_array, (x, y, w, h), padding_percent)
+
+
+def detect_and_crop_faces(
+    image_array: np.ndarray,
+    padding_percent: float = 0.25,
+    min_size: int = 0,
+    max_faces: int | None = None
+) -> list[dict] | None:
+    """
+    Detects every face in an image (group photos) and crops each with padding.
+
+    Args:
+        image_array: The image as a NumPy array (from cv2.imdecode).
+        padding_percent: Percentage of width/height to add as padding.
+        min_size: Skip faces whose box is narrower or shorter than this (original pixels).
+        max_faces: Keep at most this many faces (detector order, best first).
+
+    Returns:
+        List of {'box': (x, y, w, h), 'confidence', 'face': cropped BGR array},
+        or None if detection failed.
+    """
+    result = _detect_faces(image_array)
+    if result is None:
+        return None
+
+    faces = [face for face in result if min(face['box'][2], face['box'][3]) >= min_size]
+    if max_faces is not None:
+        faces = faces[:max_faces]
+
+    logger.info(f"Detected {len(result)} face(s), keeping {len(faces)}")
+    return [
+        {**face, 'face': _crop_with_padding(image_array, face['box'], padding_percent)}
+        for face in faces
+    ]
 
 # --- Face Upscaling ---
 
@@ -107,9 +192,8 @@ def upscale_face(face_array: np.ndarray) -> np.ndarray | None:
     """
     Upscales a cropped face image using Real-ESRGAN.
 
-    This function saves the input array to a temporary file,
-    runs the Real-ESRGAN subprocess, reads the upscaled
-    image from a temporary output directory, and returns it.
+    The network is kept resident in this process (see services/upscaler.py),
+    so the face is upscaled directly in memory without temporary files.
 
     Args:
         face_array: The cropped face image as a NumPy array.
@@ -117,87 +201,108 @@ def upscale_face(face_array: np.ndarray) -> np.ndarray | None:
     Returns:
         The upscaled face image as a NumPy array, or None if upscaling fails.
     """
-    if not os.path.exists(SCRIPT_PATH):
-        logger.error(f"Real-ESRGAN script not found at {SCRIPT_PATH}")
-        logger.error("Please ensure 'Real-ESRGAN' folder is in models/ directory")
+    upscaler = upscaler_model.get()
+    if upscaler is None:
+        logger.error("Real-ESRGAN upscaler is not available. Aborting face upscaling.")
         return None
 
     logger.info("Starting face upscaling...")
-    
+
     try:
-        # Create a temporary directory to store the output
-        with tempfile.TemporaryDirectory() as output_dir:
-            # Create a temporary file for the input face
-            # delete=False is needed so we can write to it, pass its name, and delete manually
-            with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as input_file:
-                cv2.imwrite(input_file.name, face_array)
-                input_path = input_file.name
-
-            logger.debug(f"Temporary input file: {input_path}")
-            logger.debug(f"Temporary output dir: {output_dir}")
-
-            # --- Build the Command ---
-            # This is based on your Face_Upscaler_test.py
-            command = [
-                PYTHON_EXE,
-                SCRIPT_PATH,
-                '-n', 'RealESRGAN_x4plus',  # Model name
-                '-i', input_path,             # Input file path
-                '-o', output_dir,             # Output directory
-                # '--face_enhance',             # Use face enhancement model
-                '--fp32',                     # Use full precision
-                '-g', '0'                   
-            ]
-
-            logger.debug(f"Running command: {' '.join(command)}")
-
-            # --- Run the Subprocess ---
-            try:
-                subprocess.run(
-                    command,
-                    check=True,  # Raise an error if the command fails
-                    capture_output=True, # Capture stdout/stderr
-                    text=True,
-                    encoding='utf-8'
-                )
-                logger.info("Real-ESRGAN process completed.")
-                
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Real-ESRGAN process failed with error code {e.returncode}")
-                logger.debug(f"STDOUT: {e.stdout}")
-                logger.debug(f"STDERR: {e.stderr}")
-                os.remove(input_path)  # Clean up input file
-                return None
-            
-            # --- Read the Upscaled Image ---
-            output_files = os.listdir(output_dir)
-            if not output_files:
-                logger.error("Real-ESRGAN ran but produced no output files.")
-                os.remove(input_path)  # Clean up input file
-                return None
-
-            # Assuming the first file found is our upscaled image
-            upscaled_image_name = output_files[0]
-            upscaled_image_path = os.path.join(output_dir, upscaled_image_name)
-
-            logger.debug(f"Reading upscaled file: {upscaled_image_path}")
-            
-            upscaled_image = cv2.imread(upscaled_image_path)
-            
-            if upscaled_image is None:
-                logger.error("Failed to read the upscaled image file from disk.")
-                os.remove(input_path)  # Clean up input file
-                return None
-            
-            # Clean up the temporary input file
-            os.remove(input_path)
-
-            logger.info("Face upscaling completed successfully.")
-            return upscaled_image
+        with STAGE_SECONDS.time(stage='upscale'):
+            upscaled_image = upscaler.upscale(face_array)
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during upscaling: {e}")
+        return None
+
+    logger.info("Face upscaling completed successfully.")
+    return upscaled_image
+
+
+def upscale_faces(face_arrays: list[np.ndarray]) -> list[np.ndarray] | None:
+    """
+    Upscales several cropped faces together using Real-ESRGAN.
+
+    Similar-sized crops share one batched forward pass (see RealESRGANUpscaler.upscale_batch).
+
+    Args:
+        face_arrays: The cropped face images as NumPy arrays.
+
+    Returns:
+        The upscaled faces in input order, or None if upscaling fails.
+    """
+    upscaler = upscaler_model.get()
+    if upscaler is None:
+        logger.error("Real-ESRGAN upscaler is not available. Aborting face upscaling.")
+        return None
 
+    logger.info(f"Starting batched upscaling of {len(face_arrays)} face(s)...")
+
+    try:
+        with STAGE_SECONDS.time(stage='upscale'):
+            upscaled_images = upscaler.upscale_batch(face_arrays)
     except Exception as e:
         logger.error(f"An unexpected error occurred during upscaling: {e}")
-        # Ensure cleanup if input_path was defined
-        if 'input_path' in locals() and os.path.exists(input_path):
-            os.remove(input_path)
         return None
+
+    logger.info("Face upscaling completed successfully.")
+    return upscaled_images
+
+
+def _plan(face_array: np.ndarray) -> dict:
+    """Run the upscale policy on one crop and record the decision."""
+    decision = plan_upscale(face_array)
+    UPSCALE_DECISIONS.inc(mode=decision['mode'])
+    FACE_SHARPNESS.observe(decision['sharpness'], mode=decision['mode'])
+    logger.info(
+        f"Upscale policy: {decision['mode']} "
+        f"(side={decision['input_side']}px, sharpness={decision['sharpness']})"
+    )
+    return decision
+
+
+def upscale_face_adaptive(face_array: np.ndarray) -> tuple[np.ndarray | None, dict]:
+    """
+    Upscales a cropped face as far as the upscale policy finds worthwhile.
+
+    Large, sharp crops are returned unchanged or upscaled 2x from a half-size copy;
+    small or blurry ones get the full 4x (see services/upscale_policy.py).
+
+    Args:
+        face_array: The cropped face image as a NumPy array.
+
+    Returns:
+        Tuple of (upscaled face or None if upscaling fails, policy decision dict).
+    """
+    decision = _plan(face_array)
+    network_input = prepare_input(face_array, decision['mode'])
+    if network_input is None:
+        return face_array, decision
+    return upscale_face(network_input), decision
+
+
+def upscale_faces_adaptive(face_arrays: list[np.ndarray]) -> tuple[list[np.ndarray] | None, list[dict]]:
+    """
+    Upscales several cropped faces, deciding per crop like upscale_face_adaptive.
+
+    Crops that still need the network share batched passes (see upscale_faces).
+
+    Args:
+        face_arrays: The cropped face images as NumPy arrays.
+
+    Returns:
+        Tuple of (upscaled faces in input order or None if upscaling fails,
+        policy decision per face).
+    """
+    decisions = [_plan(face_array) for face_array in face_arrays]
+    inputs = [prepare_input(face_array, decision['mode']) for face_array, decision in zip(face_arrays, decisions)]
+
+    pending = [index for index, network_input in enumerate(inputs) if network_input is not None]
+    results = list(face_arrays)
+    if pending:
+        upscaled = upscale_faces([inputs[index] for index in pending])
+        if upscaled is None:
+            return None, decisions
+        for index, image in zip(pending, upscaled):
+            results[index] = image
+    return results, decisions
@@ -0,0 +1,60 @@
+"""
+Imaging Module
+
+Helpers for running detectors on a reduced-resolution copy of a frame, and for
+capping the size of output images.
+
+Phone photos arrive at 12-48 MP, but MTCNN finds faces just as well on a frame a few
+megapixels in size, while its image pyramid over the full frame dominates latency and
+memory. Detection runs on a downscaled working copy and the box is mapped back, so the
+crop is still cut from the original full-resolution pixels.
+"""
+
+import cv2
+import numpy as np
+
+
+def downscale_for_detection(image: np.ndarray, max_side: int) -> tuple[np.ndarray, tuple[float, float]]:
+    """
+    Shrink an image so its longest side is at most max_side.
+
+    Args:
+        image: Full-resolution image (any channel layout).
+        max_side: Longest side of the working copy in pixels (0 = no downscaling).
+
+    Returns:
+        Tuple of (working_image, (scale_x, scale_y)), where multiplying working-image
+        coordinates by the scales gives original-image coordinates. The original image
+        is returned unchanged (scales of 1.0) when it is already small enough.
+    """
+    height, width = image.shape[:2]
+    small = shrink_to_max_side(image, max_side)
+    if small is image:
+        return image, (1.0, 1.0)
+
+    small_height, small_width = small.shape[:2]
+    return small, (width / small_width, height / small_height)
+
+
+def shrink_to_max_side(image: np.ndarray, max_side: int) -> np.ndarray:
+    """
+    Downscale an image so its longest side is at most max_side, keeping the aspect ratio.
+
+    Args:
+        image: Image to shrink (any channel layout).
+        max_side: Longest side in pixels (0 = no limit).
+
+    Returns:
+        The resized copy, or the image itself when it is already small enough.
+    """
+    height, width = image.shape[:2]
+    longest = max(height, width)
+    if max_side <= 0 or longest <= max_side:
+        return image
+
+    factor = max_side / longest
+    small_width = max(1, round(width * factor))
+    small_height = max(1, round(height * factor))
+    # INTER_AREA averages the dropped pixels instead of aliasing them away
+    return cv2.resize(image, (small_width, small_height), interpolation=cv2.INTER_AREA)
+
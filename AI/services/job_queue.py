@@ -0,0 +1,411 @@
+"""
+Job Queue Module
+
+Persistent queue for slow requests that should not hold an HTTP connection open.
+
+On CPU nodes a face upscale can outlast mobile and proxy timeouts; the client then
+retries and the work is done twice. Instead a job is stored in SQLite and its id is
+returned immediately. A pool of asyncio workers drains the queue (the model stages
+still run on the inference executor) and stores each result for polling.
+
+- Jobs survive restarts: a job left running by a crash is queued again on startup
+- A running job's row is refreshed by a heartbeat; one whose heartbeat stopped (its
+  worker process died, e.g. a serve.py worker) is queued again by the next claim
+- Submit and claim run in SQLite write transactions, so processes sharing the file
+  cannot both pass the dedupe or queue-size check
+- Resubmitting the same input and options returns the existing job instead of a new one
+- Finished jobs are kept for a bounded time and count, then deleted
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    dedupe_key TEXT,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    input BLOB,
+    result BLOB,
+    result_meta TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS jobs_dedupe_key ON jobs (dedupe_key);
+"""
+
+# Columns returned by get() (the input and result blobs only where needed)
+_INFO_COLUMNS = "id, kind, status, params, result_meta, error, attempts, created, updated"
+
+
+class QueueFull(Exception):
+    """Raised by submit() when max_queued jobs are already waiting."""
+
+
+class JobFailed(Exception):
+    """Raised by a job handler for a permanent failure (the job is not retried)."""
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with an asyncio worker pool.
+
+    Job states: queued -> running -> done | failed. A handler failing with JobFailed
+    fails the job at once; any other exception requeues it until max_attempts. So does
+    a running job whose heartbeat is older than stale_seconds.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_queued: int = 200,
+        max_attempts: int = 3,
+        retention_seconds: float = 86400,
+        max_retained: int = 1000,
+        poll_seconds: float = 1.0,
+        stale_seconds: float = 120.0,
+    ):
+        """
+        Args:
+            db_path: SQLite database file (':memory:' keeps jobs only for this process).
+            max_queued: Jobs allowed to wait at once; submit() raises QueueFull beyond it.
+            max_attempts: Runs of a job before a crash or error fails it for good.
+            retention_seconds: Age after which finished jobs are deleted.
+            max_retained: Finished jobs kept at most (oldest deleted first).
+            poll_seconds: How often idle workers look for jobs without a wake-up.
+            stale_seconds: Age of a running job's last heartbeat after which its
+                           worker is presumed dead and the job is queued again.
+        """
+        self.db_path = db_path
+        self.max_queued = max_queued
+        self.max_attempts = max(1, max_attempts)
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+        self._tasks = []
+        self._loop = None
+        self._wake = None
+        self._last_purge = 0.0
+        self._counters = {
+            'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0, 'retried': 0, 'recovered': 0
+        }
+
+        self._recover()
+        self.purge()
+
+    # --- Storage ---
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """
+        This process's connection (opened on first use).
+
+        A connection must not be used across fork(), so workers forked by serve.py open
+        their own; the queue itself is shared through the database file.
+        """
+        if self._pid != os.getpid():
+            connection = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            if self.db_path != ':memory:':
+                connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Write transaction (lock held).
+
+        BEGIN IMMEDIATE takes SQLite's write lock up front, so the reads inside cannot
+        be invalidated by another process before the writes commit.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _requeue_running(self, db: sqlite3.Connection, updated_before: float) -> tuple[int, int]:
+        """
+        Requeue running jobs last updated before a time (inside a transaction).
+
+        Jobs out of attempts are failed instead. Returns (requeued, failed).
+        """
+        now = time.time()
+        requeued = db.execute(
+            "UPDATE jobs SET status = 'queued', updated = ? WHERE status = 'running' AND updated < ? AND attempts < ?",
+            (now, updated_before, self.max_attempts)
+        ).rowcount
+        failed = db.execute(
+            "UPDATE jobs SET status = 'failed', input = NULL, error = ?, updated = ? "
+            "WHERE status = 'running' AND updated < ?",
+            ("Interrupted too many times.", now, updated_before)
+        ).rowcount
+        self._counters['recovered'] += requeued
+        self._counters['failed'] += failed
+        return requeued, failed
+
+    def _recover(self):
+        """
+        Requeue jobs left running by a dead process (or fail them after max_attempts).
+
+        Only jobs whose heartbeat is older than stale_seconds are taken: other processes
+        sharing the database (serve.py workers, one main.py per GPU) may still be
+        running the rest.
+        """
+        with self._transaction() as db:
+            requeued, failed = self._requeue_running(db, time.time() - self.stale_seconds)
+        if requeued or failed:
+            logger.info(f"Job queue recovered {requeued} interrupted job(s), failed {failed}")
+
+    def submit(self, kind: str, data: bytes, params: dict, dedupe_key: str | None = None) -> tuple[str, bool]:
+        """
+        Queue a job, or return the live job with the same dedupe key.
+
+        Args:
+            kind: Job type (e.g. 'face').
+            data: Input bytes (the uploaded image).
+            params: JSON-serializable options for the handler.
+            dedupe_key: Jobs with the same key that are queued, running or done are reused.
+
+        Returns:
+            Tuple of (job_id, created), where created is False for a reused job.
+
+        Raises:
+            QueueFull: max_queued jobs are already waiting.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            if dedupe_key is not None:
+                row = db.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status != 'failed' ORDER BY created DESC LIMIT 1",
+                    (dedupe_key,)
+                ).fetchone()
+                if row is not None:
+                    self._counters['deduplicated'] += 1
+                    return row['id'], False
+
+            queued = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                raise QueueFull(f"{queued} jobs already queued (max {self.max_queued})")
+
+            job_id = uuid.uuid4().hex
+            db.execute(
+                "INSERT INTO jobs (id, kind, dedupe_key, status, params, input, created, updated) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, dedupe_key, json.dumps(params), sqlite3.Binary(data), now, now)
+            )
+            self._counters['submitted'] += 1
+
+        if self._wake is not None:
+            # submit() may run on a worker thread; wake the pool from its own loop
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return job_id, True
+
+    def claim(self) -> dict | None:
+        """
+        Mark the oldest queued job as running and return it with its input (None if idle).
+
+        Running jobs whose heartbeat is older than stale_seconds are queued again first.
+        """
+        with self._transaction() as db:
+            requeued, failed = self._requeue_running(db, time.time() - self.stale_seconds)
+            row = db.execute(
+                "SELECT id, kind, params, input, attempts FROM jobs WHERE status = 'queued' "
+                "ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (time.time(), row['id'])
+                )
+        if requeued or failed:
+            logger.warning(f"Job queue requeued {requeued} job(s) of a dead worker, failed {failed}")
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'params': json.loads(row['params']),
+            'input': bytes(row['input']),
+            'attempts': row['attempts'] + 1,
+        }
+
+    def heartbeat(self, job_id: str):
+        """Mark a running job as still being worked on."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET updated = ? WHERE id = ? AND status = 'running'", (time.time(), job_id)
+            )
+
+    def complete(self, job_id: str, result: bytes, meta: dict):
+        """Store a job's result and drop its input."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'done', input = NULL, result = ?, result_meta = ?, updated = ? WHERE id = ?",
+                (sqlite3.Binary(result), json.dumps(meta), time.time(), job_id)
+            )
+            self._counters['completed'] += 1
+
+    def fail(self, job_id: str, error: str, retry: bool):
+        """Requeue a job (retry and attempts left) or mark it failed."""
+        with self._lock:
+            row = self._db.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            if retry and row['attempts'] < self.max_attempts:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, updated = ? WHERE id = ?",
+                    (error, time.time(), job_id)
+                )
+                self._counters['retried'] += 1
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', input = NULL, error = ?, updated = ? WHERE id = ?",
+                    (error, time.time(), job_id)
+                )
+                self._counters['failed'] += 1
+
+    def get(self, job_id: str, with_result: bool = False) -> dict | None:
+        """
+        Look up a job.
+
+        Returns:
+            Dict with id, kind, status, params, meta, error, attempts, created, updated
+            (plus result bytes when with_result and the job is done), or None if unknown.
+        """
+        columns = _INFO_COLUMNS + (", result" if with_result else "")
+        with self._lock:
+            row = self._db.execute(f"SELECT {columns} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            'id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'params': json.loads(row['params']),
+            'meta': json.loads(row['result_meta']) if row['result_meta'] else None,
+            'error': row['error'],
+            'attempts': row['attempts'],
+            'created': row['created'],
+            'updated': row['updated'],
+        }
+        if with_result:
+            job['result'] = bytes(row['result']) if row['result'] is not None else None
+        return job
+
+    def purge(self) -> int:
+        """Delete finished jobs past the retention age or beyond max_retained (oldest first)."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?", (cutoff,)
+            ).rowcount
+            removed += self._db.execute(
+                "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE status IN ('done', 'failed') "
+                "ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                (self.max_retained,)
+            ).rowcount
+        self._last_purge = time.time()
+        if removed:
+            logger.info(f"Job queue purged {removed} finished job(s)")
+        return removed
+
+    def stats(self) -> dict:
+        """Jobs per state plus submit / completion counters."""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+            counters = dict(self._counters)
+        by_status = {row['status']: row['n'] for row in rows}
+        return {
+            'workers': len(self._tasks),
+            **{status: by_status.get(status, 0) for status in ('queued', 'running', 'done', 'failed')},
+            **counters,
+        }
+
+    # --- Workers ---
+
+    def start(self, handler, workers: int = 1):
+        """
+        Start the worker pool on the running event loop.
+
+        Args:
+            handler: Coroutine function taking a claimed job dict and returning
+                     (result_bytes, meta_dict). Raise JobFailed for permanent failures.
+            workers: Number of jobs processed concurrently.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(handler), name=f"job-worker-{i}")
+            for i in range(max(1, workers))
+        ]
+        logger.info(f"Job queue started with {len(self._tasks)} worker(s) ({self.db_path})")
+
+    async def stop(self):
+        """Cancel the workers; a job they were running is requeued on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, handler):
+        while True:
+            self._wake.clear()
+            job = await asyncio.to_thread(self.claim)
+            if job is None:
+                if time.time() - self._last_purge > 60:
+                    await asyncio.to_thread(self.purge)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            logger.info(f"Running {job['kind']} job {job['id']} (attempt {job['attempts']})")
+            heartbeat = asyncio.create_task(self._heartbeat(job['id']))
+            try:
+                result, meta = await handler(job)
+            except asyncio.CancelledError:
+                raise
+            except JobFailed as e:
+                await asyncio.to_thread(self.fail, job['id'], str(e), False)
+            except Exception as e:
+                logger.error(f"Job {job['id']} failed: {e}")
+                await asyncio.to_thread(self.fail, job['id'], str(e), True)
+            else:
+                await asyncio.to_thread(self.complete, job['id'], result, meta)
+            finally:
+                heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str):
+        """Refresh a running job well within stale_seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.stale_seconds / 4)
+            await asyncio.to_thread(self.heartbeat, job_id)
@@ -0,0 +1,274 @@
+"""
+Metrics Module
+
+Minimal Prometheus-style metrics (counters, gauges, histograms) rendered in the text
+exposition format for GET /metrics. No extra dependency: an observation is a bisect
+into a fixed bucket list and a few integer updates under a lock, cheap enough to leave
+on in the hot path.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds: 1 ms .. 2 min (model stages on CPU can be slow)
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+# Encoded output sizes in bytes: 16 KB .. 32 MB
+SIZE_BUCKETS = (
+    16 * 1024, 64 * 1024, 128 * 1024, 256 * 1024, 512 * 1024,
+    1024 ** 2, 2 * 1024 ** 2, 4 * 1024 ** 2, 8 * 1024 ** 2, 16 * 1024 ** 2, 32 * 1024 ** 2,
+)
+
+# Face crop sharpness (variance of the Laplacian, see upscale_policy.py)
+SHARPNESS_BUCKETS = (10, 25, 50, 75, 100, 150, 200, 300, 500, 1000, 2000)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class: a named metric family with a fixed set of label names."""
+
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _labels_of(self, key: tuple) -> dict:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines += self._render_samples()
+        return lines
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self._labels_of(key))} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in fixed cumulative buckets."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the with-block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+
+        lines = []
+        for key, counts, total, count in items:
+            labels = self._labels_of(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, 'le': _format_value(float(bound))})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Registry:
+    """Holds metric families plus collectors that export existing stats dicts."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_stats(self, prefix: str, stats_fn, label: str = None):
+        """
+        Export a component's stats() dict as gauges.
+
+        Numeric values become `<prefix>_<key>`. One level of nested dicts becomes
+        `<prefix>_<inner_key>{<label>="<outer_key>"}` (e.g. per OCR variant counters).
+
+        Args:
+            prefix: Metric name prefix (e.g. 'ai_executor').
+            stats_fn: Callable returning the stats dict (or None to export nothing).
+            label: Label name used for nested dict keys.
+        """
+        with self._lock:
+            self._collectors.append((prefix, stats_fn, label))
+
+    def _collect_stats(self) -> list[str]:
+        families = {}
+        for prefix, stats_fn, label in self._collectors:
+            stats = stats_fn() or {}
+            for key, value in stats.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    families.setdefault(f"{prefix}_{key}", []).append(({}, value))
+                elif isinstance(value, dict) and label:
+                    for outer, inner in value.items():
+                        if not isinstance(inner, dict):
+                            continue
+                        for inner_key, inner_value in inner.items():
+                            if isinstance(inner_value, (int, float)):
+                                families.setdefault(f"{prefix}_{inner_key}", []).append(
+                                    ({label: outer}, inner_value)
+                                )
+
+        lines = []
+        for name, samples in families.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines += [f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples]
+        return lines
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        lines += self._collect_stats()
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# --- Service metrics ---
+
+REQUESTS = Counter(
+    'ai_requests_total',
+    'HTTP requests by endpoint and outcome (success or status code).',
+    ('endpoint', 'outcome')
+)
+IN_FLIGHT = Gauge(
+    'ai_requests_in_flight',
+    'HTTP requests currently being processed.'
+)
+STAGE_SECONDS = Histogram(
+    'ai_stage_duration_seconds',
+    'Latency of pipeline stages (decode, face_detect, upscale, plate_detect, encode).',
+    ('stage',)
+)
+OCR_VARIANT_SECONDS = Histogram(
+    'ai_ocr_variant_duration_seconds',
+    'Latency of plate OCR per preprocessing variant (a batched call is split evenly across its variants).',
+    ('variant', 'call')
+)
+FACE_DETECTIONS = Counter(
+    'ai_face_detections_total',
+    'Face detector runs by backend and outcome (found / none).',
+    ('backend', 'outcome')
+)
+MODEL_LOAD_SECONDS = Gauge(
+    'ai_model_load_seconds',
+    'Time taken to load each model.',
+    ('model',)
+)
+ENCODE_SECONDS = Histogram(
+    'ai_encode_duration_seconds',
+    'Latency of encoding upscaled faces by output format (including any resize to the max side).',
+    ('format',)
+)
+OUTPUT_BYTES = Histogram(
+    'ai_output_bytes',
+    'Size of encoded upscaled faces by output format.',
+    ('format',),
+    buckets=SIZE_BUCKETS
+)
+UPSCALE_DECISIONS = Counter(
+    'ai_upscale_decisions_total',
+    'Upscale policy decisions per face crop (skip / 2x / 4x).',
+    ('mode',)
+)
+FACE_SHARPNESS = Histogram(
+    'ai_face_sharpness',
+    'Sharpness (variance of the Laplacian) of face crops by upscale decision.',
+    ('mode',),
+    buckets=SHARPNESS_BUCKETS
+)
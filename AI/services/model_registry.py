@@ -0,0 +1,145 @@
+"""
+Model Registry Module
+
+Defers heavy imports and model construction until they are needed, so the server can
+bind its port in seconds. Each model is wrapped in a LazyModel that loads on first use
+or in a background startup thread, and reports its load state for GET /ready.
+"""
+
+import logging
+import threading
+import time
+
+from services.metrics import MODEL_LOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class LazyModel:
+    """
+    A model (or setup step) constructed at most once, on demand.
+
+    get() loads in the calling thread if nobody has started yet, otherwise waits
+    for the load in progress. A failed load stays failed, like the previous
+    module-level `detector = None` pattern.
+    """
+
+    def __init__(self, name: str, loader, depends_on: list['LazyModel'] = ()):
+        """
+        Args:
+            name: Name shown in /ready and the startup breakdown.
+            loader: Zero-argument callable returning the model (raises on failure).
+            depends_on: Models / steps that must be loaded first (e.g. weight downloads).
+        """
+        self.name = name
+        self.loader = loader
+        self.depends_on = list(depends_on)
+
+        self.state = PENDING
+        self.error = None
+        self.load_seconds = None
+        self._value = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def get(self):
+        """
+        Return the loaded model, loading it first if needed.
+
+        Returns:
+            The model, or None if loading failed.
+        """
+        with self._lock:
+            should_load = self.state == PENDING
+            if should_load:
+                self.state = LOADING
+
+        if not should_load:
+            self._done.wait()
+            return self._value
+
+        for dependency in self.depends_on:
+            dependency.get()
+
+        logger.info(f"Loading {self.name}...")
+        start = time.perf_counter()
+        try:
+            value = self.loader()
+            state, error = READY, None
+            logger.info(f"{self.name} loaded in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            value, state, error = None, FAILED, str(e)
+            logger.error(f"Failed to load {self.name}: {e}")
+
+        with self._lock:
+            self._value = value
+            self.state = state
+            self.error = error
+            self.load_seconds = round(time.perf_counter() - start, 3)
+        MODEL_LOAD_SECONDS.set(self.load_seconds, model=self.name)
+        self._done.set()
+        return value
+
+    def peek(self):
+        """Return the model if it is already loaded, without triggering a load."""
+        return self._value if self.state == READY else None
+
+    def status(self) -> dict:
+        """Load state, load time and error (if any)."""
+        return {
+            'state': self.state,
+            'load_seconds': self.load_seconds,
+            'error': self.error,
+        }
+
+
+_models = {}
+
+
+def register(name: str, loader, depends_on: list[LazyModel] = ()) -> LazyModel:
+    """Create and register a LazyModel under name."""
+    model = LazyModel(name, loader, depends_on)
+    _models[name] = model
+    return model
+
+
+def load_all():
+    """Load every registered model in registration order (blocking)."""
+    for model in list(_models.values()):
+        model.get()
+
+
+def load_all_async() -> threading.Thread:
+    """Load every registered model on a background thread and log the startup breakdown."""
+    def run():
+        start = time.perf_counter()
+        load_all()
+        log_breakdown(time.perf_counter() - start)
+
+    thread = threading.Thread(target=run, name='model-loader', daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    """Whether every registered model loaded successfully."""
+    return all(model.state == READY for model in _models.values())
+
+
+def readiness() -> dict:
+    """Per-model load state for GET /ready."""
+    return {name: model.status() for name, model in _models.items()}
+
+
+def log_breakdown(total_seconds: float):
+    """Log how long each model took to load."""
+    logger.info("Model loading breakdown:")
+    for name, model in _models.items():
+        seconds = f"{model.load_seconds:.2f}s" if model.load_seconds is not None else "-"
+        logger.info(f"  {name:<20} {model.state:<8} {seconds}")
+    logger.info(f"  {'total':<20} {'':<8} {total_seconds:.2f}s")
@@ -0,0 +1,135 @@
+"""
+Near-Duplicate Index Module
+
+Recognizes re-encoded, resized or recompressed copies of recently processed images.
+
+Reports about the same incident often carry different copies of one photo (forwarded
+through a chat app, resized, saved again), so the result cache, keyed on the exact
+bytes, misses them. Each processed image gets a 64-bit perceptual hash (DCT hash of a
+32x32 grayscale thumbnail); a later upload whose hash differs in only a few bits is
+treated as the same photo and answered with the earlier cached result.
+
+The index is a fixed-size ring buffer: hashes sit in one uint64 array, so a lookup is a
+vectorized XOR + popcount over every entry, and the oldest entry is overwritten when full.
+"""
+
+import logging
+import threading
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Thumbnail side the DCT runs on, and side of the low-frequency block kept (8 x 8 = 64 bits)
+THUMBNAIL_SIDE = 32
+HASH_SIDE = 8
+HASH_BITS = HASH_SIDE * HASH_SIDE
+
+# Set bits per byte value, for NumPy versions without np.bitwise_count
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def perceptual_hash(image: np.ndarray) -> int:
+    """
+    64-bit DCT hash of an image (stable under re-encoding, resizing and mild color changes).
+
+    Args:
+        image: BGR, BGRA or grayscale image.
+
+    Returns:
+        The hash as an unsigned 64-bit integer.
+    """
+    # Shrink before converting so a large upload is only read once
+    thumbnail = cv2.resize(image, (THUMBNAIL_SIDE, THUMBNAIL_SIDE), interpolation=cv2.INTER_AREA)
+    if thumbnail.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if thumbnail.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        thumbnail = cv2.cvtColor(thumbnail, code)
+
+    low = cv2.dct(np.float32(thumbnail))[:HASH_SIDE, :HASH_SIDE].flatten()
+    # The DC term (overall brightness) is left out of the median
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming_distances(hashes: np.ndarray, image_hash: int) -> np.ndarray:
+    """Number of differing bits between every hash in a uint64 array and one hash."""
+    differences = np.bitwise_xor(hashes, np.uint64(image_hash))
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(differences)
+    return _POPCOUNT[differences.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class NearDuplicateIndex:
+    """
+    Bounded index of (perceptual hash, namespace, result key) entries.
+
+    The namespace keeps results of different endpoints and options apart (a face
+    encoded as PNG is not the answer to a WebP request); the result key is the
+    ResultCache key the earlier result was stored under.
+    """
+
+    def __init__(self, capacity: int = 4096, max_distance: int = 4):
+        """
+        Args:
+            capacity: Entries kept; the oldest is overwritten beyond it.
+            max_distance: Largest Hamming distance (of 64 bits) counted as a match.
+        """
+        self.capacity = max(1, capacity)
+        self.max_distance = max_distance
+
+        self._lock = threading.Lock()
+        self._hashes = np.zeros(self.capacity, dtype=np.uint64)
+        self._namespaces = np.zeros(self.capacity, dtype=np.int32)
+        self._keys = [None] * self.capacity
+        self._namespace_ids = {}
+        self._size = 0
+        self._next = 0
+        self._counters = {'added': 0, 'matches': 0, 'misses': 0}
+
+    def add(self, image_hash: int, namespace: str, key: str):
+        """Record the result key of a processed image (overwriting the oldest entry when full)."""
+        with self._lock:
+            namespace_id = self._namespace_ids.setdefault(namespace, len(self._namespace_ids))
+            self._hashes[self._next] = image_hash
+            self._namespaces[self._next] = namespace_id
+            self._keys[self._next] = key
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self._counters['added'] += 1
+
+    def find(self, image_hash: int, namespace: str, max_distance: int | None = None) -> tuple[str, int] | None:
+        """
+        Look up the closest earlier image in a namespace.
+
+        Args:
+            image_hash: perceptual_hash() of the new image.
+            namespace: Namespace the earlier result was added under.
+            max_distance: Stricter limit for this lookup (None = the index's max_distance).
+
+        Returns:
+            Tuple of (result key, Hamming distance) for the closest entry within
+            max_distance, or None.
+        """
+        max_distance = self.max_distance if max_distance is None else max_distance
+        with self._lock:
+            namespace_id = self._namespace_ids.get(namespace)
+            if namespace_id is not None and self._size:
+                distances = hamming_distances(self._hashes[:self._size], image_hash).astype(np.int32)
+                distances[self._namespaces[:self._size] != namespace_id] = HASH_BITS + 1
+                index = int(np.argmin(distances))
+                distance = int(distances[index])
+                if distance <= max_distance:
+                    self._counters['matches'] += 1
+                    return self._keys[index], distance
+            self._counters['misses'] += 1
+            return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': self._size,
+                'capacity': self.capacity,
+                'max_distance': self.max_distance,
+                **self._counters,
+            }
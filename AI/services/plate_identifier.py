@@ -5,12 +5,21 @@ Provides car plate detection using YOLOv8n and text extraction using EasyOCR.
 Used to identify vehicle plates from images submitted in reports for enforcement purposes.
 """
 
+import bisect
+import itertools
 import logging
 import os
+import re
+import threading
+import time
+from typing import Iterable
 import cv2
 import numpy as np
-from ultralytics import YOLO
-import easyocr
+
+from services import config
+from services.batching import MicroBatcher
+from services.metrics import MODEL_LOAD_SECONDS, OCR_VARIANT_SECONDS, STAGE_SECONDS
+from services.plate_tracking import PlateTracker, consensus
 
 # Configure logging
 logging.basicConfig(
@@ -19,6 +28,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# OCR preprocessing variants built by _build_variants (default order)
+OCR_VARIANTS = ("normal_gray", "inverted_gray", "normal_thresh", "inverted_thresh")
+
+# Formatted Malaysian plate: letter prefix, 1-4 digits, optional letter suffix
+WELL_FORMED_PLATE = re.compile(r'^[A-Z]{1,3} [0-9]{1,4}( [A-Z]{1,2})?$')
+
+# Recognizer mode line splitting (see _split_rows): crops wider than this (width / height)
+# are always one line; a text row has at least this ink fraction; a line of characters is
+# at least this fraction of the crop height
+TWO_ROW_MAX_ASPECT = 4.0
+TEXT_ROW_MIN_INK = 0.1
+LINE_MIN_HEIGHT = 0.15
+
 
 class CarPlateIdentifier:
     """
@@ -31,30 +53,63 @@ class CarPlateIdentifier:
         Initialize the CarPlateIdentifier with YOLO model and EasyOCR.
         
         Args:
-            model_path: Path to the YOLOv8n trained weights. If None, uses default path.
+            model_path: Path to the YOLOv8n trained weights or an exported model. If None,
+                uses the weights of config.PLATE_DETECTOR_BACKEND (see config.plate_detector_weights).
         """
+        # Imported here so the API can start before PyTorch / Ultralytics are loaded
+        from ultralytics import YOLO
+        import easyocr
+        
         # Set default model path if not provided
         if model_path is None:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            ai_dir = os.path.dirname(script_dir)
-            model_path = os.path.join(ai_dir, 'models', 'Yolov8n', 'train', 'weights', 'best.pt')
+            model_path = config.plate_detector_weights()
         
         logger.info(f"Loading YOLO model from: {model_path}")
         
         if not os.path.exists(model_path):
+            if model_path != config.PLATE_YOLO_WEIGHTS:
+                logger.error("Export the plate detector first: uv run python export_plate_detector.py")
             raise FileNotFoundError(f"YOLO model not found at: {model_path}")
         
         try:
-            self.model = YOLO(model_path)
+            load_start = time.perf_counter()
+            # Exported graphs (ONNX / OpenVINO) do not record their task; CPU inference
+            # goes through ONNX Runtime / OpenVINO instead of PyTorch
+            self.model = YOLO(model_path, task='detect')
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - load_start, model='yolo')
+            # Ultralytics predictors are not thread-safe; serialize calls from the executor
+            self._model_lock = threading.Lock()
             logger.info("YOLO model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {e}")
             raise
         
+        # Batch detections from concurrent requests into one forward pass.
+        # Ultralytics only letterboxes a batch like a single image when every image
+        # shares its shape, so batches are grouped by shape to keep results identical.
+        self._batcher = None
+        if config.PLATE_BATCH_MAX_SIZE > 1:
+            self._batcher = MicroBatcher(
+                self._detect_plate_batch,
+                max_batch_size=config.PLATE_BATCH_MAX_SIZE,
+                max_wait_ms=config.PLATE_BATCH_WAIT_MS,
+                key_fn=lambda image: image.shape,
+                name='plate-batcher'
+            )
+        
+        # Per-variant OCR counters driving early exit ordering (see _order_variants)
+        self._variant_lock = threading.Lock()
+        self._variant_counts = {
+            name: {'runs': 0, 'wins': 0, 'skips': 0} for name in OCR_VARIANTS
+        }
+        self._early_exits = 0
+        
         # Initialize EasyOCR for English text recognition
         logger.info("Initializing EasyOCR...")
         try:
+            load_start = time.perf_counter()
             self.reader = easyocr.Reader(['en'], gpu=True)
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - load_start, model='easyocr')
             logger.info("EasyOCR initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize EasyOCR: {e}")
@@ -75,6 +130,19 @@ class CarPlateIdentifier:
         # Step 1: Detect plate using YOLO
         detections = self._detect_plate(image)
         
+        return self.identify_from_detections(image, detections)
+    
+    def identify_from_detections(self, image: np.ndarray, detections: list[dict]) -> tuple[str | None, float | None]:
+        """
+        Read the plate text of an image whose YOLO detections are already known.
+        
+        Args:
+            image: Input image as a NumPy array (BGR format from OpenCV)
+            detections: Detections of the image (from _detect_plate, detect_plate_async or detect_plates)
+            
+        Returns:
+            Tuple of (plate_text, confidence) or (None, None) if no plate detected
+        """
         if not detections:
             logger.warning("No car plate detected in the image")
             return None, None
@@ -96,25 +164,169 @@ class CarPlateIdentifier:
         
         return plate_text, ocr_confidence
     
+    def identify_plates(
+        self,
+        image: np.ndarray,
+        min_confidence: float = None,
+        max_plates: int = None,
+        detections: list[dict] = None
+    ) -> list[dict]:
+        """
+        Identify every car plate in an image (carparks, roadside photos).
+        
+        All detections above the threshold are cropped and their OCR variants are read
+        together in batched EasyOCR calls, so cost grows sub-linearly with plate count.
+        
+        Args:
+            image: Input image as a NumPy array (BGR format from OpenCV)
+            min_confidence: Minimum YOLO confidence. If None, uses config.PLATE_MIN_DETECTION_CONFIDENCE.
+            max_plates: Keep at most this many detections (most confident first). If None, uses config.PLATE_MAX_PLATES.
+            detections: YOLO detections of the image if already known (e.g. from detect_plate_async).
+            
+        Returns:
+            List of {'plate', 'box', 'detector_confidence', 'ocr_confidence'}, most confident
+            detection first; 'plate' and 'ocr_confidence' are None where OCR found nothing
+        """
+        logger.info("Starting multi-plate identification...")
+        
+        if min_confidence is None:
+            min_confidence = config.PLATE_MIN_DETECTION_CONFIDENCE
+        if max_plates is None:
+            max_plates = config.PLATE_MAX_PLATES
+        
+        if detections is None:
+            detections = self._detect_plate(image)
+        detections = [d for d in detections if d['confidence'] >= min_confidence]
+        detections.sort(key=lambda d: d['confidence'], reverse=True)
+        detections = detections[:max_plates]
+        
+        if not detections:
+            logger.warning("No car plate detected in the image")
+            return []
+        
+        crops = [self._crop_plate(image, detection['box']) for detection in detections]
+        readings = self._process_and_ocr_many(crops)
+        
+        plates = []
+        for detection, (plate_text, ocr_confidence) in zip(detections, readings):
+            plates.append({
+                'plate': plate_text,
+                'box': detection['box'],
+                'detector_confidence': detection['confidence'],
+                'ocr_confidence': ocr_confidence
+            })
+        
+        logger.info(f"Identified {sum(1 for p in plates if p['plate'])} of {len(plates)} plate(s)")
+        return plates
+    
+    def identify_tracks(
+        self,
+        frames: Iterable[np.ndarray],
+        min_confidence: float = None
+    ) -> tuple[list[dict], int]:
+        """
+        Identify the plates of a short clip or burst: one reading per tracked vehicle.
+        
+        Frames are detected in batched YOLO passes of PLATE_BATCH_MAX_SIZE and linked into
+        tracks by box overlap (see plate_tracking.PlateTracker). OCR runs only on the
+        PLATE_TRACK_OCR_CROPS sharpest crops of each track, all read together in batched
+        EasyOCR calls at the end, and each track's plate is the consensus of its readings.
+        
+        Args:
+            frames: BGR frames in capture order, consumed a batch at a time (a generator
+                keeps a long clip out of memory)
+            min_confidence: Minimum YOLO confidence. If None, uses config.PLATE_MIN_DETECTION_CONFIDENCE.
+            
+        Returns:
+            Tuple of (tracks, frames processed). Each track is {'track_id', 'plate', 'confidence',
+            'votes', 'readings', 'frames', 'first_frame', 'last_frame', 'box', 'detector_confidence'},
+            longest track first; tracks seen in fewer than PLATE_TRACK_MIN_FRAMES frames are dropped
+        """
+        if min_confidence is None:
+            min_confidence = config.PLATE_MIN_DETECTION_CONFIDENCE
+        
+        tracker = PlateTracker(
+            iou_threshold=config.PLATE_TRACK_IOU,
+            max_gap=config.PLATE_TRACK_MAX_GAP,
+            crops_per_track=config.PLATE_TRACK_OCR_CROPS
+        )
+        chunk_size = max(1, config.PLATE_BATCH_MAX_SIZE)
+        frames = iter(frames)
+        count = 0
+        while True:
+            chunk = list(itertools.islice(frames, chunk_size))
+            if not chunk:
+                break
+            for frame, detections in zip(chunk, self.detect_plates(chunk)):
+                detections = [d for d in detections if d['confidence'] >= min_confidence]
+                crops = [self._crop_plate(frame, d['box']) for d in detections]
+                tracker.update(count, detections, crops)
+                count += 1
+        
+        tracks = tracker.tracks(min_frames=min(config.PLATE_TRACK_MIN_FRAMES, count))
+        logger.info(f"Tracked {len(tracks)} plate(s) over {count} frame(s)")
+        
+        crops = [crop for track in tracks for crop in track['crops']]
+        readings = iter(self._process_and_ocr_many(crops) if crops else [])
+        
+        results = []
+        for track in tracks:
+            track_readings = list(itertools.islice(readings, len(track['crops'])))
+            plate_text, ocr_confidence, votes = consensus(track_readings, WELL_FORMED_PLATE)
+            results.append({
+                'track_id': track['track_id'],
+                'plate': plate_text,
+                'confidence': ocr_confidence,
+                'votes': votes,
+                'readings': len(track_readings),
+                'frames': track['frames'],
+                'first_frame': track['first_frame'],
+                'last_frame': track['last_frame'],
+                'box': track['box'],
+                'detector_confidence': track['detector_confidence'],
+            })
+        return results, count
+    
     def _detect_plate(self, image: np.ndarray) -> list[dict]:
         """
         Detect car plates in the image using YOLO.
+        
+        Goes through the micro-batcher when enabled, so concurrent requests share a forward pass.
         """
         logger.info("Running YOLO detection...")
         
         try:
-            results = self.model(image, verbose=False)
-            detections = []
+            with STAGE_SECONDS.time(stage='plate_detect'):
+                if self._batcher is not None:
+                    detections = self._batcher.submit(image)
+                else:
+                    detections = self._detect_plate_batch([image])[0]
             
-            for result in results:
-                boxes = result.boxes.cpu().numpy()
-                for box in boxes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    confidence = float(box.conf[0])
-                    detections.append({
-                        'box': (x1, y1, x2, y2),
-                        'confidence': confidence
-                    })
+            logger.info(f"Found {len(detections)} plate(s)")
+            return detections
+            
+        except Exception as e:
+            logger.error(f"YOLO detection failed: {e}")
+            return []
+    
+    @property
+    def batching(self) -> bool:
+        """True when single-image detections go through the micro-batcher."""
+        return self._batcher is not None
+    
+    async def detect_plate_async(self, image: np.ndarray) -> list[dict]:
+        """
+        Detect car plates through the micro-batcher from the event loop.
+        
+        The request awaits its batch without holding an inference executor thread, so a
+        batch can gather more concurrent requests than the executor has threads. Only
+        valid when batching is enabled; otherwise run detect_plates on the executor.
+        """
+        logger.info("Running YOLO detection...")
+        
+        try:
+            with STAGE_SECONDS.time(stage='plate_detect'):
+                detections = await self._batcher.submit_async(image)
             
             logger.info(f"Found {len(detections)} plate(s)")
             return detections
@@ -123,6 +335,72 @@ class CarPlateIdentifier:
             logger.error(f"YOLO detection failed: {e}")
             return []
     
+    def detect_plates(self, images: list[np.ndarray]) -> list[list[dict]]:
+        """
+        Detect plates in many images with batched YOLO forward passes (bulk requests).
+        
+        Images are grouped by shape (so each gets exactly its single-image detections)
+        and run in chunks of at most PLATE_BATCH_MAX_SIZE.
+        
+        Args:
+            images: BGR images
+            
+        Returns:
+            One list of detections per input image, in the same order
+        """
+        by_shape = {}
+        for index, image in enumerate(images):
+            by_shape.setdefault(image.shape, []).append(index)
+        
+        chunk_size = max(1, config.PLATE_BATCH_MAX_SIZE)
+        batch_detections = [[] for _ in images]
+        for indices in by_shape.values():
+            for start in range(0, len(indices), chunk_size):
+                chunk = indices[start:start + chunk_size]
+                logger.info(f"Running batched YOLO detection on {len(chunk)} image(s)...")
+                try:
+                    with STAGE_SECONDS.time(stage='plate_detect'):
+                        results = self._detect_plate_batch([images[i] for i in chunk])
+                except Exception as e:
+                    logger.error(f"YOLO detection failed: {e}")
+                    continue
+                for index, detections in zip(chunk, results):
+                    batch_detections[index] = detections
+        
+        return batch_detections
+    
+    def _detect_plate_batch(self, images: list[np.ndarray]) -> list[list[dict]]:
+        """
+        Run one batched YOLO forward pass over several images.
+        
+        Args:
+            images: BGR images (same shape for results identical to single-image calls)
+            
+        Returns:
+            One list of detections per input image, in the same order
+        """
+        with self._model_lock:
+            results = self.model(images, verbose=False)
+        
+        batch_detections = []
+        for result in results:
+            detections = []
+            boxes = result.boxes.cpu().numpy()
+            for box in boxes:
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                confidence = float(box.conf[0])
+                detections.append({
+                    'box': (x1, y1, x2, y2),
+                    'confidence': confidence
+                })
+            batch_detections.append(detections)
+        
+        return batch_detections
+    
+    def batch_stats(self) -> dict | None:
+        """Micro-batching figures of the YOLO detector (None when batching is disabled)."""
+        return self._batcher.stats() if self._batcher is not None else None
+    
     def _crop_plate(self, image: np.ndarray, box: tuple, padding: int = 15) -> np.ndarray:
         """
         Crop the plate region from the image with padding.
@@ -200,6 +478,229 @@ class CarPlateIdentifier:
         """
         logger.info("Processing plate crop with dual-mode OCR...")
         
+        all_images = self._build_variants(crop)
+        if config.PLATE_OCR_ADAPTIVE_ORDER:
+            all_images = self._order_variants(all_images)
+        
+        ran, skipped = self._run_variants(all_images)
+        
+        best_result = None
+        best_name = None
+        best_confidence = 0.0
+        
+        for name, result in ran:
+            if result[0] is not None and result[1] is not None:
+                logger.info(f"  {name}: '{result[0]}' (conf: {result[1]:.2f})")
+                if result[1] > best_confidence:
+                    best_result = result
+                    best_name = name
+                    best_confidence = result[1]
+            else:
+                logger.info(f"  {name}: no result")
+        
+        self._record_variants([name for name, _ in ran], best_name, skipped)
+        
+        if best_result:
+            logger.info(f"Best result: '{best_result[0]}' (confidence: {best_result[1]:.2f})")
+            return best_result
+        
+        return None, None
+    
+    def _process_and_ocr_many(self, crops: list[np.ndarray]) -> list[tuple[str | None, float | None]]:
+        """
+        OCR several plate crops together.
+        
+        Like _process_and_ocr, but each round reads the variants of every still-unread
+        crop in one batched call: with early exit the first round tries each crop's best
+        variant, and only crops without an accepted result go on to the rest.
+        
+        Args:
+            crops: Cropped plate images (BGR)
+            
+        Returns:
+            One (best_text, confidence) per crop, (None, None) where OCR failed
+        """
+        logger.info(f"Processing {len(crops)} plate crop(s) with batched OCR...")
+        
+        early_exit = config.PLATE_OCR_EARLY_EXIT
+        remaining = []
+        for crop in crops:
+            variants = self._build_variants(crop)
+            if config.PLATE_OCR_ADAPTIVE_ORDER:
+                variants = self._order_variants(variants)
+            remaining.append(variants)
+        ran = [[] for _ in crops]
+        skipped = [[] for _ in crops]
+        
+        first_round = True
+        while any(remaining):
+            # (crop index, variant name, image) for this round
+            chunk = []
+            for index, variants in enumerate(remaining):
+                take = variants[:1] if early_exit and first_round else variants
+                chunk += [(index, name, img) for name, img in take]
+                remaining[index] = variants[len(take):]
+            first_round = False
+            
+            logger.info(f"Running batched OCR on {len(chunk)} variants of {len({c[0] for c in chunk})} plate(s)...")
+            if config.PLATE_OCR_BATCHED:
+                start = time.perf_counter()
+                results = self._run_ocr_batched([img for _, _, img in chunk])
+                self._observe_variants([name for _, name, _ in chunk], time.perf_counter() - start)
+            else:
+                results = []
+                for _, name, img in chunk:
+                    with OCR_VARIANT_SECONDS.time(variant=name, call='single'):
+                        results.append(self._run_ocr_single(img))
+            
+            for (index, name, _), result in zip(chunk, results):
+                ran[index].append((name, result))
+            
+            if early_exit:
+                for index, variants in enumerate(remaining):
+                    if variants and any(self._is_accepted(result) for _, result in ran[index]):
+                        logger.info(f"Early exit for plate {index}: skipping {', '.join(name for name, _ in variants)}")
+                        skipped[index] = [name for name, _ in variants]
+                        remaining[index] = []
+        
+        readings = []
+        for results, skipped_names in zip(ran, skipped):
+            best_name, best_result = None, (None, None)
+            for name, result in results:
+                if result[0] is not None and result[1] is not None and result[1] > (best_result[1] or 0.0):
+                    best_name, best_result = name, result
+            self._record_variants([name for name, _ in results], best_name, skipped_names)
+            readings.append(best_result)
+        
+        return readings
+    
+    def _pad_to_common_shape(self, images: list[np.ndarray]) -> list[np.ndarray]:
+        """
+        Pad grayscale images to the largest height / width so one batched call can read them.
+        
+        The padding is the median border value of each image, so it reads as empty plate
+        background rather than an edge.
+        """
+        height = max(img.shape[0] for img in images)
+        width = max(img.shape[1] for img in images)
+        padded = []
+        for img in images:
+            if img.shape[:2] == (height, width):
+                padded.append(img)
+                continue
+            border = np.concatenate([img[0], img[-1], img[:, 0], img[:, -1]])
+            padded.append(cv2.copyMakeBorder(
+                img, 0, height - img.shape[0], 0, width - img.shape[1],
+                cv2.BORDER_CONSTANT, value=int(np.median(border))
+            ))
+        return padded
+    
+    def _run_variants(self, all_images: list[tuple[str, np.ndarray]]) -> tuple[list, list[str]]:
+        """
+        Run OCR over the variants in order, stopping early once a result is good enough.
+        
+        With early exit enabled the first variant runs alone; if it is not accepted the
+        rest run together (batched) or one by one (unbatched), checking after each step.
+        
+        Args:
+            all_images: List of (variant_name, image) in the order to try them
+            
+        Returns:
+            Tuple of ([(variant_name, (text, confidence)), ...] for variants that ran,
+            [variant_name, ...] for variants skipped by early exit)
+        """
+        early_exit = config.PLATE_OCR_EARLY_EXIT
+        ran = []
+        remaining = list(all_images)
+        
+        while remaining:
+            if config.PLATE_OCR_BATCHED and not (early_exit and not ran):
+                # One batched text-detection pass over every remaining variant
+                chunk, remaining = remaining, []
+                logger.info(f"Running batched OCR on {len(chunk)} variants...")
+                start = time.perf_counter()
+                results = self._run_ocr_batched([img for _, img in chunk])
+                self._observe_variants([name for name, _ in chunk], time.perf_counter() - start)
+            else:
+                chunk, remaining = remaining[:1], remaining[1:]
+                logger.info(f"Running OCR on {chunk[0][0]}...")
+                with OCR_VARIANT_SECONDS.time(variant=chunk[0][0], call='single'):
+                    results = [self._run_ocr_single(chunk[0][1])]
+            
+            ran.extend((name, result) for (name, _), result in zip(chunk, results))
+            
+            if early_exit and remaining and any(self._is_accepted(result) for _, result in ran):
+                logger.info(f"Early exit: skipping {', '.join(name for name, _ in remaining)}")
+                break
+        
+        return ran, [name for name, _ in remaining]
+    
+    def _observe_variants(self, names: list[str], seconds: float):
+        """Record a batched OCR call's latency per variant, split evenly across the variants it read."""
+        share = seconds / len(names)
+        for name in names:
+            OCR_VARIANT_SECONDS.observe(share, variant=name, call='batched')
+    
+    def _is_accepted(self, result: tuple[str | None, float | None]) -> bool:
+        """Whether an OCR result is confident and well-formed enough to stop trying variants."""
+        text, confidence = result
+        if text is None or confidence is None:
+            return False
+        return (
+            confidence >= config.PLATE_OCR_EARLY_EXIT_CONFIDENCE
+            and WELL_FORMED_PLATE.match(text) is not None
+        )
+    
+    def _order_variants(self, all_images: list[tuple[str, np.ndarray]]) -> list[tuple[str, np.ndarray]]:
+        """
+        Order variants by their historical win rate (best first).
+        
+        The win rate is smoothed as (wins + 1) / (runs + 2), so rarely-run variants are
+        not starved and ties keep the default order.
+        """
+        with self._variant_lock:
+            rates = {
+                name: (counts['wins'] + 1) / (counts['runs'] + 2)
+                for name, counts in self._variant_counts.items()
+            }
+        return sorted(all_images, key=lambda item: -rates.get(item[0], 0.0))
+    
+    def _record_variants(self, ran: list[str], winner: str | None, skipped: list[str]):
+        """Update per-variant run / win / skip counters."""
+        with self._variant_lock:
+            for name in ran:
+                self._variant_counts[name]['runs'] += 1
+            for name in skipped:
+                self._variant_counts[name]['skips'] += 1
+            if winner is not None:
+                self._variant_counts[winner]['wins'] += 1
+            if skipped:
+                self._early_exits += 1
+    
+    def variant_stats(self) -> dict:
+        """Per-variant OCR counters (runs, wins, skips, win rate) and the early-exit count."""
+        with self._variant_lock:
+            return {
+                'early_exits': self._early_exits,
+                'variants': {
+                    name: {
+                        **counts,
+                        'win_rate': round(counts['wins'] / counts['runs'], 4) if counts['runs'] else 0.0
+                    }
+                    for name, counts in self._variant_counts.items()
+                }
+            }
+    
+    def _build_variants(self, crop: np.ndarray) -> list[tuple[str, np.ndarray]]:
+        """
+        Build the preprocessed OCR variants of a plate crop.
+        
+        Args:
+            crop: Cropped plate image (BGR)
+            
+        Returns:
+            List of (variant_name, grayscale_image), all of the same size
+        """
         # Convert to grayscale
         gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
         
@@ -225,33 +726,40 @@ class CarPlateIdentifier:
         )
         
         # Also try the raw grayscale images (sometimes works better)
-        all_images = [
+        return [
             ("normal_gray", gray),
             ("inverted_gray", inverted),
             ("normal_thresh", thresh_normal),
             ("inverted_thresh", thresh_inverted),
         ]
+    
+    def _run_ocr_batched(self, images: list[np.ndarray]) -> list[tuple[str | None, float | None]]:
+        """
+        Run EasyOCR on several images with one batched text-detection pass.
         
-        best_result = None
-        best_confidence = 0.0
-        
-        for name, img in all_images:
-            logger.info(f"Running OCR on {name}...")
-            result = self._run_ocr_single(img)
+        Args:
+            images: Preprocessed images (grayscale); mixed sizes are padded to a common shape
             
-            if result[0] is not None and result[1] is not None:
-                logger.info(f"  {name}: '{result[0]}' (conf: {result[1]:.2f})")
-                if result[1] > best_confidence:
-                    best_result = result
-                    best_confidence = result[1]
-            else:
-                logger.info(f"  {name}: no result")
+        Returns:
+            One (text, confidence) tuple per image, (None, None) where OCR found nothing
+        """
+        if config.PLATE_OCR_MODE == 'recognizer':
+            return self._run_recognizer(images)
         
-        if best_result:
-            logger.info(f"Best result: '{best_result[0]}' (confidence: {best_result[1]:.2f})")
-            return best_result
+        if len({img.shape for img in images}) > 1:
+            # readtext_batched stacks its inputs
+            images = self._pad_to_common_shape(images)
         
-        return None, None
+        try:
+            batch_results = self.reader.readtext_batched(
+                images,
+                batch_size=config.PLATE_OCR_RECOGNIZER_BATCH_SIZE
+            )
+            return [self._parse_ocr_results(results) for results in batch_results]
+            
+        except Exception as e:
+            logger.debug(f"Batched OCR failed: {e}")
+            return [(None, None)] * len(images)
     
     def _run_ocr_single(self, image: np.ndarray) -> tuple[str | None, float | None]:
         """
@@ -263,42 +771,143 @@ class CarPlateIdentifier:
         Returns:
             Tuple of (best_text, confidence) or (None, None) if OCR fails
         """
+        if config.PLATE_OCR_MODE == 'recognizer':
+            return self._run_recognizer([image])[0]
+        
         try:
             # Run OCR - EasyOCR returns list of (bbox, text, confidence)
             results = self.reader.readtext(image)
+            return self._parse_ocr_results(results)
             
-            if not results:
-                return None, None
-            
-            # Filter and collect all results with bbox info for sorting
-            valid_results = []
-            for (bbox, text, confidence) in results:
-                # Filter out very low confidence results
-                if confidence > 0.1:
-                    valid_results.append((bbox, text, confidence))
-            
-            if not valid_results:
-                return None, None
-            
-            # Sort by horizontal position (left to right) using bbox x-coordinate
-            # bbox format: [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-            valid_results.sort(key=lambda x: x[0][0][0])
-            
-            # Combine all text segments
-            combined_text = ''.join(text.strip() for (bbox, text, confidence) in valid_results)
-            avg_confidence = sum(conf for (bbox, text, conf) in valid_results) / len(valid_results)
-            
-            # Clean up (remove spaces and special characters, keep alphanumeric)
-            cleaned_text = ''.join(c for c in combined_text.upper() if c.isalnum())
+        except Exception as e:
+            logger.debug(f"OCR failed: {e}")
+            return None, None
+    
+    def _run_recognizer(self, images: list[np.ndarray]) -> list[tuple[str | None, float | None]]:
+        """
+        Run EasyOCR's recognizer alone on plate crops, skipping CRAFT text detection.
+        
+        YOLO has already boxed the plate, so each image is read as one text line (two
+        for a two-row plate, see _split_rows). The images are stacked into one canvas so
+        a single recognize() call reads every line in batches, decoding only the
+        characters in config.PLATE_OCR_ALLOWLIST.
+        
+        Args:
+            images: Preprocessed images (grayscale, any sizes)
             
-            # Format as Malaysian plate (letters space digits space suffix)
-            formatted_plate = self._format_malaysian_plate(cleaned_text)
+        Returns:
+            One (text, confidence) tuple per image, (None, None) where OCR found nothing
+        """
+        width = max(img.shape[1] for img in images)
+        tops = []
+        boxes = []
+        rows = []
+        top = 0
+        for img in images:
+            tops.append(top)
+            # EasyOCR horizontal boxes are [x_min, x_max, y_min, y_max]
+            boxes += [[0, img.shape[1], top + y1, top + y2] for y1, y2 in self._split_rows(img)]
+            if img.shape[1] < width:
+                # Outside every box, so never read
+                img = cv2.copyMakeBorder(img, 0, 0, 0, width - img.shape[1], cv2.BORDER_CONSTANT, value=0)
+            rows.append(img)
+            top += img.shape[0]
+        canvas = rows[0] if len(rows) == 1 else np.vstack(rows)
+        
+        try:
+            results = self.reader.recognize(
+                canvas,
+                horizontal_list=boxes,
+                free_list=[],
+                batch_size=config.PLATE_OCR_RECOGNIZER_BATCH_SIZE,
+                allowlist=config.PLATE_OCR_ALLOWLIST or None
+            )
+        except Exception as e:
+            logger.debug(f"Recognizer OCR failed: {e}")
+            return [(None, None)] * len(images)
+        
+        per_image = [[] for _ in images]
+        for bbox, text, confidence in results:
+            # Map each line back to its image by the line's top edge
+            per_image[bisect.bisect_right(tops, bbox[0][1]) - 1].append((bbox, text, confidence))
+        return [self._parse_ocr_results(lines, by_row=True) for lines in per_image]
+    
+    def _split_rows(self, image: np.ndarray) -> list[tuple[int, int]]:
+        """
+        Row ranges (y1, y2) of the text lines of a plate crop.
+        
+        Rows holding enough ink (in an Otsu-binarized copy) form runs; runs at least
+        LINE_MIN_HEIGHT of the crop tall are lines of characters, while plate borders and
+        bolts are too thin to count. Exactly two lines (e.g. `WXY` over `1234`) split the
+        crop halfway between them; anything else is read as one line.
+        
+        Args:
+            image: Preprocessed plate image (grayscale)
             
-            return formatted_plate, avg_confidence
+        Returns:
+            One or two (y1, y2) ranges covering the whole crop height
+        """
+        height, width = image.shape[:2]
+        whole = [(0, height)]
+        if width > height * TWO_ROW_MAX_ASPECT:
+            return whole
+        
+        _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Characters are the minority class, whichever their polarity
+        if cv2.countNonZero(binary) > binary.size // 2:
+            binary = cv2.bitwise_not(binary)
+        is_text = np.count_nonzero(binary, axis=1) >= width * TEXT_ROW_MIN_INK
+        
+        # Start / end row of every run of text rows
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], is_text.astype(np.int8), [0]))))
+        lines = [(start, end) for start, end in edges.reshape(-1, 2) if end - start >= height * LINE_MIN_HEIGHT]
+        if len(lines) != 2:
+            return whole
+        split = int(lines[0][1] + lines[1][0]) // 2
+        return [(0, split), (split, height)]
+    
+    def _parse_ocr_results(self, results: list, by_row: bool = False) -> tuple[str | None, float | None]:
+        """
+        Combine EasyOCR (bbox, text, confidence) segments into one formatted plate.
+        
+        Args:
+            results: EasyOCR output for one image
+            by_row: Segments are whole text lines (recognizer mode): read them top to bottom
             
-        except Exception as e:
-            logger.debug(f"OCR failed: {e}")
+        Returns:
+            Tuple of (formatted_plate, average_confidence) or (None, None) if nothing usable
+        """
+        if not results:
             return None, None
+        
+        # Filter and collect all results with bbox info for sorting
+        valid_results = []
+        for (bbox, text, confidence) in results:
+            # Filter out very low confidence results
+            if confidence > 0.1:
+                valid_results.append((bbox, text, confidence))
+        
+        if not valid_results:
+            return None, None
+        
+        # Sort by horizontal position (left to right) using bbox x-coordinate
+        # bbox format: [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
+        if by_row:
+            valid_results.sort(key=lambda x: (x[0][0][1], x[0][0][0]))
+        else:
+            valid_results.sort(key=lambda x: x[0][0][0])
+        
+        # Combine all text segments
+        combined_text = ''.join(text.strip() for (bbox, text, confidence) in valid_results)
+        avg_confidence = sum(conf for (bbox, text, conf) in valid_results) / len(valid_results)
+        
+        # Clean up (remove spaces and special characters, keep alphanumeric)
+        cleaned_text = ''.join(c for c in combined_text.upper() if c.isalnum())
+        
+        # Format as Malaysian plate (letters space digits space suffix)
+        formatted_plate = self._format_malaysian_plate(cleaned_text)
+        
+        return formatted_plate, avg_confidence
 
 
 # For testing purposes
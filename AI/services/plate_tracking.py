@@ -0,0 +1,218 @@
+"""
+Plate Tracking Module
+
+Frame sampling and plate tracking for short clips and image bursts (POST /plate/video).
+
+Reporters on the road often capture a few seconds of video or a burst of stills instead
+of one sharp photo. Reading every plate in every frame would repeat the OCR dozens of
+times per vehicle. Instead, detections are linked across frames into tracks by box
+overlap, each track keeps only its sharpest few crops, and the readings of those crops
+are combined into one consensus plate per vehicle.
+"""
+
+import heapq
+import logging
+import re
+from typing import Iterator
+
+import cv2
+import numpy as np
+
+from services.metrics import STAGE_SECONDS
+from services.upscale_policy import measure_sharpness
+
+logger = logging.getLogger(__name__)
+
+# Frame rate assumed when a container does not report a usable one
+DEFAULT_VIDEO_FPS = 30.0
+
+
+def open_video(path: str) -> cv2.VideoCapture | None:
+    """Open a video file for sampling (None if OpenCV cannot read it)."""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        capture.release()
+        return None
+    return capture
+
+
+def sample_frames(capture: cv2.VideoCapture, sample_fps: float, max_frames: int) -> Iterator[np.ndarray]:
+    """
+    Yield about sample_fps frames per second of video, at most max_frames.
+
+    Skipped frames are only grabbed (demuxed), never converted to BGR arrays, and
+    frames are yielded one at a time so a clip is never held in memory. The capture
+    is released once the generator finishes.
+    """
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        if not fps or fps != fps or fps > 240:
+            fps = DEFAULT_VIDEO_FPS
+        step = max(1, round(fps / sample_fps))
+
+        index = sampled = 0
+        while sampled < max_frames and capture.grab():
+            if index % step == 0:
+                with STAGE_SECONDS.time(stage='frame_decode'):
+                    ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                sampled += 1
+                yield frame
+            index += 1
+        logger.info(f"Sampled {sampled} frame(s), one every {step} at {fps:.1f} fps")
+    finally:
+        capture.release()
+
+
+def box_iou(a: tuple, b: tuple) -> float:
+    """Intersection over union of two (x1, y1, x2, y2) boxes."""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class PlateTracker:
+    """
+    Links plate detections across consecutive frames by box overlap.
+
+    Each frame's detections are matched greedily (highest IoU first) to the tracks seen
+    within the last max_gap frames; unmatched detections start new tracks. A track keeps
+    the crops_per_track sharpest crops (variance of the Laplacian) for OCR.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_gap: int = 5, crops_per_track: int = 3):
+        """
+        Args:
+            iou_threshold: Minimum overlap between a detection and a track's last box.
+            max_gap: Frames a track may go undetected and still be extended.
+            crops_per_track: Sharpest crops kept per track.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_gap = max_gap
+        self.crops_per_track = max(1, crops_per_track)
+        self._tracks = []
+        # Tie-breaker for crops of equal sharpness in the heaps
+        self._sequence = 0
+
+    def update(self, frame_index: int, detections: list[dict], crops: list[np.ndarray]):
+        """
+        Add one frame's detections.
+
+        Args:
+            frame_index: Position of the frame in the clip (increasing).
+            detections: {'box', 'confidence'} dicts of the frame.
+            crops: The plate crop of each detection (views are copied only if kept).
+        """
+        active = [t for t in self._tracks if frame_index - t['last_frame'] <= self.max_gap]
+        pairs = sorted(
+            (
+                (box_iou(track['box'], detection['box']), t, d)
+                for t, track in enumerate(active)
+                for d, detection in enumerate(detections)
+            ),
+            key=lambda pair: pair[0],
+            reverse=True
+        )
+
+        matched_tracks, matched_detections = set(), set()
+        for overlap, t, d in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_detections:
+                continue
+            matched_tracks.add(t)
+            matched_detections.add(d)
+            self._extend(active[t], frame_index, detections[d], crops[d])
+
+        for d, detection in enumerate(detections):
+            if d not in matched_detections:
+                track = {
+                    'track_id': len(self._tracks),
+                    'first_frame': frame_index,
+                    'frames': 0,
+                    'detector_confidence': 0.0,
+                    'crops': [],
+                }
+                self._tracks.append(track)
+                self._extend(track, frame_index, detection, crops[d])
+
+    def _extend(self, track: dict, frame_index: int, detection: dict, crop: np.ndarray):
+        track['box'] = detection['box']
+        track['last_frame'] = frame_index
+        track['frames'] += 1
+        if detection['confidence'] >= track['detector_confidence']:
+            track['best_box'] = detection['box']
+            track['detector_confidence'] = detection['confidence']
+
+        if crop.size == 0:
+            return
+        sharpness = measure_sharpness(crop)
+        heap = track['crops']
+        if len(heap) < self.crops_per_track:
+            heapq.heappush(heap, (sharpness, self._sequence, crop.copy()))
+        elif sharpness > heap[0][0]:
+            heapq.heapreplace(heap, (sharpness, self._sequence, crop.copy()))
+        self._sequence += 1
+
+    def tracks(self, min_frames: int = 1) -> list[dict]:
+        """
+        Tracks detected in at least min_frames frames, longest first.
+
+        Returns:
+            List of {'track_id', 'first_frame', 'last_frame', 'frames', 'box',
+            'detector_confidence', 'crops', 'sharpness'} with 'box' the most confident
+            detection and 'crops' sharpest first
+        """
+        tracks = []
+        for track in self._tracks:
+            if track['frames'] < min_frames:
+                continue
+            kept = sorted(track['crops'], key=lambda item: item[0], reverse=True)
+            tracks.append({
+                'track_id': track['track_id'],
+                'first_frame': track['first_frame'],
+                'last_frame': track['last_frame'],
+                'frames': track['frames'],
+                'box': track['best_box'],
+                'detector_confidence': track['detector_confidence'],
+                'crops': [crop for _, _, crop in kept],
+                'sharpness': [round(sharpness, 1) for sharpness, _, _ in kept],
+            })
+        tracks.sort(key=lambda t: (-t['frames'], t['first_frame']))
+        return tracks
+
+
+def consensus(
+    readings: list[tuple[str | None, float | None]],
+    well_formed: re.Pattern | None = None
+) -> tuple[str | None, float | None, int]:
+    """
+    Vote one plate from the OCR readings of a track's crops.
+
+    Identical texts pool their confidences; the highest total wins. When well_formed is
+    given, texts matching it beat any that do not (a misread usually breaks the format).
+
+    Returns:
+        Tuple of (plate, mean confidence of its readings, number of agreeing readings),
+        or (None, None, 0) when nothing was read.
+    """
+    totals = {}
+    for text, confidence in readings:
+        if text and confidence is not None:
+            total = totals.setdefault(text, [0.0, 0])
+            total[0] += confidence
+            total[1] += 1
+    if not totals:
+        return None, None, 0
+
+    candidates = list(totals)
+    if well_formed is not None:
+        candidates = [text for text in candidates if well_formed.match(text)] or candidates
+    plate = max(candidates, key=lambda text: (totals[text][0], totals[text][1]))
+    score, votes = totals[plate]
+    return plate, score / votes, votes
@@ -0,0 +1,265 @@
+"""
+Result Cache Module
+
+Content-addressed cache for /face and /plate results, keyed by a hash of the uploaded
+bytes plus the model/config version. Resubmitted photos and retried uploads are answered
+without touching the models.
+
+Two tiers:
+1. In-memory LRU bounded by entry count and total bytes
+2. Optional on-disk store with a TTL and size-based eviction (oldest first)
+
+Handlers use the *_async methods: hashing a large upload and the disk tier's file I/O
+run in a worker thread instead of on the event loop.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Uploads smaller than this are hashed on the event loop (a thread hop would cost more)
+_INLINE_HASH_BYTES = 64 * 1024
+
+
+class ResultCache:
+    """
+    Two-tier (memory LRU + optional disk) cache of encoded results.
+
+    Values are opaque bytes (an encoded JPEG, a serialized PlateResponse, ...).
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_memory_bytes: int,
+        disk_dir: str | None = None,
+        disk_ttl_seconds: float = 86400,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        """
+        Args:
+            max_entries: Maximum number of entries kept in memory.
+            max_memory_bytes: Maximum total size of values kept in memory.
+            disk_dir: Directory of the disk tier, or None to disable it.
+            disk_ttl_seconds: Age after which disk entries are treated as expired.
+            disk_max_bytes: Maximum total size of the disk tier.
+        """
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+
+        # key -> (size, mtime) of files in the disk tier, oldest write first, so expiry and
+        # size eviction only look at the front instead of scanning every entry
+        self._disk_index = OrderedDict()
+        self._disk_bytes = 0
+
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'puts': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+            'disk_expired': 0,
+        }
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    @staticmethod
+    def make_key(data: bytes, namespace: str, version: str) -> str:
+        """
+        Build a cache key from the uploaded bytes, the endpoint namespace and a version string.
+
+        Args:
+            data: Raw uploaded bytes.
+            namespace: Endpoint / result kind (e.g. 'face', 'plate').
+            version: Model + config version the result depends on.
+
+        Returns:
+            Hex digest used as the cache key.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{namespace}:{version}:".encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    @staticmethod
+    async def make_key_async(data: bytes, namespace: str, version: str) -> str:
+        """make_key() in a worker thread (blake2b releases the GIL while hashing large inputs)."""
+        if len(data) < _INLINE_HASH_BYTES:
+            return ResultCache.make_key(data, namespace, version)
+        return await asyncio.to_thread(ResultCache.make_key, data, namespace, version)
+
+    # --- Memory tier ---
+
+    def _memory_put(self, key: str, value: bytes):
+        """Insert into the LRU and evict least-recently-used entries over the bounds (lock held)."""
+        if len(value) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = value
+        self._memory_bytes += len(value)
+
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters['memory_evictions'] += 1
+
+    # --- Disk tier ---
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.bin")
+
+    def _scan_disk(self):
+        """Rebuild the disk index from the cache directory (startup)."""
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith('.bin'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((name[:-4], (st.st_size, st.st_mtime)))
+        for key, entry in sorted(entries, key=lambda item: item[1][1]):
+            self._disk_index[key] = entry
+            self._disk_bytes += entry[0]
+        logger.info(f"Result cache disk tier: {len(self._disk_index)} entries, {self._disk_bytes} bytes")
+        self._disk_evict()
+
+    def _disk_remove(self, key: str):
+        """Delete a disk entry and drop it from the index (lock held)."""
+        size, _ = self._disk_index.pop(key, (0, 0))
+        self._disk_bytes -= size
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
+
+    def _disk_evict(self):
+        """Drop expired entries, then the oldest ones until under the size limit (lock held)."""
+        now = time.time()
+        while self._disk_index:
+            key, (_, mtime) = next(iter(self._disk_index.items()))
+            if now - mtime <= self.disk_ttl_seconds:
+                break
+            self._disk_remove(key)
+            self._counters['disk_expired'] += 1
+
+        while self._disk_bytes > self.disk_max_bytes and self._disk_index:
+            self._disk_remove(next(iter(self._disk_index)))
+            self._counters['disk_evictions'] += 1
+
+    def _disk_read(self, key: str) -> bytes | None:
+        """Read a disk entry if present and not expired (file I/O without the lock)."""
+        with self._lock:
+            entry = self._disk_index.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.disk_ttl_seconds:
+                self._disk_remove(key)
+                self._counters['disk_expired'] += 1
+                return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            # Evicted meanwhile, or removed behind our back
+            with self._lock:
+                if self._disk_index.get(key) == entry:
+                    self._disk_remove(key)
+            return None
+
+    def _disk_write(self, key: str, value: bytes):
+        """Write a disk entry atomically (without the lock), then index it and enforce the limits."""
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write result cache entry: {e}")
+            return
+
+        with self._lock:
+            old_size, _ = self._disk_index.pop(key, (0, 0))
+            self._disk_index[key] = (len(value), time.time())
+            self._disk_bytes += len(value) - old_size
+            self._disk_evict()
+
+    # --- Public API ---
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Look up a cached result (blocks on disk reads; see get_async).
+
+        Returns:
+            The cached bytes, or None on a miss.
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._counters['memory_hits'] += 1
+                return value
+
+        value = self._disk_read(key) if self.disk_dir else None
+        with self._lock:
+            if value is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['disk_hits'] += 1
+            self._memory_put(key, value)
+            return value
+
+    def put(self, key: str, value: bytes):
+        """Store a result in memory and (if enabled) on disk (blocks on the disk write; see put_async)."""
+        with self._lock:
+            self._counters['puts'] += 1
+            self._memory_put(key, value)
+        if self.disk_dir:
+            self._disk_write(key, value)
+
+    async def get_async(self, key: str) -> bytes | None:
+        """get() from the event loop; with a disk tier the lookup runs in a worker thread."""
+        if not self.disk_dir:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def put_async(self, key: str, value: bytes):
+        """put() from the event loop; with a disk tier the write runs in a worker thread."""
+        if not self.disk_dir:
+            self.put(key, value)
+            return
+        await asyncio.to_thread(self.put, key, value)
+
+    def stats(self) -> dict:
+        """Hit / miss / eviction counters and tier sizes."""
+        with self._lock:
+            return {
+                **self._counters,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk_index),
+                'disk_bytes': self._disk_bytes,
+            }
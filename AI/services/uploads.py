@@ -0,0 +1,429 @@
+"""
+Uploads Module
+
+Size-bounded ingestion of uploaded images.
+
+Uploads used to be read with one `await file.read()` and decoded whatever their size.
+Here the request body is capped before python-multipart parses (and spools) it, each
+file is streamed in chunks into a pooled, reused buffer, and the image dimensions are
+sniffed from the header so an over-limit image is rejected before anything is decoded.
+"""
+
+import logging
+import struct
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, UploadFile
+
+from services import config
+
+logger = logging.getLogger(__name__)
+
+# JPEG start-of-frame markers (carry the image size); C4, C8 and CC are not frames
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# JPEG markers without a length field
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD8} | set(range(0xD0, 0xD8))
+
+
+class UploadTooLarge(HTTPException):
+    """
+    Raised while receiving a request body that exceeds its byte limit.
+
+    An HTTPException, so FastAPI's form parsing passes it through as a 413 instead of
+    turning it into a 400 "error parsing the body".
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Request body too large (max {limit} bytes).")
+
+
+def sniff_dimensions(header: bytes | memoryview) -> tuple[int, int] | None:
+    """
+    Read the image size from the start of an encoded image without decoding it.
+
+    Understands JPEG, PNG, WebP, GIF, BMP, TIFF and PNM (PBM / PGM / PPM) headers.
+
+    Args:
+        header: Leading bytes of the file.
+
+    Returns:
+        (width, height), or None if the format is unknown or the header is incomplete.
+    """
+    data = bytes(header[:32])
+
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:4] == b'GIF8' and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data[:2] == b'BM' and len(data) >= 26:
+        width, height = struct.unpack('<ii', data[18:26])
+        return abs(width), abs(height)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return None
+    if data[:2] == b'\xff\xd8':
+        return _sniff_jpeg(header)
+    if data[:4] in (b'II*\x00', b'MM\x00*'):
+        return _sniff_tiff(header)
+    if data[:1] == b'P' and data[1:2] in b'123456' and len(data) >= 3 and data[2:3].isspace():
+        return _sniff_pnm(header)
+    return None
+
+
+def _sniff_jpeg(data: bytes | memoryview) -> tuple[int, int] | None:
+    """Walk the JPEG marker segments up to the first start-of-frame."""
+    i = 2
+    length = len(data)
+    while i + 4 <= length:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 9 > length:
+                return None
+            height, width = struct.unpack('>HH', bytes(data[i + 5:i + 9]))
+            return width, height
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+
+def _sniff_tiff(data: bytes | memoryview) -> tuple[int, int] | None:
+    """Read ImageWidth / ImageLength from the first IFD of a (classic, not Big) TIFF."""
+    order = '<' if data[:2] == b'II' else '>'
+    offset = struct.unpack(order + 'I', bytes(data[4:8]))[0]
+    if offset + 2 > len(data):
+        return None
+    count = struct.unpack(order + 'H', bytes(data[offset:offset + 2]))[0]
+    size = {}
+    for entry in range(offset + 2, min(offset + 2 + 12 * count, len(data) - 11), 12):
+        tag, kind = struct.unpack(order + 'HH', bytes(data[entry:entry + 4]))
+        if tag in (256, 257):
+            # SHORT values sit in the first two bytes of the value field, LONG in all four
+            value = bytes(data[entry + 8:entry + 12])
+            size[tag] = struct.unpack(order + 'H', value[:2])[0] if kind == 3 else struct.unpack(order + 'I', value)[0]
+    if 256 in size and 257 in size:
+        return size[256], size[257]
+    return None
+
+
+def _sniff_pnm(data: bytes | memoryview) -> tuple[int, int] | None:
+    """Read width and height from a PNM header (whitespace-separated, # comments)."""
+    fields = []
+    for line in bytes(data[2:1024]).split(b'\n'):
+        fields += line.split(b'#')[0].split()
+        if len(fields) >= 2:
+            break
+    if len(fields) < 2 or not (fields[0].isdigit() and fields[1].isdigit()):
+        return None
+    return int(fields[0]), int(fields[1])
+
+
+class BufferPool:
+    """
+    Reusable upload buffers.
+
+    Buffers grow (doubling) up to the largest upload they have held and are kept for
+    the next request, so steady-state ingestion does not allocate. At most max_buffers
+    are kept; extra concurrent uploads get a throwaway buffer.
+
+    A bytearray cannot be resized while a memoryview of it is alive. If a pooled buffer
+    is still exported when it needs to grow (an array from a cancelled decode, say), the
+    upload moves to a new buffer instead and the pool keeps that one.
+    """
+
+    def __init__(self, max_buffers: int, initial_bytes: int):
+        """
+        Args:
+            max_buffers: Number of buffers kept between requests.
+            initial_bytes: Size each pooled buffer is preallocated with.
+        """
+        self.max_buffers = max(0, max_buffers)
+        self.initial_bytes = max(1, initial_bytes)
+        self._lock = threading.Lock()
+        self._free = [bytearray(self.initial_bytes) for _ in range(self.max_buffers)]
+        self._counters = {'acquired': 0, 'reused': 0, 'grown': 0, 'replaced': 0}
+
+    def acquire(self) -> bytearray:
+        with self._lock:
+            self._counters['acquired'] += 1
+            if self._free:
+                self._counters['reused'] += 1
+                return self._free.pop()
+        return bytearray(self.initial_bytes)
+
+    def release(self, buffer: bytearray):
+        with self._lock:
+            if len(self._free) < self.max_buffers:
+                self._free.append(buffer)
+
+    def grow(self, buffer: bytearray, needed: int, limit: int) -> bytearray:
+        """
+        Enlarge a buffer to hold at least needed bytes (capped at limit).
+
+        Returns:
+            The buffer, resized in place, or a larger copy if the buffer still has
+            exported views and cannot be resized.
+        """
+        size = len(buffer)
+        while size < needed:
+            size *= 2
+        size = min(max(size, needed), limit)
+        try:
+            buffer.extend(bytes(size - len(buffer)))
+            replaced = False
+        except BufferError:
+            replacement = bytearray(size)
+            replacement[:len(buffer)] = buffer
+            buffer = replacement
+            replaced = True
+        with self._lock:
+            self._counters['grown'] += 1
+            self._counters['replaced'] += replaced
+        return buffer
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                'free': len(self._free),
+                'pooled_bytes': sum(len(buffer) for buffer in self._free),
+            }
+
+
+class UploadReader:
+    """Streams UploadFiles into pooled buffers, enforcing byte and pixel limits."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_pixels: int,
+        chunk_bytes: int = 64 * 1024,
+        sniff_bytes: int = 256 * 1024,
+        pool: BufferPool | None = None,
+    ):
+        """
+        Args:
+            max_bytes: Largest accepted file.
+            max_pixels: Largest accepted width x height (0 = no limit).
+            chunk_bytes: Bytes read from the upload per step.
+            sniff_bytes: How far into the file the image size is looked for.
+            pool: Buffer pool to read into.
+        """
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.chunk_bytes = max(1, chunk_bytes)
+        self.sniff_bytes = sniff_bytes
+        self.pool = pool or BufferPool(max_buffers=2, initial_bytes=1024 * 1024)
+        self._lock = threading.Lock()
+        self._counters = {'accepted': 0, 'rejected_bytes': 0, 'rejected_pixels': 0, 'rejected_format': 0}
+
+    def _reject(self, reason: str, detail: str, status_code: int = 413):
+        with self._lock:
+            self._counters[reason] += 1
+        raise HTTPException(status_code=status_code, detail=detail)
+
+    def _check_pixels(self, dimensions: tuple[int, int]):
+        width, height = dimensions
+        if self.max_pixels and width * height > self.max_pixels:
+            self._reject(
+                'rejected_pixels',
+                f"Image too large: {width}x{height} pixels (max {self.max_pixels} pixels)."
+            )
+
+    @asynccontextmanager
+    async def open(self, file: UploadFile):
+        """
+        Read an upload into a pooled buffer.
+
+        Yields a memoryview of the file's bytes. The view is released when the
+        with-block exits (using it afterwards raises ValueError), so copy anything
+        needed later, e.g. with bytes(view). Raises HTTPException(413) as soon as the
+        file exceeds max_bytes or its header reports more than max_pixels.
+
+        With max_pixels set, a file whose size cannot be read from its header (a format
+        sniff_dimensions does not know, such as JPEG 2000) is refused with 415 rather
+        than handed to a decoder that would allocate whatever the file declares.
+        """
+        if file.size is not None and file.size > self.max_bytes:
+            self._reject('rejected_bytes', f"File too large: {file.size} bytes (max {self.max_bytes} bytes).")
+
+        buffer = self.pool.acquire()
+        view = None
+        try:
+            length = 0
+            dimensions = None
+            while True:
+                chunk = await file.read(self.chunk_bytes)
+                if not chunk:
+                    break
+                end = length + len(chunk)
+                if end > self.max_bytes:
+                    self._reject('rejected_bytes', f"File too large (max {self.max_bytes} bytes).")
+                if end > len(buffer):
+                    buffer = self.pool.grow(buffer, end, self.max_bytes)
+                buffer[length:end] = chunk
+                length = end
+
+                # Reject oversized images from their header instead of after decoding
+                if dimensions is None and length - len(chunk) < self.sniff_bytes:
+                    dimensions = sniff_dimensions(memoryview(buffer)[:length])
+                    if dimensions is not None:
+                        self._check_pixels(dimensions)
+
+            if self.max_pixels and dimensions is None:
+                # A JPEG whose frame header sits behind large metadata is still found here
+                dimensions = sniff_dimensions(memoryview(buffer)[:length])
+                if dimensions is None:
+                    self._reject(
+                        'rejected_format',
+                        "Unsupported image format (use JPEG, PNG, WebP, GIF, BMP, TIFF or PNM).",
+                        status_code=415
+                    )
+                self._check_pixels(dimensions)
+
+            with self._lock:
+                self._counters['accepted'] += 1
+            view = memoryview(buffer)[:length]
+            yield view
+        finally:
+            if view is not None:
+                try:
+                    view.release()
+                except BufferError:
+                    # Still exported by a consumer of the view; grow() copes with that
+                    pass
+            self.pool.release(buffer)
+
+    async def save(self, file: UploadFile, target, max_bytes: int) -> int:
+        """
+        Stream an upload that is not an image (e.g. a video) into a writable binary file.
+
+        Returns the number of bytes written. Raises HTTPException(413) as soon as the
+        file exceeds max_bytes.
+        """
+        if file.size is not None and file.size > max_bytes:
+            self._reject('rejected_bytes', f"File too large: {file.size} bytes (max {max_bytes} bytes).")
+
+        length = 0
+        while True:
+            chunk = await file.read(self.chunk_bytes)
+            if not chunk:
+                break
+            length += len(chunk)
+            if length > max_bytes:
+                self._reject('rejected_bytes', f"File too large (max {max_bytes} bytes).")
+            target.write(chunk)
+
+        with self._lock:
+            self._counters['accepted'] += 1
+        return length
+
+    async def read_bytes(self, file: UploadFile) -> bytes:
+        """Read an upload with the same limits, returning a standalone copy of its bytes."""
+        async with self.open(file) as view:
+            return bytes(view)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        buffers = {f"buffer_{key}": value for key, value in self.pool.stats().items()}
+        return {**counters, **buffers}
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware rejecting request bodies over a per-path limit with 413.
+
+    Runs before the form is parsed, so an oversized upload is refused from its
+    Content-Length header, or cut off once the streamed body passes the limit, instead
+    of being spooled to a temporary file by python-multipart first.
+    """
+
+    def __init__(self, app, limit_for_path):
+        """
+        Args:
+            app: The wrapped ASGI app.
+            limit_for_path: Callable mapping a request path to its byte limit (None = unlimited).
+        """
+        self.app = app
+        self.limit_for_path = limit_for_path
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for_path(scope['path'])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get('headers', []):
+            if name == b'content-length':
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > limit:
+                    await self._send_too_large(send, limit)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    raise UploadTooLarge(limit)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except UploadTooLarge:
+            if response_started:
+                raise
+            await self._send_too_large(send, limit)
+
+    @staticmethod
+    async def _send_too_large(send, limit: int):
+        body = f'{{"detail":"Request body too large (max {limit} bytes)."}}'.encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+upload_reader = UploadReader(
+    max_bytes=config.UPLOAD_MAX_BYTES,
+    max_pixels=config.UPLOAD_MAX_PIXELS,
+    chunk_bytes=config.UPLOAD_CHUNK_BYTES,
+    pool=BufferPool(max_buffers=config.UPLOAD_BUFFER_POOL_SIZE, initial_bytes=config.UPLOAD_BUFFER_INITIAL_BYTES),
+)
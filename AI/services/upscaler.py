@@ -0,0 +1,396 @@
+"""
+Upscaler Module
+
+Keeps a Real-ESRGAN (RealESRGAN_x4plus) network resident in memory and runs it
+directly on NumPy arrays, so a face upscale needs no subprocess and no temporary files.
+
+Large crops can be upscaled in overlapping tiles that run in parallel on a thread pool.
+Seams are blended with linear feathering across the overlap. With the default 16 px
+overlap the tiled output stays within TILED_MAX_MEAN_ABS_ERROR (8-bit gray levels,
+mean absolute difference) of the untiled result; a larger overlap tightens it further.
+tests/test_upscaler.py and the upscale stage of benchmarks/bench_pipeline.py check it.
+
+The process-wide PyTorch thread count is not set here but by whoever starts the
+service (AI_TORCH_THREADS, or serve.py per worker).
+"""
+
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from services import config
+
+logger = logging.getLogger(__name__)
+
+# Documented tolerance of tiled vs. untiled output (mean absolute error, 8-bit levels)
+TILED_MAX_MEAN_ABS_ERROR = 1.0
+
+# Rough peak activation footprint of RRDBNet x4 per *input* pixel in float32:
+# up to three 64-channel feature maps are alive at the 4x output resolution.
+_BYTES_PER_INPUT_PIXEL = 4 * 64 * 16 * 3
+
+# Tiles are never shrunk below this edge length when fitting the memory ceiling
+_MIN_TILE_SIZE = 32
+
+
+def _ensure_basicsr_compat():
+    """
+    Alias torchvision.transforms.functional_tensor for basicsr 1.4.2.
+
+    basicsr imports that module at package import, but torchvision >= 0.17
+    (the lock pins 0.19) only ships torchvision.transforms.functional.
+    """
+    try:
+        import torchvision.transforms.functional_tensor  # noqa: F401
+    except ImportError:
+        import torchvision.transforms.functional as functional
+        sys.modules['torchvision.transforms.functional_tensor'] = functional
+
+
+class MemoryBudget:
+    """
+    Shared ceiling for estimated model activation memory.
+
+    Each forward pass reserves its estimated footprint and blocks until it fits,
+    so concurrent requests and parallel tiles together never exceed the limit.
+    """
+
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        self.used_bytes = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes: int):
+        """Reserve nbytes for the duration of the with-block."""
+        # A single reservation larger than the limit still runs, but alone
+        nbytes = min(nbytes, self.limit_bytes)
+        with self._cond:
+            self._cond.wait_for(lambda: self.used_bytes + nbytes <= self.limit_bytes)
+            self.used_bytes += nbytes
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.used_bytes -= nbytes
+                self._cond.notify_all()
+
+
+def _blend_ramp(length: int, head: int, tail: int) -> np.ndarray:
+    """
+    1-D feathering weights for one tile axis.
+
+    The first `head` and last `tail` pixels ramp linearly so that two
+    neighbouring tiles' weights sum to 1 over their shared region.
+    """
+    ramp = np.ones(length, dtype=np.float32)
+    if head:
+        ramp[:head] = (np.arange(head, dtype=np.float32) + 0.5) / head
+    if tail:
+        fade = (np.arange(tail, 0, -1, dtype=np.float32) - 0.5) / tail
+        ramp[-tail:] = np.minimum(ramp[-tail:], fade)
+    return ramp
+
+
+class RealESRGANUpscaler:
+    """
+    In-process Real-ESRGAN engine.
+
+    The RRDBNet weights are loaded once and kept on the selected device.
+    Each call converts the BGR image to a tensor, runs a single forward pass
+    and converts the result back to a BGR uint8 array.
+    """
+
+    def __init__(
+        self,
+        weights_path: str = None,
+        device: str = None,
+        half: bool = None,
+        tile_size: int = None,
+        tile_overlap: int = None,
+        workers: int = None,
+        max_memory_mb: int = None,
+    ):
+        """
+        Load the RealESRGAN_x4plus network.
+
+        Args:
+            weights_path: Path to RealESRGAN_x4plus.pth. If None, uses config.REALESRGAN_WEIGHTS.
+            device: Torch device string ('cpu', 'cuda', 'cuda:0', ...) or 'auto'.
+                    If None, uses config.UPSCALER_DEVICE.
+            half: Run in half precision (CUDA only). If None, uses config.UPSCALER_HALF.
+            tile_size: Tile edge length in input pixels; 0 disables tiling.
+                       If None, uses config.UPSCALER_TILE_SIZE.
+            tile_overlap: Overlap added on each tile side in input pixels.
+                          If None, uses config.UPSCALER_TILE_OVERLAP.
+            workers: Number of tiles processed in parallel. If None, uses config.UPSCALER_WORKERS.
+            max_memory_mb: Ceiling for estimated activation memory across all concurrent
+                           forward passes. If None, uses config.UPSCALER_MAX_MEMORY_MB.
+        """
+        import torch
+        _ensure_basicsr_compat()
+        from basicsr.archs.rrdbnet_arch import RRDBNet
+
+        weights_path = weights_path or config.REALESRGAN_WEIGHTS
+        device = device or config.UPSCALER_DEVICE
+        half = config.UPSCALER_HALF if half is None else half
+
+        if not os.path.exists(weights_path):
+            raise FileNotFoundError(f"Real-ESRGAN weights not found at: {weights_path}")
+
+        if device == 'auto':
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+
+        self._torch = torch
+        self.device = torch.device(device)
+        self.half = half and self.device.type == 'cuda'
+        self.scale = 4
+
+        logger.info(f"Loading Real-ESRGAN weights from: {weights_path} (device={self.device})")
+
+        # Same architecture as RealESRGAN_x4plus in inference_realesrgan.py
+        model = RRDBNet(num_in_ch=3, num_out_ch=3, num_feat=64, num_block=23, num_grow_ch=32, scale=4)
+        state = torch.load(weights_path, map_location='cpu', weights_only=True)
+        keyname = 'params_ema' if 'params_ema' in state else 'params'
+        model.load_state_dict(state[keyname], strict=True)
+        model.eval()
+        model = model.to(self.device)
+        if self.half:
+            model = model.half()
+
+        self.model = model
+        logger.info("Real-ESRGAN model loaded successfully")
+
+        self.tile_size = config.UPSCALER_TILE_SIZE if tile_size is None else tile_size
+        self.tile_overlap = config.UPSCALER_TILE_OVERLAP if tile_overlap is None else tile_overlap
+        self.workers = max(1, config.UPSCALER_WORKERS if workers is None else workers)
+        max_memory_mb = config.UPSCALER_MAX_MEMORY_MB if max_memory_mb is None else max_memory_mb
+        self.budget = MemoryBudget(max_memory_mb * 1024 * 1024)
+
+        self._pool = None
+        if self.workers > 1:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='upscale-tile')
+
+        logger.info(
+            f"Upscaler tiling: tile={self.tile_size}, overlap={self.tile_overlap}, "
+            f"workers={self.workers}, memory ceiling={max_memory_mb} MB"
+        )
+
+    def _to_tensor(self, image: np.ndarray):
+        """Convert a BGR uint8 image into a normalized 1x3xHxW RGB tensor on the model device."""
+        img = cv2.cvtColor(image, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+        tensor = self._torch.from_numpy(np.ascontiguousarray(img.transpose(2, 0, 1))).unsqueeze(0)
+        tensor = tensor.to(self.device)
+        return tensor.half() if self.half else tensor
+
+    def _forward(self, image: np.ndarray) -> np.ndarray:
+        """Run the network on a BGR uint8 image and return a float32 HxWx3 RGB image in [0, 1]."""
+        h, w = image.shape[:2]
+        with self.budget.reserve(self.estimate_bytes(h, w)):
+            with self._torch.inference_mode():
+                output = self.model(self._to_tensor(image))
+                return output[0].float().clamp_(0, 1).cpu().numpy().transpose(1, 2, 0)
+
+    def _forward_batch(self, images: list[np.ndarray]) -> list[np.ndarray]:
+        """
+        Run the network once on several BGR uint8 images.
+
+        Images are padded (edge reflection) to the largest height / width in the batch and
+        stacked; each output is cut back to its own 4x size.
+
+        Returns:
+            float32 HxWx3 RGB images in [0, 1], in input order.
+        """
+        height = max(image.shape[0] for image in images)
+        width = max(image.shape[1] for image in images)
+        padded = [
+            cv2.copyMakeBorder(image, 0, height - image.shape[0], 0, width - image.shape[1], cv2.BORDER_REFLECT_101)
+            for image in images
+        ]
+        with self.budget.reserve(self.estimate_bytes(height, width) * len(images)):
+            with self._torch.inference_mode():
+                batch = self._torch.cat([self._to_tensor(image) for image in padded])
+                output = self.model(batch).float().clamp_(0, 1).cpu().numpy().transpose(0, 2, 3, 1)
+        return [
+            output[i, :image.shape[0] * self.scale, :image.shape[1] * self.scale]
+            for i, image in enumerate(images)
+        ]
+
+    @staticmethod
+    def _to_image(output: np.ndarray) -> np.ndarray:
+        """Convert a float32 RGB image in [0, 1] back into a BGR uint8 image."""
+        output = (output * 255.0).round().astype(np.uint8)
+        return cv2.cvtColor(output, cv2.COLOR_RGB2BGR)
+
+    @staticmethod
+    def estimate_bytes(height: int, width: int) -> int:
+        """Estimated peak activation memory of one forward pass on a height x width input."""
+        return height * width * _BYTES_PER_INPUT_PIXEL
+
+    def _fit_tile_size(self, tile_size: int) -> int:
+        """Shrink tile_size until one padded tile fits under the memory ceiling."""
+        while tile_size > _MIN_TILE_SIZE:
+            padded = tile_size + 2 * self.tile_overlap
+            if self.estimate_bytes(padded, padded) <= self.budget.limit_bytes:
+                break
+            tile_size //= 2
+        return max(tile_size, _MIN_TILE_SIZE)
+
+    def upscale(self, image: np.ndarray) -> np.ndarray:
+        """
+        Upscale an image 4x.
+
+        Args:
+            image: BGR (or grayscale / BGRA) image as a NumPy array.
+
+        Returns:
+            The 4x upscaled BGR image as a uint8 NumPy array.
+        """
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+        h, w = image.shape[:2]
+        tile_size = self.tile_size
+        if not tile_size and self.estimate_bytes(h, w) > self.budget.limit_bytes:
+            # Untiled would exceed the ceiling: fall back to the largest tile that fits
+            tile_size = self._fit_tile_size(max(h, w))
+            logger.info(f"Crop {w}x{h} exceeds the memory ceiling, upscaling in {tile_size}px tiles")
+
+        if not tile_size or (h <= tile_size and w <= tile_size):
+            return self._to_image(self._forward(image))
+
+        return self._to_image(self._upscale_tiled(image, self._fit_tile_size(tile_size)))
+
+    def upscale_batch(self, images: list[np.ndarray]) -> list[np.ndarray]:
+        """
+        Upscale several images 4x with as few forward passes as possible.
+
+        Crops are sorted by size and grouped into batches whose padded activations fit
+        under the memory ceiling, so similar-sized faces share one pass. Crops that need
+        tiling on their own go through upscale().
+
+        Args:
+            images: BGR (or grayscale / BGRA) images as NumPy arrays.
+
+        Returns:
+            The 4x upscaled BGR images as uint8 NumPy arrays, in input order.
+        """
+        converted = []
+        for image in images:
+            if image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            elif image.shape[2] == 4:
+                image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+            converted.append(image)
+
+        results = [None] * len(converted)
+        batchable = []
+        for index, image in enumerate(converted):
+            h, w = image.shape[:2]
+            needs_tiling = (
+                (self.tile_size and (h > self.tile_size or w > self.tile_size))
+                or self.estimate_bytes(h, w) > self.budget.limit_bytes
+            )
+            if needs_tiling:
+                results[index] = self.upscale(image)
+            else:
+                batchable.append(index)
+
+        # Greedy batches of similar sizes (padding waste stays small)
+        batchable.sort(key=lambda i: converted[i].shape[0] * converted[i].shape[1])
+        batches, current = [], []
+        for index in batchable:
+            candidate = current + [index]
+            height = max(converted[i].shape[0] for i in candidate)
+            width = max(converted[i].shape[1] for i in candidate)
+            if current and self.estimate_bytes(height, width) * len(candidate) > self.budget.limit_bytes:
+                batches.append(current)
+                candidate = [index]
+            current = candidate
+        if current:
+            batches.append(current)
+
+        for batch in batches:
+            outputs = self._forward_batch([converted[i] for i in batch])
+            for index, output in zip(batch, outputs):
+                results[index] = self._to_image(output)
+
+        logger.debug(f"Upscaled {len(images)} crops in {len(batches)} batched pass(es)")
+        return results
+
+    def tiled_mean_abs_error(self, image: np.ndarray, tile_size: int) -> float:
+        """
+        Mean absolute difference (8-bit levels) between the tiled and the untiled 4x output.
+
+        Args:
+            image: BGR uint8 image larger than tile_size.
+            tile_size: Tile edge length in input pixels (tile_overlap is added on each side).
+
+        Returns:
+            The difference to compare with TILED_MAX_MEAN_ABS_ERROR.
+        """
+        untiled = self._to_image(self._forward(image)).astype(np.float32)
+        tiled = self._to_image(self._upscale_tiled(image, tile_size)).astype(np.float32)
+        return float(np.abs(tiled - untiled).mean())
+
+    def _upscale_tiled(self, image: np.ndarray, tile_size: int) -> np.ndarray:
+        """
+        Upscale image in overlapping tiles and feather-blend the seams.
+
+        Tiles run on the worker pool; the memory budget bounds how many are in flight.
+
+        Returns:
+            The blended float32 RGB output in [0, 1].
+        """
+        h, w = image.shape[:2]
+        scale = self.scale
+        overlap = self.tile_overlap
+
+        output = np.zeros((h * scale, w * scale, 3), dtype=np.float32)
+        weight = np.zeros((h * scale, w * scale, 1), dtype=np.float32)
+
+        # (core_y, core_x, y0, y1, x0, x1): core tile origin plus padded bounds
+        tiles = []
+        for y in range(0, h, tile_size):
+            for x in range(0, w, tile_size):
+                tiles.append((
+                    y, x,
+                    max(0, y - overlap), min(h, y + tile_size + overlap),
+                    max(0, x - overlap), min(w, x + tile_size + overlap),
+                ))
+
+        def run_tile(tile):
+            y0, y1, x0, x1 = tile[2:]
+            return tile, self._forward(image[y0:y1, x0:x1])
+
+        if self._pool is not None and len(tiles) > 1:
+            results = (f.result() for f in as_completed([self._pool.submit(run_tile, t) for t in tiles]))
+        else:
+            results = (run_tile(t) for t in tiles)
+
+        for (y, x, y0, y1, x0, x1), tile_out in results:
+            # Shared region with the previous / next tile along each axis
+            head_y = (min(y + overlap, y1) - y0) if y > 0 else 0
+            tail_y = (y1 - max(y0, y + tile_size - overlap)) if y + tile_size < h else 0
+            head_x = (min(x + overlap, x1) - x0) if x > 0 else 0
+            tail_x = (x1 - max(x0, x + tile_size - overlap)) if x + tile_size < w else 0
+
+            tile_weight = np.outer(
+                _blend_ramp((y1 - y0) * scale, head_y * scale, tail_y * scale),
+                _blend_ramp((x1 - x0) * scale, head_x * scale, tail_x * scale),
+            )[:, :, None]
+
+            output[y0 * scale:y1 * scale, x0 * scale:x1 * scale] += tile_out * tile_weight
+            weight[y0 * scale:y1 * scale, x0 * scale:x1 * scale] += tile_weight
+
+        logger.debug(f"Blended {len(tiles)} tiles of {tile_size}px (overlap {overlap}px)")
+        output /= weight
+        return output
@@ -0,0 +1,127 @@
+"""Tests for the micro-batching scheduler (services/batching.py)."""
+
+import asyncio
+import threading
+
+import pytest
+
+from services.batching import MicroBatcher
+
+
+class RecordingModel:
+    """batch_fn doubling its inputs and recording each batch it was called with."""
+
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+
+def test_submit_async_batches_more_requests_than_threads():
+    """Awaiting requests hold no thread, so one window gathers all of them."""
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=200)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit_async(i) for i in range(6)))
+
+    assert asyncio.run(scenario()) == [0, 2, 4, 6, 8, 10]
+    assert model.batches == [[0, 1, 2, 3, 4, 5]]
+    stats = batcher.stats()
+    assert stats['mean_batch_size'] == 6
+    assert stats['batch_sizes'] == {6: 1}
+
+
+def test_batches_are_capped_at_max_batch_size():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=200)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit_async(i) for i in range(10)))
+
+    assert asyncio.run(scenario()) == [i * 2 for i in range(10)]
+    assert [len(batch) for batch in model.batches] == [4, 4, 2]
+
+
+def test_items_are_grouped_by_key():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=200, key_fn=lambda item: item % 2)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit_async(i) for i in range(6)))
+
+    assert asyncio.run(scenario()) == [0, 2, 4, 6, 8, 10]
+    assert sorted(model.batches) == [[0, 2, 4], [1, 3, 5]]
+    stats = batcher.stats()
+    assert stats['windows'] == 1
+    assert stats['mean_window_size'] == 6
+    assert stats['mean_batch_size'] == 3
+
+
+def test_blocking_submit_from_threads():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=200)
+    results = {}
+
+    def submit(item):
+        results[item] = batcher.submit(item)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {0: 0, 1: 2, 2: 4}
+    assert sum(len(batch) for batch in model.batches) == 3
+
+
+def test_batch_errors_reach_every_caller_of_the_batch():
+    def failing(items):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(failing, max_batch_size=4, max_wait_ms=50)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit_async(i) for i in range(2)), return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    with pytest.raises(RuntimeError):
+        batcher.submit(0)
+
+
+def test_cancelled_callers_do_not_stop_the_batch_thread():
+    """A client that disconnects mid-batch (or while queued) must not kill the worker."""
+    running, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_model(items):
+        calls.append(list(items))
+        running.set()
+        release.wait(5)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(slow_model, max_batch_size=4, max_wait_ms=100)
+
+    async def scenario():
+        # Cancelled while its batch is running
+        in_batch = asyncio.ensure_future(batcher.submit_async(1))
+        await asyncio.get_running_loop().run_in_executor(None, running.wait, 5)
+        in_batch.cancel()
+        # Cancelled while still waiting in the queue
+        queued = asyncio.ensure_future(batcher.submit_async(2))
+        await asyncio.sleep(0)
+        queued.cancel()
+        release.set()
+
+        later = await asyncio.wait_for(batcher.submit_async(3), timeout=5)
+        return in_batch.cancelled(), queued.cancelled(), later
+
+    assert asyncio.run(scenario()) == (True, True, 6)
+    assert calls == [[1], [3]]
+    assert batcher._thread.is_alive()
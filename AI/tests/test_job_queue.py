@@ -0,0 +1,210 @@
+"""Tests for the persistent face job queue (services/job_queue.py)."""
+
+import asyncio
+import threading
+
+import pytest
+
+from services import job_queue as job_queue_module
+from services.job_queue import JobFailed, JobQueue, QueueFull
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'jobs.db')
+
+
+def test_job_runs_through_queued_running_done(db_path):
+    queue = JobQueue(db_path)
+    job_id, created = queue.submit('face', b'image', {'format': 'jpeg'})
+    assert created
+    assert queue.get(job_id)['status'] == 'queued'
+
+    job = queue.claim()
+    assert job == {'id': job_id, 'kind': 'face', 'params': {'format': 'jpeg'}, 'input': b'image', 'attempts': 1}
+    assert queue.get(job_id)['status'] == 'running'
+    assert queue.claim() is None
+
+    queue.complete(job_id, b'result', {'upscale': '4x'})
+    done = queue.get(job_id, with_result=True)
+    assert done['status'] == 'done'
+    assert done['result'] == b'result'
+    assert done['meta'] == {'upscale': '4x'}
+
+
+def test_submit_deduplicates_live_jobs_but_not_failed_ones(db_path):
+    queue = JobQueue(db_path)
+    first, _ = queue.submit('face', b'image', {}, dedupe_key='k')
+    assert queue.submit('face', b'image', {}, dedupe_key='k') == (first, False)
+
+    queue.claim()
+    queue.fail(first, 'no face', retry=False)
+    second, created = queue.submit('face', b'image', {}, dedupe_key='k')
+    assert created and second != first
+
+
+def test_submit_raises_queue_full(db_path):
+    queue = JobQueue(db_path, max_queued=2)
+    queue.submit('face', b'1', {})
+    queue.submit('face', b'2', {})
+    with pytest.raises(QueueFull):
+        queue.submit('face', b'3', {})
+    assert queue.stats()['queued'] == 2
+
+
+def test_failed_attempts_are_retried_until_max_attempts(db_path):
+    queue = JobQueue(db_path, max_attempts=2)
+    job_id, _ = queue.submit('face', b'image', {})
+
+    queue.claim()
+    queue.fail(job_id, 'busy', retry=True)
+    assert queue.get(job_id)['status'] == 'queued'
+
+    assert queue.claim()['attempts'] == 2
+    queue.fail(job_id, 'busy', retry=True)
+    failed = queue.get(job_id)
+    assert failed['status'] == 'failed'
+    assert failed['error'] == 'busy'
+
+
+def test_stale_jobs_left_running_are_recovered_on_startup(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(job_queue_module.time, 'time', lambda: now[0])
+    queue = JobQueue(db_path, stale_seconds=60)
+    job_id, _ = queue.submit('face', b'image', {})
+    queue.claim()
+
+    now[0] += 61
+    restarted = JobQueue(db_path, stale_seconds=60)
+    assert restarted.get(job_id)['status'] == 'queued'
+    assert restarted.claim()['attempts'] == 2
+
+
+def test_opening_the_database_does_not_steal_live_jobs(db_path, monkeypatch):
+    """A second process (another worker, another main.py) starting up leaves running jobs alone."""
+    now = [1000.0]
+    monkeypatch.setattr(job_queue_module.time, 'time', lambda: now[0])
+    queue = JobQueue(db_path, stale_seconds=60)
+    job_id, _ = queue.submit('face', b'image', {})
+    queue.claim()
+
+    now[0] += 30
+    other = JobQueue(db_path, stale_seconds=60)
+    assert other.get(job_id)['status'] == 'running'
+    assert other.claim() is None
+    queue.complete(job_id, b'result', {})
+    assert other.get(job_id)['status'] == 'done'
+
+
+def test_job_of_a_dead_worker_is_requeued_once_stale(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(job_queue_module.time, 'time', lambda: now[0])
+    queue = JobQueue(db_path, stale_seconds=60)
+    job_id, _ = queue.submit('face', b'image', {})
+    queue.claim()
+
+    # Still within the heartbeat window: left alone
+    now[0] += 50
+    assert queue.claim() is None
+    queue.heartbeat(job_id)
+    now[0] += 50
+    assert queue.claim() is None
+
+    # The worker stopped reporting: the next claim takes the job over
+    now[0] += 61
+    job = queue.claim()
+    assert job['id'] == job_id
+    assert job['attempts'] == 2
+    assert queue.stats()['recovered'] == 1
+
+
+def test_stale_job_out_of_attempts_is_failed(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(job_queue_module.time, 'time', lambda: now[0])
+    queue = JobQueue(db_path, max_attempts=1, stale_seconds=60)
+    job_id, _ = queue.submit('face', b'image', {})
+    queue.claim()
+
+    now[0] += 61
+    assert queue.claim() is None
+    assert queue.get(job_id)['status'] == 'failed'
+
+
+def test_concurrent_submits_from_separate_connections_deduplicate(db_path):
+    """Processes sharing the database (serve.py workers) must not both insert."""
+    JobQueue(db_path)
+    queues = [JobQueue(db_path) for _ in range(8)]
+    barrier = threading.Barrier(len(queues))
+    results = []
+
+    def submit(queue):
+        barrier.wait()
+        results.append(queue.submit('face', b'image', {}, dedupe_key='same'))
+
+    threads = [threading.Thread(target=submit, args=(queue,)) for queue in queues]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(created for _, created in results) == 1
+    assert len({job_id for job_id, _ in results}) == 1
+
+
+def test_concurrent_submits_from_separate_connections_respect_max_queued(db_path):
+    queues = [JobQueue(db_path, max_queued=3) for _ in range(8)]
+    barrier = threading.Barrier(len(queues))
+    outcomes = []
+
+    def submit(index, queue):
+        barrier.wait()
+        try:
+            queue.submit('face', str(index).encode(), {})
+            outcomes.append('queued')
+        except QueueFull:
+            outcomes.append('full')
+
+    threads = [threading.Thread(target=submit, args=item) for item in enumerate(queues)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count('queued') == 3
+    assert queues[0].stats()['queued'] == 3
+
+
+def test_purge_keeps_at_most_max_retained_finished_jobs(db_path):
+    queue = JobQueue(db_path, max_retained=1)
+    for data in (b'1', b'2'):
+        job_id, _ = queue.submit('face', data, {})
+        queue.claim()
+        queue.complete(job_id, b'result', {})
+
+    assert queue.purge() == 1
+    assert queue.stats()['done'] == 1
+
+
+def test_worker_pool_runs_handler_and_records_outcomes(db_path):
+    queue = JobQueue(db_path, poll_seconds=0.01, max_attempts=1)
+
+    async def handler(job):
+        if job['input'] == b'bad':
+            raise JobFailed('Invalid image file.')
+        return job['input'].upper(), {'kind': job['kind']}
+
+    async def scenario():
+        queue.start(handler, workers=2)
+        good, _ = queue.submit('face', b'good', {})
+        bad, _ = queue.submit('face', b'bad', {})
+        for _ in range(500):
+            if queue.stats()['queued'] == queue.stats()['running'] == 0:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return good, bad
+
+    good, bad = asyncio.run(scenario())
+    assert queue.get(good, with_result=True)['result'] == b'GOOD'
+    assert queue.get(bad)['status'] == 'failed'
+    assert queue.get(bad)['error'] == 'Invalid image file.'
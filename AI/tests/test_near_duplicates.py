@@ -0,0 +1,86 @@
+"""Tests for the perceptual-hash near-duplicate index (services/near_duplicates.py)."""
+
+import cv2
+import numpy as np
+
+from services.near_duplicates import NearDuplicateIndex, hamming_distances, perceptual_hash
+
+
+def _photo(seed: int) -> np.ndarray:
+    """A smooth synthetic photo (blurred noise), so resizing keeps its structure."""
+    noise = np.random.default_rng(seed).integers(0, 256, size=(48, 64, 3), dtype=np.uint8)
+    return cv2.resize(noise, (640, 480), interpolation=cv2.INTER_CUBIC)
+
+
+def _distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def test_hash_is_stable_under_resize_and_reencode():
+    photo = _photo(0)
+    original = perceptual_hash(photo)
+
+    resized = cv2.resize(photo, (320, 240), interpolation=cv2.INTER_AREA)
+    _, jpeg = cv2.imencode('.jpg', photo, [cv2.IMWRITE_JPEG_QUALITY, 60])
+    recompressed = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+
+    assert _distance(original, perceptual_hash(resized)) <= 4
+    assert _distance(original, perceptual_hash(recompressed)) <= 4
+    assert perceptual_hash(cv2.cvtColor(photo, cv2.COLOR_BGR2GRAY)) == perceptual_hash(photo)
+
+
+def test_different_photos_are_far_apart():
+    assert _distance(perceptual_hash(_photo(0)), perceptual_hash(_photo(1))) > 10
+
+
+def test_hamming_distances_match_popcount(monkeypatch):
+    hashes = np.array([0, 0xFFFFFFFFFFFFFFFF, 0b1011, 1 << 63], dtype=np.uint64)
+    expected = [_distance(int(value), 0b0011) for value in hashes]
+    assert list(hamming_distances(hashes, 0b0011)) == expected
+
+    # NumPy < 2 has no bitwise_count; the lookup-table fallback must agree
+    monkeypatch.delattr(np, 'bitwise_count', raising=False)
+    assert list(hamming_distances(hashes, 0b0011)) == expected
+
+
+def test_find_returns_the_closest_entry_within_max_distance():
+    index = NearDuplicateIndex(capacity=8, max_distance=4)
+    index.add(0b0000, 'face', 'far')
+    index.add(0b0111, 'face', 'near')
+
+    assert index.find(0b1111, 'face') == ('near', 1)
+    assert index.find((1 << 64) - 1, 'face') is None
+    stats = index.stats()
+    assert (stats['added'], stats['matches'], stats['misses']) == (2, 1, 1)
+
+
+def test_namespaces_are_kept_apart():
+    index = NearDuplicateIndex()
+    index.add(42, 'face:png', 'png-result')
+
+    assert index.find(42, 'face:webp') is None
+    assert index.find(42, 'face:png') == ('png-result', 0)
+
+    index.add(42, 'face:webp', 'webp-result')
+    assert index.find(42, 'face:webp') == ('webp-result', 0)
+
+
+def test_oldest_entry_is_overwritten_when_full():
+    index = NearDuplicateIndex(capacity=2, max_distance=0)
+    index.add(1, 'plate', 'first')
+    index.add(2, 'plate', 'second')
+    index.add(3, 'plate', 'third')
+
+    assert index.find(1, 'plate') is None
+    assert index.find(2, 'plate') == ('second', 0)
+    assert index.find(3, 'plate') == ('third', 0)
+    assert index.stats()['entries'] == 2
+
+
+def test_find_can_use_a_stricter_distance():
+    index = NearDuplicateIndex(max_distance=4)
+    index.add(0b0000, 'plate', 'earlier car')
+
+    assert index.find(0b0011, 'plate') == ('earlier car', 2)
+    assert index.find(0b0011, 'plate', max_distance=0) is None
+    assert index.find(0b0000, 'plate', max_distance=0) == ('earlier car', 0)
@@ -0,0 +1,60 @@
+"""Tests for the plate OCR helpers (services/plate_identifier.py)."""
+
+import cv2
+import numpy as np
+
+from services import config
+from services.metrics import OCR_VARIANT_SECONDS
+from services.plate_identifier import CarPlateIdentifier, OCR_VARIANTS
+
+
+def _identifier() -> CarPlateIdentifier:
+    """An identifier without models; tests stub whatever OCR it needs."""
+    return CarPlateIdentifier.__new__(CarPlateIdentifier)
+
+
+def _variant_counts() -> dict:
+    return {key: state[2] for key, state in OCR_VARIANT_SECONDS._values.items()}
+
+
+def test_batched_ocr_records_a_timing_per_variant(monkeypatch):
+    monkeypatch.setattr(config, 'PLATE_OCR_BATCHED', True)
+    monkeypatch.setattr(config, 'PLATE_OCR_EARLY_EXIT', False)
+    identifier = _identifier()
+    identifier._run_ocr_batched = lambda images: [(None, None)] * len(images)
+    image = np.zeros((20, 60), dtype=np.uint8)
+    before = _variant_counts()
+
+    ran, skipped = identifier._run_variants([(name, image) for name in OCR_VARIANTS])
+
+    assert [name for name, _ in ran] == list(OCR_VARIANTS)
+    assert skipped == []
+    after = _variant_counts()
+    for name in OCR_VARIANTS:
+        assert after[(name, 'batched')] - before.get((name, 'batched'), 0) == 1
+    assert not any(variant == 'batched' for variant, _ in after)
+
+
+def _plate(lines: list[str], width: int, height: int) -> np.ndarray:
+    """Grayscale plate crop: dark characters on a light background, one row per line."""
+    image = np.full((height, width), 230, dtype=np.uint8)
+    row_height = height // len(lines)
+    for row, text in enumerate(lines):
+        baseline = row * row_height + int(row_height * 0.8)
+        cv2.putText(image, text, (8, baseline), cv2.FONT_HERSHEY_SIMPLEX, row_height / 40, 20, max(2, row_height // 12))
+    return image
+
+
+def test_split_rows_finds_two_line_plates():
+    image = _plate(['WXY', '1234'], width=120, height=100)
+    top, bottom = _identifier()._split_rows(image)
+    assert top[0] == 0 and bottom[1] == 100
+    assert top[1] == bottom[0]
+    assert 35 <= top[1] <= 65
+
+
+def test_split_rows_keeps_single_lines_and_wide_crops_whole():
+    identifier = _identifier()
+    assert identifier._split_rows(_plate(['WXY 1234'], width=160, height=50)) == [(0, 50)]
+    assert identifier._split_rows(_plate(['WXY', '1234'], width=500, height=100)) == [(0, 100)]
+    assert identifier._split_rows(np.full((60, 120), 200, dtype=np.uint8)) == [(0, 60)]
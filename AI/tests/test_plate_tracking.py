@@ -0,0 +1,84 @@
+"""Tests for plate tracking across frames (services/plate_tracking.py)."""
+
+import numpy as np
+
+from services.plate_identifier import WELL_FORMED_PLATE
+from services.plate_tracking import PlateTracker, box_iou, consensus
+
+
+def _crop(seed: int, contrast: int = 255) -> np.ndarray:
+    """A noise crop; higher contrast measures sharper."""
+    noise = np.random.default_rng(seed).integers(0, 2, size=(30, 90, 3)) * contrast
+    return noise.astype(np.uint8)
+
+
+def _detection(box: tuple, confidence: float = 0.9) -> dict:
+    return {'box': box, 'confidence': confidence}
+
+
+def test_box_iou():
+    assert box_iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert box_iou((0, 0, 10, 10), (5, 0, 15, 10)) == 50 / 150
+    assert box_iou((0, 0, 10, 10), (10, 0, 20, 10)) == 0.0
+    assert box_iou((0, 0, 0, 0), (0, 0, 0, 0)) == 0.0
+
+
+def test_overlapping_detections_extend_one_track_per_vehicle():
+    tracker = PlateTracker(iou_threshold=0.3)
+    for frame in range(3):
+        shift = frame * 2
+        tracker.update(frame, [
+            _detection((10 + shift, 10, 60 + shift, 30)),
+            _detection((200 - shift, 50, 260 - shift, 70)),
+        ], [_crop(frame), _crop(frame + 10)])
+
+    tracks = tracker.tracks()
+    assert len(tracks) == 2
+    assert [track['frames'] for track in tracks] == [3, 3]
+    assert {track['track_id'] for track in tracks} == {0, 1}
+
+
+def test_track_survives_gaps_up_to_max_gap():
+    tracker = PlateTracker(max_gap=2)
+    box = (10, 10, 60, 30)
+    tracker.update(0, [_detection(box)], [_crop(0)])
+    tracker.update(2, [_detection(box)], [_crop(1)])
+    # Three frames since the last detection: a new vehicle
+    tracker.update(5, [_detection(box)], [_crop(2)])
+
+    assert [track['frames'] for track in tracker.tracks()] == [2, 1]
+    assert len(tracker.tracks(min_frames=2)) == 1
+
+
+def test_track_keeps_its_sharpest_crops_and_most_confident_box():
+    tracker = PlateTracker(crops_per_track=2)
+    contrasts = [40, 255, 80, 160]
+    confidences = [0.5, 0.6, 0.99, 0.7]
+    for frame, (contrast, confidence) in enumerate(zip(contrasts, confidences)):
+        box = (10 + frame, 10, 60 + frame, 30)
+        tracker.update(frame, [_detection(box, confidence)], [_crop(frame, contrast)])
+
+    (track,) = tracker.tracks()
+    assert track['frames'] == 4
+    assert [int(crop.max()) for crop in track['crops']] == [255, 160]
+    assert track['sharpness'] == sorted(track['sharpness'], reverse=True)
+    assert track['box'] == (12, 10, 62, 30)
+    assert track['detector_confidence'] == 0.99
+
+
+def test_consensus_pools_confidences_of_identical_readings():
+    readings = [('WXY 1234', 0.6), ('WXY 1284', 0.9), ('WXY 1234', 0.5), (None, None)]
+    plate, confidence, votes = consensus(readings)
+    assert plate == 'WXY 1234'
+    assert votes == 2
+    assert abs(confidence - 0.55) < 1e-9
+
+
+def test_consensus_prefers_well_formed_plates():
+    readings = [('WXY1234I', 0.9), ('WXY1234I', 0.9), ('WXY 1234', 0.6)]
+    assert consensus(readings)[0] == 'WXY1234I'
+    assert consensus(readings, WELL_FORMED_PLATE)[0] == 'WXY 1234'
+
+
+def test_consensus_without_readings():
+    assert consensus([(None, None), ('', 0.4)]) == (None, None, 0)
@@ -0,0 +1,106 @@
+"""Tests for the two-tier result cache (services/result_cache.py)."""
+
+import asyncio
+import os
+
+from services import result_cache as result_cache_module
+from services.result_cache import ResultCache
+
+
+def test_make_key_depends_on_bytes_namespace_and_version():
+    key = ResultCache.make_key(b'photo', 'face', 'v1')
+    assert key == ResultCache.make_key(memoryview(b'photo'), 'face', 'v1')
+    assert key != ResultCache.make_key(b'photo!', 'face', 'v1')
+    assert key != ResultCache.make_key(b'photo', 'plate', 'v1')
+    assert key != ResultCache.make_key(b'photo', 'face', 'v2')
+
+
+def test_memory_tier_evicts_least_recently_used_entry():
+    cache = ResultCache(max_entries=2, max_memory_bytes=1024)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    assert cache.get('a') == b'1'
+    cache.put('c', b'3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1'
+    assert cache.get('c') == b'3'
+    assert cache.stats()['memory_evictions'] == 1
+
+
+def test_memory_tier_is_bounded_by_bytes():
+    cache = ResultCache(max_entries=10, max_memory_bytes=10)
+    cache.put('a', b'x' * 6)
+    cache.put('b', b'y' * 6)
+    cache.put('huge', b'z' * 11)
+
+    assert cache.get('a') is None
+    assert cache.get('b') == b'y' * 6
+    assert cache.get('huge') is None
+    assert cache.stats()['memory_bytes'] == 6
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    cache = ResultCache(max_entries=10, max_memory_bytes=1024, disk_dir=str(tmp_path))
+    cache.put('ab12', b'result')
+
+    reopened = ResultCache(max_entries=10, max_memory_bytes=1024, disk_dir=str(tmp_path))
+    assert reopened.get('ab12') == b'result'
+    assert reopened.stats()['disk_hits'] == 1
+
+
+def test_disk_tier_expires_entries_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache_module.time, 'time', lambda: now[0])
+    cache = ResultCache(max_entries=10, max_memory_bytes=1024, disk_dir=str(tmp_path), disk_ttl_seconds=60)
+    cache.put('ab12', b'result')
+    # Only the disk tier expires; drop the memory copy
+    cache._memory.clear()
+
+    now[0] += 61
+    assert cache.get('ab12') is None
+    assert cache.stats()['disk_expired'] == 1
+    assert not os.path.exists(cache._disk_path('ab12'))
+
+
+def test_disk_tier_evicts_oldest_entries_over_size_limit(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache_module.time, 'time', lambda: now[0])
+    cache = ResultCache(max_entries=10, max_memory_bytes=1024, disk_dir=str(tmp_path), disk_max_bytes=10)
+    for key in ('aa01', 'bb02', 'cc03'):
+        cache.put(key, b'x' * 4)
+        now[0] += 1
+
+    stats = cache.stats()
+    assert stats['disk_entries'] == 2
+    assert stats['disk_bytes'] == 8
+    assert stats['disk_evictions'] == 1
+    assert 'aa01' not in cache._disk_index
+
+
+def test_rewritten_entry_is_evicted_last(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache_module.time, 'time', lambda: now[0])
+    cache = ResultCache(max_entries=10, max_memory_bytes=1024, disk_dir=str(tmp_path), disk_max_bytes=10)
+    for key in ('aa01', 'bb02', 'aa01', 'cc03'):
+        cache.put(key, b'x' * 4)
+        now[0] += 1
+
+    assert list(cache._disk_index) == ['aa01', 'cc03']
+
+
+def test_async_methods_use_both_tiers(tmp_path):
+    cache = ResultCache(max_entries=10, max_memory_bytes=1024, disk_dir=str(tmp_path))
+    data = os.urandom(256 * 1024)
+
+    async def scenario():
+        key = await ResultCache.make_key_async(memoryview(data), 'face', 'v1')
+        await cache.put_async(key, b'result')
+        cache._memory.clear()
+        return key, await cache.get_async(key), await cache.get_async('missing')
+
+    key, hit, miss = asyncio.run(scenario())
+    assert key == ResultCache.make_key(data, 'face', 'v1')
+    assert (hit, miss) == (b'result', None)
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['misses']) == (1, 1)
@@ -0,0 +1,30 @@
+"""Tests for the worker restart policy of the preforking launcher (serve.py)."""
+
+from serve import MAX_RESTART_BACKOFF_SECONDS, RestartBackoff
+
+
+def test_workers_that_ran_a_while_are_restarted_at_once():
+    backoff = RestartBackoff(failed_start_seconds=10, backoff_seconds=1, max_failed_starts=3)
+    assert backoff.delay_after_exit(3600) == 0.0
+    assert backoff.delay_after_exit(10) == 0.0
+    assert backoff.failed_starts == 0
+
+
+def test_failed_starts_back_off_exponentially_then_give_up():
+    backoff = RestartBackoff(failed_start_seconds=10, backoff_seconds=1, max_failed_starts=4)
+    assert [backoff.delay_after_exit(0.5) for _ in range(3)] == [1, 2, 4]
+    assert backoff.delay_after_exit(0.5) is None
+
+
+def test_a_healthy_run_resets_the_failed_starts():
+    backoff = RestartBackoff(failed_start_seconds=10, backoff_seconds=1, max_failed_starts=3)
+    backoff.delay_after_exit(1)
+    backoff.delay_after_exit(1)
+    backoff.delay_after_exit(60)
+    assert backoff.delay_after_exit(1) == 1
+
+
+def test_backoff_is_capped():
+    backoff = RestartBackoff(failed_start_seconds=10, backoff_seconds=1, max_failed_starts=100)
+    delays = [backoff.delay_after_exit(0) for _ in range(20)]
+    assert max(delays) == MAX_RESTART_BACKOFF_SECONDS
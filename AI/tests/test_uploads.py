@@ -0,0 +1,260 @@
+"""Tests for size-bounded upload ingestion (services/uploads.py)."""
+
+import asyncio
+import struct
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from services.uploads import BodySizeLimitMiddleware, BufferPool, UploadReader, sniff_dimensions
+
+
+class FakeUpload:
+    """The parts of an UploadFile that UploadReader uses."""
+
+    def __init__(self, data: bytes, size: int | None = None):
+        self.data = data
+        self.size = size
+        self.position = 0
+
+    async def read(self, count: int) -> bytes:
+        chunk = self.data[self.position:self.position + count]
+        self.position += len(chunk)
+        return chunk
+
+
+def _png_header(width: int, height: int) -> bytes:
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + b'\x08\x02\x00\x00\x00'
+
+
+def _jpeg_header(width: int, height: int) -> bytes:
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + bytes(9)
+    sof0 = b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00'
+    return b'\xff\xd8' + app0 + sof0
+
+
+def _reader(max_buffers: int = 1, initial_bytes: int = 16, **kwargs) -> UploadReader:
+    options = {'max_bytes': 1 << 20, 'max_pixels': 0, 'chunk_bytes': 8}
+    return UploadReader(**{**options, **kwargs}, pool=BufferPool(max_buffers=max_buffers, initial_bytes=initial_bytes))
+
+
+@pytest.mark.parametrize('header, expected', [
+    (_png_header(640, 480), (640, 480)),
+    (_jpeg_header(4000, 3000), (4000, 3000)),
+    (b'GIF89a' + struct.pack('<HH', 32, 16) + bytes(4), (32, 16)),
+    (b'BM' + bytes(16) + struct.pack('<ii', 100, -50) + bytes(4), (100, 50)),
+])
+def test_sniff_dimensions(header, expected):
+    assert sniff_dimensions(header) == expected
+    assert sniff_dimensions(memoryview(header)) == expected
+
+
+@pytest.mark.parametrize('extension', ['.tiff', '.ppm', '.pgm'])
+def test_sniff_dimensions_of_other_formats_opencv_decodes(extension):
+    image = np.zeros((30, 70, 3 if extension != '.pgm' else 1), dtype=np.uint8)
+    _, encoded = cv2.imencode(extension, image)
+    assert sniff_dimensions(encoded.tobytes()) == (70, 30)
+
+
+def test_sniff_dimensions_unknown_or_truncated():
+    assert sniff_dimensions(b'not an image') is None
+    assert sniff_dimensions(_jpeg_header(10, 10)[:-6]) is None
+
+
+def test_buffer_pool_reuses_and_bounds_buffers():
+    pool = BufferPool(max_buffers=1, initial_bytes=4)
+    first = pool.acquire()
+    extra = pool.acquire()
+    pool.release(first)
+    pool.release(extra)
+    assert pool.acquire() is first
+    assert pool.stats()['reused'] == 2
+
+
+def test_buffer_pool_grows_by_doubling_up_to_limit():
+    pool = BufferPool(max_buffers=1, initial_bytes=4)
+    buffer = pool.acquire()
+    assert pool.grow(buffer, 9, limit=100) is buffer
+    assert len(buffer) == 16
+    pool.grow(buffer, 70, limit=100)
+    assert len(buffer) == 100
+    assert pool.stats()['replaced'] == 0
+
+
+def test_open_yields_the_file_bytes():
+    async def scenario():
+        async with _reader().open(FakeUpload(b'0123456789' * 5)) as view:
+            return bytes(view)
+
+    assert asyncio.run(scenario()) == b'0123456789' * 5
+
+
+def test_view_is_released_when_the_block_exits():
+    async def scenario():
+        async with _reader().open(FakeUpload(b'small')) as view:
+            pass
+        return view
+
+    view = asyncio.run(scenario())
+    with pytest.raises(ValueError):
+        bytes(view)
+
+
+def test_overlapping_uploads_where_the_second_grows_the_pooled_buffer():
+    """A request still holding its view must not stop the next one from growing the buffer."""
+    reader = _reader(max_buffers=1, initial_bytes=16)
+    large = bytes(range(256)) * 4
+
+    async def first_request(started: asyncio.Event, resume: asyncio.Event):
+        async with reader.open(FakeUpload(b'small upload')) as contents:
+            key = bytes(contents)
+        # Like the endpoints: contents stays bound while the model work is awaited
+        started.set()
+        await resume.wait()
+        return key, contents
+
+    async def second_request():
+        async with reader.open(FakeUpload(large)) as contents:
+            return bytes(contents)
+
+    async def scenario():
+        started, resume = asyncio.Event(), asyncio.Event()
+        first = asyncio.create_task(first_request(started, resume))
+        await started.wait()
+        second = await second_request()
+        resume.set()
+        return await first, second
+
+    (key, _), second = asyncio.run(scenario())
+    assert key == b'small upload'
+    assert second == large
+    assert reader.pool.stats()['grown'] > 0
+    assert reader.pool.stats()['pooled_bytes'] >= len(large)
+
+
+def test_buffer_still_exported_after_the_block_is_replaced_when_it_grows():
+    reader = _reader(max_buffers=1, initial_bytes=16)
+    large = bytes(range(256)) * 4
+
+    async def scenario():
+        async with reader.open(FakeUpload(b'abc')) as contents:
+            # An array over the view that outlives the block (e.g. a cancelled decode)
+            leaked = np.frombuffer(contents, np.uint8)
+        async with reader.open(FakeUpload(large)) as contents:
+            return leaked, bytes(contents)
+
+    leaked, second = asyncio.run(scenario())
+    assert second == large
+    assert reader.pool.stats()['replaced'] == 1
+    assert reader.pool.stats()['pooled_bytes'] >= len(large)
+
+
+def test_rejects_files_over_max_bytes():
+    reader = _reader(max_bytes=20)
+
+    async def scenario(upload):
+        async with reader.open(upload):
+            pass
+
+    with pytest.raises(HTTPException) as declared:
+        asyncio.run(scenario(FakeUpload(b'x' * 30, size=30)))
+    with pytest.raises(HTTPException) as streamed:
+        asyncio.run(scenario(FakeUpload(b'x' * 30)))
+    assert declared.value.status_code == streamed.value.status_code == 413
+    assert reader.stats()['rejected_bytes'] == 2
+    # The rejected upload's buffer went back to the pool
+    assert reader.pool.stats()['free'] == 1
+
+
+def test_rejects_unknown_formats_when_max_pixels_is_set():
+    jpeg2000 = b'\x00\x00\x00\x0cjP  \r\n\x87\n' + bytes(64)
+
+    async def scenario(reader):
+        async with reader.open(FakeUpload(jpeg2000)) as view:
+            return bytes(view)
+
+    unlimited = _reader(max_pixels=0)
+    assert asyncio.run(scenario(unlimited)) == jpeg2000
+    limited = _reader(max_pixels=1000 * 1000)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario(limited))
+    assert error.value.status_code == 415
+    assert limited.stats()['rejected_format'] == 1
+
+
+def test_jpeg_frame_header_past_the_sniff_window_is_still_checked():
+    app1 = b'\xff\xe1' + struct.pack('>H', 2 + 200) + bytes(200)
+    jpeg = _jpeg_header(4000, 3000)
+    image = jpeg[:2] + app1 + jpeg[2:] + bytes(16)
+    reader = _reader(max_pixels=1000 * 1000, sniff_bytes=64)
+
+    async def scenario():
+        async with reader.open(FakeUpload(image)):
+            pass
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 413
+
+
+def test_rejects_images_over_max_pixels_from_the_header():
+    reader = _reader(max_pixels=1000 * 1000)
+
+    async def scenario():
+        async with reader.open(FakeUpload(_jpeg_header(4000, 3000) + bytes(64))):
+            pass
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 413
+    assert reader.stats()['rejected_pixels'] == 1
+
+
+def _limited_client(limit: int) -> TestClient:
+    """An app with one upload endpoint behind BodySizeLimitMiddleware."""
+    app = FastAPI()
+
+    @app.post('/upload')
+    async def upload(file: UploadFile = File(...)):
+        return {'bytes': len(await file.read())}
+
+    app.add_middleware(BodySizeLimitMiddleware, limit_for_path=lambda path: limit)
+    return TestClient(app)
+
+
+def _multipart(data: bytes) -> tuple[bytes, str]:
+    boundary = 'testboundary'
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.jpg"\r\n'
+        f'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def _chunks(body: bytes, size: int = 256):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def test_middleware_rejects_over_limit_bodies_by_content_length():
+    body, content_type = _multipart(b'x' * 4096)
+    response = _limited_client(1024).post('/upload', content=body, headers={'content-type': content_type})
+    assert response.status_code == 413
+
+
+def test_middleware_rejects_over_limit_chunked_bodies_with_413():
+    """No Content-Length: the body is cut off while streaming, and must still answer 413, not 400."""
+    body, content_type = _multipart(b'x' * 4096)
+    response = _limited_client(1024).post('/upload', content=_chunks(body), headers={'content-type': content_type})
+    assert response.status_code == 413
+    assert 'too large' in response.json()['detail']
+
+
+def test_middleware_passes_bodies_under_the_limit():
+    body, content_type = _multipart(b'x' * 100)
+    response = _limited_client(1024).post('/upload', content=_chunks(body), headers={'content-type': content_type})
+    assert response.status_code == 200
+    assert response.json() == {'bytes': 100}
@@ -0,0 +1,42 @@
+"""Tests for the per-crop upscale decision (services/upscale_policy.py)."""
+
+import numpy as np
+
+from services.upscale_policy import measure_sharpness, plan_upscale, prepare_input
+
+
+def _checkerboard(side: int, cell: int = 4) -> np.ndarray:
+    """A sharp test crop: black / white squares."""
+    rows, cols = np.indices((side, side)) // cell
+    return np.repeat((((rows + cols) % 2) * 255).astype(np.uint8)[..., None], 3, axis=2)
+
+
+def test_flat_crop_has_no_sharpness():
+    assert measure_sharpness(np.full((64, 64, 3), 128, dtype=np.uint8)) == 0.0
+
+
+def test_sharpness_does_not_depend_much_on_crop_size():
+    small = measure_sharpness(_checkerboard(256))
+    large = measure_sharpness(_checkerboard(1024, cell=16))
+    assert abs(small - large) / small < 0.25
+
+
+def test_plan_picks_skip_2x_and_4x():
+    sharp_large = _checkerboard(512)
+    sharp_medium = _checkerboard(300)
+    sharp_small = _checkerboard(100)
+    blurry_large = np.full((512, 512, 3), 100, dtype=np.uint8)
+    options = {'target_side': 512, 'sharpness_threshold': 50.0, 'policy': 'adaptive'}
+
+    assert plan_upscale(sharp_large, **options)['mode'] == 'skip'
+    assert plan_upscale(sharp_medium, **options)['mode'] == '2x'
+    assert plan_upscale(sharp_small, **options)['mode'] == '4x'
+    assert plan_upscale(blurry_large, **options)['mode'] == '4x'
+    assert plan_upscale(sharp_large, **{**options, 'policy': 'always'})['mode'] == '4x'
+
+
+def test_prepare_input_halves_for_2x():
+    crop = _checkerboard(300)
+    assert prepare_input(crop, 'skip') is None
+    assert prepare_input(crop, '4x') is crop
+    assert prepare_input(crop, '2x').shape == (150, 150, 3)